@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Async AI providers for the Discord bots.
+
+Wraps the async Anthropic and OpenAI SDK clients so a generation never blocks
+the Discord event loop: the gateway heartbeat and other channels keep running
+while a reply is being written, and many conversations are served at once.
+
+Each provider owns one pooled HTTP client for the life of the bot. Every call
+has a deadline that both bounds the HTTP request and cancels it for real
+(the connection is dropped), and the fallback provider only gets whatever
+time the first one left over. stream() hands text over as it is generated.
+
+A system prompt is a string, or blocks from cached_system() that put a
+prompt-cache breakpoint after the part that stays the same between
+messages. Token usage, including cache reads and writes, and latency are
+recorded per channel in UsageStats.
+"""
+import asyncio
+import os
+from collections import defaultdict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    import anthropic
+    HAS_ANTHROPIC = True
+except ImportError:
+    HAS_ANTHROPIC = False
+
+try:
+    import openai
+    HAS_OPENAI = True
+except ImportError:
+    HAS_OPENAI = False
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+ANTHROPIC_MODEL = "claude-sonnet-4-6"
+OPENAI_MODEL = "gpt-4"
+DEFAULT_MAX_TOKENS = 4000
+DEFAULT_TIMEOUT_SECONDS = 90
+# In-flight generations across all conversations; the rest wait their turn
+DEFAULT_MAX_CONCURRENT_REQUESTS = 16
+# Keep-alive connections held open per provider
+DEFAULT_POOL_SIZE = 20
+
+Messages = List[Dict[str, str]]
+SystemPrompt = Union[str, List[Dict[str, Any]]]
+
+USAGE_FIELDS = ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens", "output_tokens")
+
+
+def cached_system(prefix: str, suffix: str = "") -> List[Dict[str, Any]]:
+    """System prompt blocks with a cache breakpoint after the stable prefix.
+
+    Anthropic caches everything up to the breakpoint (tool definitions come
+    before the system prompt, so they are included) and later requests read
+    it back at a tenth of the input price and with less latency. The suffix
+    holds whatever changes between messages and is always sent fresh.
+    """
+    blocks = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+    if suffix:
+        blocks.append({"type": "text", "text": suffix})
+    return blocks
+
+
+def system_text(system_prompt: SystemPrompt) -> str:
+    """The system prompt as one string, for providers without cache breakpoints."""
+    if isinstance(system_prompt, str):
+        return system_prompt
+    return "\n\n".join(block["text"] for block in system_prompt)
+
+
+def read_usage(usage) -> Dict[str, int]:
+    """Token counts from an Anthropic usage object or dict; missing fields count as 0."""
+    if usage is None:
+        return dict.fromkeys(USAGE_FIELDS, 0)
+    if isinstance(usage, dict):
+        return {field: usage.get(field) or 0 for field in USAGE_FIELDS}
+    return {field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS}
+
+
+class UsageStats:
+    """Input, cache and output tokens and latency per key (a Discord channel)."""
+
+    def __init__(self):
+        self.totals: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def record(self, key: str, usage, seconds: float, first_token_seconds: Optional[float] = None) -> None:
+        counts = read_usage(usage)
+        totals = self.totals[key]
+        for field, value in counts.items():
+            totals[field] += value
+        # Latency split by whether the prefix came from the cache, to show what caching saves
+        kind = "cached" if counts["cache_read_input_tokens"] else "uncached"
+        totals[f"{kind}_requests"] += 1
+        totals[f"{kind}_seconds"] += seconds
+        if first_token_seconds is not None:
+            totals[f"{kind}_streamed"] += 1
+            totals[f"{kind}_first_token_seconds"] += first_token_seconds
+        print(
+            f"💾 {key}: {counts['input_tokens']} input + {counts['cache_read_input_tokens']} cache read"
+            f" + {counts['cache_creation_input_tokens']} cache write tokens,"
+            f" {counts['output_tokens']} output, {seconds:.1f}s | {self.summary(key)}"
+        )
+
+    def summary(self, key: str) -> str:
+        totals = self.totals[key]
+        prompt = totals["input_tokens"] + totals["cache_read_input_tokens"] + totals["cache_creation_input_tokens"]
+        parts = [f"{totals['cache_read_input_tokens'] / max(prompt, 1):.0%} of input tokens from cache"]
+        for kind in ("cached", "uncached"):
+            requests = totals[f"{kind}_requests"]
+            if requests:
+                latency = f"{kind} {totals[f'{kind}_seconds'] / requests:.1f}s avg"
+                if totals[f"{kind}_streamed"]:
+                    first_token = totals[f"{kind}_first_token_seconds"] / totals[f"{kind}_streamed"]
+                    latency += f" ({first_token:.2f}s to first token)"
+                parts.append(latency)
+        return ", ".join(parts)
+
+
+def _pooled_http_client(pool_size: int):
+    """One connection pool per provider, reused by every call; None lets the SDK build its own."""
+    if httpx is None:
+        return None
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        timeout=httpx.Timeout(DEFAULT_TIMEOUT_SECONDS, connect=10.0),
+    )
+
+
+class AnthropicProvider:
+    """Claude through anthropic.AsyncAnthropic."""
+
+    def __init__(self, api_key: str, model: str = ANTHROPIC_MODEL, pool_size: int = DEFAULT_POOL_SIZE):
+        self.model = model
+        self.name = model
+        # Retries happen inside the deadline or not at all; the chain falls back instead
+        self.client = anthropic.AsyncAnthropic(
+            api_key=api_key, max_retries=1, http_client=_pooled_http_client(pool_size)
+        )
+
+    async def complete(self, messages: Messages, system_prompt: SystemPrompt, max_tokens: int, timeout: float,
+                       usage: Optional[Dict[str, int]] = None) -> str:
+        response = await self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            system=system_prompt,
+            messages=messages,
+            timeout=timeout,
+        )
+        if usage is not None:
+            usage.update(read_usage(response.usage))
+        return response.content[0].text
+
+    async def stream(self, messages: Messages, system_prompt: SystemPrompt, max_tokens: int, timeout: float,
+                     usage: Optional[Dict[str, int]] = None) -> AsyncIterator[str]:
+        events = await self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            system=system_prompt,
+            messages=messages,
+            timeout=timeout,
+            stream=True,
+        )
+        try:
+            async for event in events:
+                if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                    yield event.delta.text
+                elif usage is not None and event.type == "message_start":
+                    # Input and cache counts arrive up front; output tokens with the final delta
+                    usage.update(read_usage(event.message.usage))
+                elif usage is not None and event.type == "message_delta":
+                    usage["output_tokens"] = getattr(event.usage, "output_tokens", 0) or 0
+        finally:
+            await events.close()
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+
+class OpenAIProvider:
+    """GPT through openai.AsyncOpenAI."""
+
+    def __init__(self, api_key: str, model: str = OPENAI_MODEL, pool_size: int = DEFAULT_POOL_SIZE):
+        self.model = model
+        self.name = model
+        self.client = openai.AsyncOpenAI(
+            api_key=api_key, max_retries=1, http_client=_pooled_http_client(pool_size)
+        )
+
+    async def complete(self, messages: Messages, system_prompt: SystemPrompt, max_tokens: int, timeout: float,
+                       usage: Optional[Dict[str, int]] = None) -> str:
+        # OpenAI caches long prompt prefixes on its own; there are no breakpoints to send
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "system", "content": system_text(system_prompt)}] + messages,
+            max_tokens=max_tokens,
+            timeout=timeout,
+        )
+        if usage is not None:
+            usage.update(self._read_usage(response.usage))
+        return response.choices[0].message.content
+
+    async def stream(self, messages: Messages, system_prompt: SystemPrompt, max_tokens: int, timeout: float,
+                     usage: Optional[Dict[str, int]] = None) -> AsyncIterator[str]:
+        chunks = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "system", "content": system_text(system_prompt)}] + messages,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        try:
+            async for chunk in chunks:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                # The usage-only chunk comes last, with no choices
+                if usage is not None and getattr(chunk, "usage", None):
+                    usage.update(self._read_usage(chunk.usage))
+        finally:
+            await chunks.close()
+
+    def _read_usage(self, usage) -> Dict[str, int]:
+        """Map OpenAI's prompt/completion counts onto the Anthropic-style fields UsageStats keeps."""
+        if usage is None:
+            return read_usage(None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) or 0
+        return {
+            "input_tokens": (usage.prompt_tokens or 0) - cached,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": cached,
+            "output_tokens": usage.completion_tokens or 0,
+        }
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+
+class ProviderChain:
+    """Try providers in order under one deadline per call."""
+
+    def __init__(
+        self,
+        providers: List[object],
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        max_concurrent_requests: Optional[int] = None,
+    ):
+        self.providers = providers
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        if max_concurrent_requests is None:
+            max_concurrent_requests = int(
+                os.getenv("AI_MAX_CONCURRENT_REQUESTS", DEFAULT_MAX_CONCURRENT_REQUESTS)
+            )
+        self.max_concurrent_requests = max_concurrent_requests
+        # Created on first use, inside the loop client.run() starts
+        self.slots: Optional[asyncio.Semaphore] = None
+        self.usage = UsageStats()
+
+    @property
+    def names(self) -> List[str]:
+        return [provider.name for provider in self.providers]
+
+    async def complete(
+        self,
+        messages: Messages,
+        system_prompt: SystemPrompt,
+        timeout: Optional[float] = None,
+        usage_key: str = "default",
+    ) -> Tuple[str, str]:
+        """Return (text, provider name), or an error text and "error" when every provider failed.
+
+        Raises asyncio.TimeoutError once the deadline passes; the request in
+        flight at that moment is cancelled, not left running in the background.
+        Token usage is recorded in self.usage under usage_key.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + (timeout if timeout is not None else self.timeout)
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.max_concurrent_requests)
+        # Time spent queued for a slot counts against the deadline too
+        await asyncio.wait_for(self.slots.acquire(), timeout=max(deadline - loop.time(), 0))
+        try:
+            for provider in self.providers:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                usage = {}
+                try:
+                    text = await asyncio.wait_for(
+                        provider.complete(messages, system_prompt, self.max_tokens, remaining, usage),
+                        timeout=remaining,
+                    )
+                    self.usage.record(usage_key, usage, loop.time() - started)
+                    return text, provider.name
+                except asyncio.TimeoutError:
+                    raise
+                except Exception as e:
+                    print(f"{provider.name} error: {e}")
+        finally:
+            self.slots.release()
+
+        return "❌ No AI providers available. Please check your API keys.", "error"
+
+    async def stream(
+        self,
+        messages: Messages,
+        system_prompt: SystemPrompt,
+        on_text: Callable[[str], Awaitable[None]],
+        timeout: Optional[float] = None,
+        usage_key: str = "default",
+    ) -> Tuple[str, str]:
+        """Like complete(), but on_text is awaited with each piece of text as it arrives.
+
+        The next provider is tried only if one fails before producing any
+        text; once part of a reply has been shown, a failure is raised.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + (timeout if timeout is not None else self.timeout)
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.max_concurrent_requests)
+        await asyncio.wait_for(self.slots.acquire(), timeout=max(deadline - loop.time(), 0))
+        try:
+            for provider in self.providers:
+                parts = []
+                usage = {}
+                first_token = None
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                pieces = provider.stream(messages, system_prompt, self.max_tokens, remaining, usage)
+                try:
+                    while True:
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            raise asyncio.TimeoutError()
+                        try:
+                            # Cancelling a pending read closes the provider's response
+                            text = await asyncio.wait_for(pieces.__anext__(), timeout=remaining)
+                        except StopAsyncIteration:
+                            break
+                        if first_token is None:
+                            first_token = loop.time() - started
+                        parts.append(text)
+                        await on_text(text)
+                    self.usage.record(usage_key, usage, loop.time() - started, first_token)
+                    return "".join(parts), provider.name
+                except asyncio.TimeoutError:
+                    raise
+                except Exception as e:
+                    print(f"{provider.name} error: {e}")
+                    if parts:
+                        raise
+                finally:
+                    await pieces.aclose()
+        finally:
+            self.slots.release()
+
+        return "❌ No AI providers available. Please check your API keys.", "error"
+
+    async def aclose(self) -> None:
+        for provider in self.providers:
+            await provider.aclose()
+
+
+async def stream_tool_message(client, on_text: Callable[[str], Awaitable[None]], usage: Optional[UsageStats] = None,
+                              usage_key: str = "default", **request) -> Any:
+    """One Messages API call on an anthropic.AsyncAnthropic client, streamed; for bots that pass tools.
+
+    on_text is awaited with the model's text as it arrives, before any
+    tool_use block; the final message (text and tool_use blocks) is returned.
+    Token usage and latency are recorded in usage under usage_key.
+    """
+    request.setdefault("timeout", DEFAULT_TIMEOUT_SECONDS)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    first_token = None
+    async with client.messages.stream(**request) as events:
+        async for text in events.text_stream:
+            if first_token is None:
+                first_token = loop.time() - started
+            await on_text(text)
+        message = await events.get_final_message()
+    if usage is not None:
+        usage.record(usage_key, message.usage, loop.time() - started, first_token)
+    return message
+
+
+def build_provider_chain(timeout: float = DEFAULT_TIMEOUT_SECONDS, **kwargs) -> ProviderChain:
+    """Claude first, then GPT, for whichever SDKs are installed and have an API key set."""
+    providers = []
+    if HAS_ANTHROPIC and os.getenv("ANTHROPIC_API_KEY"):
+        providers.append(AnthropicProvider(os.getenv("ANTHROPIC_API_KEY")))
+    if HAS_OPENAI and os.getenv("OPENAI_API_KEY"):
+        providers.append(OpenAIProvider(os.getenv("OPENAI_API_KEY")))
+    return ProviderChain(providers, timeout=timeout, **kwargs)
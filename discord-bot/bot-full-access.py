@@ -11,20 +11,16 @@ Like GitHub Copilot but via Discord:
 """
 import os
 import discord
-import subprocess
-from anthropic import Ant@client.event
-async def on_message(message):
-    # Ignore own messages
-    if message.author == client.user:
-        return
-    
-    # Only respond in designated channels or DMs
-    if message.channel.name not in ['dev-assistance', 'copilot-chat', 'development', 'token-macbook-air'] and not isinstance(message.channel, discord.DMChannel):
-        returnom pathlib import Path
+from anthropic import AsyncAnthropic
+from pathlib import Path
 import json
 from typing import Optional, Dict, List
 from dotenv import load_dotenv
 
+from ai_providers import UsageStats, stream_tool_message
+from command_runner import QUIET_SECONDS, CommandJob, JobBoard
+from streaming_reply import StreamingReply
+
 # Load environment variables
 load_dotenv()
 
@@ -34,7 +30,13 @@ intents.message_content = True
 client = discord.Client(intents=intents)
 
 # Claude setup
-anthropic = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+anthropic = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+# Commands started by tools, by Discord user, for !cancel
+RUNNING_JOBS = JobBoard()
+
+# Token, prompt-cache and latency totals per channel
+AI_USAGE = UsageStats()
 
 # Projects configuration
 PROJECTS = {
@@ -98,7 +100,7 @@ def load_cns_context() -> str:
     
     return "\n\n---\n\n".join(context)
 
-def load_project_context(project_key: str) -> str:
+async def load_project_context(project_key: str) -> str:
     """Load project-specific context (README, recent changes, structure)."""
     project = PROJECTS.get(project_key)
     if not project or not project["path"].exists():
@@ -114,27 +116,17 @@ def load_project_context(project_key: str) -> str:
     
     # Get recent git commits
     try:
-        result = subprocess.run(
-            ["git", "log", "-5", "--oneline"],
-            cwd=project_path,
-            capture_output=True,
-            text=True
-        )
-        if result.returncode == 0:
-            context.append(f"## Recent Commits\n{result.stdout}")
+        job = CommandJob(["git", "log", "-5", "--oneline"], cwd=str(project_path), timeout=30)
+        if await job.run() == 0:
+            context.append(f"## Recent Commits\n{job.output.render(2000)}")
     except:
         pass
     
     # Get git status
     try:
-        result = subprocess.run(
-            ["git", "status", "--short"],
-            cwd=project_path,
-            capture_output=True,
-            text=True
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            context.append(f"## Git Status\n{result.stdout}")
+        job = CommandJob(["git", "status", "--short"], cwd=str(project_path), timeout=30)
+        if await job.run() == 0 and job.output.render(2000).strip():
+            context.append(f"## Git Status\n{job.output.render(2000)}")
     except:
         pass
     
@@ -144,8 +136,20 @@ def load_project_context(project_key: str) -> str:
     
     return "\n\n".join(context)
 
-def execute_tool(tool_name: str, tool_input: Dict) -> str:
-    """Execute development tools: read_file, write_file, run_command, git_commit, etc."""
+async def run_job(job: CommandJob, message=None, title: str = "") -> CommandJob:
+    """Run a command job, streaming into a status reply when there is a message to reply to."""
+    if message is None:
+        await job.run()
+        return job
+    return await RUNNING_JOBS.run(job, message, title if len(title) <= 80 else title[:77] + "...",
+                                  show_after=QUIET_SECONDS)
+
+async def execute_tool(tool_name: str, tool_input: Dict, message=None) -> str:
+    """Execute development tools: read_file, write_file, run_command, git_commit, etc.
+
+    Commands run as async subprocesses; with a message, their output streams
+    into a status reply to it and !cancel from its author stops them.
+    """
     
     if tool_name == "read_file":
         file_path = Path(tool_input["path"])
@@ -164,66 +168,42 @@ def execute_tool(tool_name: str, tool_input: Dict) -> str:
         command = tool_input["command"]
         cwd = tool_input.get("cwd", ".")
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                cwd=cwd,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            return f"Exit code: {result.returncode}\n\nOutput:\n{result.stdout}\n{result.stderr}"
-        except subprocess.TimeoutExpired:
-            return "Error: Command timed out after 30s"
+            job = await run_job(CommandJob(command, cwd=cwd, timeout=30), message, command)
+            if job.timed_out:
+                return f"Error: Command timed out after 30s\n\nOutput:\n{job.output.render(4000)}"
+            if job.cancelled:
+                return f"Error: Command canceled by the user\n\nOutput:\n{job.output.render(4000)}"
+            return f"Exit code: {job.returncode}\n\nOutput:\n{job.output.render(8000)}"
         except Exception as e:
             return f"Error: {e}"
     
     elif tool_name == "git_status":
         project_path = tool_input["project_path"]
-        result = subprocess.run(
-            ["git", "status"],
-            cwd=project_path,
-            capture_output=True,
-            text=True
-        )
-        return result.stdout
+        job = await run_job(CommandJob(["git", "status"], cwd=project_path), message, "git status")
+        return job.output.render(8000)
     
     elif tool_name == "git_diff":
         project_path = tool_input["project_path"]
-        result = subprocess.run(
-            ["git", "diff"],
-            cwd=project_path,
-            capture_output=True,
-            text=True
-        )
-        return result.stdout[:2000]  # Limit output
+        job = await run_job(CommandJob(["git", "diff"], cwd=project_path), message, "git diff")
+        return job.output.render(2000)  # Limit output
     
     elif tool_name == "git_commit":
         project_path = tool_input["project_path"]
-        message = tool_input["message"]
+        commit_message = tool_input["message"]
         
         # Stage all changes
-        subprocess.run(["git", "add", "."], cwd=project_path)
+        await CommandJob(["git", "add", "."], cwd=project_path).run()
         
         # Commit
-        result = subprocess.run(
-            ["git", "commit", "-m", message],
-            cwd=project_path,
-            capture_output=True,
-            text=True
-        )
+        job = await run_job(CommandJob(["git", "commit", "-m", commit_message], cwd=project_path),
+                            message, "git commit")
         
-        return result.stdout
+        return job.output.render(8000)
     
     elif tool_name == "git_push":
         project_path = tool_input["project_path"]
-        result = subprocess.run(
-            ["git", "push"],
-            cwd=project_path,
-            capture_output=True,
-            text=True
-        )
-        return result.stdout
+        job = await run_job(CommandJob(["git", "push"], cwd=project_path), message, "git push")
+        return job.output.render(8000)
     
     elif tool_name == "list_files":
         dir_path = Path(tool_input["path"])
@@ -346,6 +326,14 @@ async def on_message(message):
     if message.channel.name not in ['dev-assistance', 'copilot-chat', 'development', 'token-macbook-air'] and not isinstance(message.channel, discord.DMChannel):
         return
     
+    # Stop commands this user's tool calls are running
+    if message.content.strip() == "!cancel":
+        if RUNNING_JOBS.cancel(message.author.id):
+            await message.reply("🛑 Stopping the running command...")
+        else:
+            await message.reply("ℹ️ No running command to cancel.")
+        return
+    
     # Detect project context from message
     current_project = None
     for key, project in PROJECTS.items():
@@ -354,7 +342,7 @@ async def on_message(message):
             break
     
     # Load project context if detected
-    project_context = load_project_context(current_project) if current_project else ""
+    project_context = await load_project_context(current_project) if current_project else ""
     
     # Send "typing" indicator
     async with message.channel.typing():
@@ -384,23 +372,30 @@ When making changes:
 
 Be concise and action-oriented."""
         
-        # Tool use loop
-        while True:
-            response = anthropic.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=4000,
-                system=system_prompt,
-                messages=messages,
-                tools=TOOLS
-            )
-            
-            # Check if Claude wants to use tools
-            if response.stop_reason == "tool_use":
+        # Tool use loop; every turn's text streams into one reply, tool calls run between turns
+        usage_key = getattr(message.channel, "name", "DM")
+        reply = StreamingReply(message)
+        await reply.start()
+        try:
+            while True:
+                response = await stream_tool_message(
+                    anthropic, reply.feed, AI_USAGE, usage_key,
+                    model="claude-3-5-sonnet-20241022",
+                    max_tokens=4000,
+                    system=system_prompt,
+                    messages=messages,
+                    tools=TOOLS
+                )
+                
+                # Check if Claude wants to use tools
+                if response.stop_reason != "tool_use":
+                    break
+                
                 # Execute tools
                 tool_results = []
                 for content_block in response.content:
                     if content_block.type == "tool_use":
-                        tool_result = execute_tool(content_block.name, content_block.input)
+                        tool_result = await execute_tool(content_block.name, content_block.input, message)
                         tool_results.append({
                             "type": "tool_result",
                             "tool_use_id": content_block.id,
@@ -410,23 +405,15 @@ Be concise and action-oriented."""
                 # Add assistant response and tool results to messages
                 messages.append({"role": "assistant", "content": response.content})
                 messages.append({"role": "user", "content": tool_results})
-            else:
-                # Final response - extract text and send
-                reply = ""
-                for content_block in response.content:
-                    if hasattr(content_block, "text"):
-                        reply += content_block.text
-                
-                # Send response (handle Discord's 2000 char limit)
-                if len(reply) <= 2000:
-                    await message.reply(reply)
-                else:
-                    # Split into chunks
-                    chunks = [reply[i:i+2000] for i in range(0, len(reply), 2000)]
-                    for chunk in chunks:
-                        await message.channel.send(chunk)
-                
-                break
+                # Keep the next turn's text apart from what this one already showed
+                if reply.text:
+                    await reply.feed("\n\n")
+            
+            # Long replies roll over into new messages without breaking code fences
+            await reply.finish()
+        except Exception as e:
+            print(f"Error processing message: {e}")
+            await reply.fail(f"❌ **Bot Error:** {str(e)}")
 
 # Run bot
 if __name__ == "__main__":
@@ -13,18 +13,11 @@ from pathlib import Path
 from typing import Optional, Dict, List
 from dotenv import load_dotenv
 
-# Try importing both AI providers
-try:
-    from anthropic import Anthropic
-    HAS_ANTHROPIC = True
-except ImportError:
-    HAS_ANTHROPIC = False
-
-try:
-    import openai
-    HAS_OPENAI = True
-except ImportError:
-    HAS_OPENAI = False
+from ai_providers import build_provider_chain
+from repo_registry import RepoRegistry
+from streaming_reply import StreamingReply
+
+AI_REQUEST_TIMEOUT_SECONDS = 90
 
 # Load environment variables
 if Path(".env.local").exists():
@@ -37,15 +30,9 @@ intents = discord.Intents.default()
 intents.message_content = True
 client = discord.Client(intents=intents)
 
-# AI Setup with fallback
-anthropic_client = None
-openai_client = None
-
-if HAS_ANTHROPIC and os.getenv("ANTHROPIC_API_KEY"):
-    anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
-if HAS_OPENAI and os.getenv("OPENAI_API_KEY"):
-    openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# AI Setup with fallback: async clients with pooled connections, so a generation
+# never blocks the gateway heartbeat or other conversations
+ai = build_provider_chain(timeout=AI_REQUEST_TIMEOUT_SECONDS)
 
 # Projects configuration - Windows compatible
 PROJECTS = {
@@ -65,15 +52,16 @@ PROJECTS = {
     }
 }
 
+REPO_SEARCH_PATHS = [Path(r"E:\Repos"), Path(r"C:\Repo")]
+
 def discover_repositories():
     """Auto-discover all Git repositories in the workspace folders."""
     discovered = {}
-    search_paths = [Path(r"E:\Repos"), Path(r"C:\Repo")]
     
     # Track already added paths to avoid duplicates
     added_paths = set()
     
-    for search_path in search_paths:
+    for search_path in REPO_SEARCH_PATHS:
         if not search_path.exists():
             continue
             
@@ -97,54 +85,37 @@ def discover_repositories():
     
     return discovered
 
-async def call_ai_api(messages, system_prompt):
-    """Call AI API with fallback from Anthropic to OpenAI"""
-    
-    # Try Anthropic Claude first
-    if anthropic_client:
-        try:
-            response = anthropic_client.messages.create(
-                model="claude-sonnet-4-6",
-                max_tokens=4000,
-                system=system_prompt,
-                messages=messages
-            )
-            return response.content[0].text, "claude"
-        except Exception as e:
-            print(f"Claude error: {e}")
-    
-    # Fallback to OpenAI
-    if openai_client:
-        try:
-            # Convert to OpenAI format
-            openai_messages = [{"role": "system", "content": system_prompt}] + messages
-            
-            response = openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=openai_messages,
-                max_tokens=4000
-            )
-            return response.choices[0].message.content, "gpt-4"
-        except Exception as e:
-            print(f"OpenAI error: {e}")
-    
-    return "❌ No AI providers available. Please check your API keys.", "error"
+def scan_projects() -> Dict:
+    """Configured and discovered projects, each flagged "available" if its path exists."""
+    projects = {**PROJECTS, **discover_repositories()}
+    return {key: {**project, "available": project["path"].exists()} for key, project in projects.items()}
+
+# Scanned once, then rescanned in the background only when the workspace folders change
+PROJECT_REGISTRY = RepoRegistry(
+    scan_projects,
+    roots=REPO_SEARCH_PATHS + [project["path"].parent for project in PROJECTS.values()]
+)
+
+async def call_ai_api(messages, system_prompt, on_text=None, timeout=AI_REQUEST_TIMEOUT_SECONDS):
+    """Call AI API with fallback from Claude to OpenAI; raises asyncio.TimeoutError past the deadline.
+
+    With on_text, the reply is streamed and on_text is awaited with each piece as it arrives.
+    """
+    if on_text is None:
+        return await ai.complete(messages, system_prompt, timeout=timeout)
+    return await ai.stream(messages, system_prompt, on_text, timeout=timeout)
 
 @client.event
 async def on_ready():
-    ai_status = []
-    if anthropic_client:
-        ai_status.append("🧠 Claude")
-    if openai_client:
-        ai_status.append("🤖 GPT-4")
+    ai_status = ai.names
     
     print(f'🤖 Discord Development Bot connected as {client.user}')
     print(f'🧠 AI Providers: {" & ".join(ai_status) if ai_status else "❌ None"}')
     print(f'📁 Watching repositories in: E:\\Repos & C:\\Repo')
     
-    all_projects = {**PROJECTS, **discover_repositories()}
-    available_projects = [key for key, project in all_projects.items() 
-                         if key != "auto-discover" and project["path"].exists()]
+    # Projects were discovered at startup; keep the list fresh from here on
+    await PROJECT_REGISTRY.start()
+    available_projects = [key for key, project in PROJECT_REGISTRY.repos.items() if project["available"]]
     print(f'🚀 Available projects: {", ".join(available_projects)}')
 
 @client.event
@@ -158,16 +129,17 @@ async def on_message(message):
         and not isinstance(message.channel, discord.DMChannel)):
         return
     
+    reply = None
     try:
         async with message.channel.typing():
-            all_projects = {**PROJECTS, **discover_repositories()}
+            all_projects = PROJECT_REGISTRY.repos
             
             system_context = f"""You are a Discord development bot with full access to the user's codebase.
 
 **Available Projects:**
 {chr(10).join([f"- **{key}**: {project['name']} at {project['path']}" 
                for key, project in all_projects.items() 
-               if key != "auto-discover" and project['path'].exists()])}
+               if project['available']])}
 
 **Guidelines:**
 1. Help with code development, git operations, file management
@@ -177,30 +149,33 @@ async def on_message(message):
 
 The user expects you to be helpful with their development work across all repositories."""
 
+            # Stream into a placeholder reply, rolling over to new messages at Discord's limit
+            reply = StreamingReply(message)
+            await reply.start()
             response_text, ai_used = await call_ai_api(
                 [{"role": "user", "content": message.content}], 
-                system_context
+                system_context,
+                on_text=reply.feed
             )
             
             # Add AI provider indicator
-            if ai_used != "error":
-                response_text += f"\n\n*Powered by {ai_used}*"
-            
-            # Split long messages
-            if len(response_text) > 2000:
-                chunks = [response_text[i:i+2000] for i in range(0, len(response_text), 2000)]
-                for i, chunk in enumerate(chunks):
-                    if i == 0:
-                        await message.reply(chunk)
-                    else:
-                        await message.channel.send(chunk)
+            if ai_used == "error":
+                await reply.fail(response_text)
             else:
-                await message.reply(response_text)
+                await reply.finish(f"\n\n*Powered by {ai_used}*")
                 
+    except asyncio.TimeoutError:
+        if reply:
+            await reply.fail("⏰ AI request timed out. Please try again.")
+        else:
+            await message.reply("⏰ AI request timed out. Please try again.")
     except Exception as e:
         error_msg = f"❌ **Bot Error:** {str(e)}"
         print(f"Error processing message: {e}")
-        await message.reply(error_msg)
+        if reply:
+            await reply.fail(error_msg)
+        else:
+            await message.reply(error_msg)
 
 if __name__ == "__main__":
     # Check for required environment variables
@@ -11,14 +11,18 @@ Customized for your repository structure:
 """
 import os
 import discord
-import subprocess
 import json
 import asyncio
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 from pathlib import Path
 from typing import Optional, Dict, List
 from dotenv import load_dotenv
 
+from ai_providers import UsageStats, cached_system, stream_tool_message
+from command_runner import QUIET_SECONDS, CommandJob, JobBoard
+from repo_registry import RepoRegistry
+from streaming_reply import StreamingReply
+
 # Load environment variables
 # Try .env.local first (preferred for security), fallback to .env
 if Path(".env.local").exists():
@@ -32,7 +36,13 @@ intents.message_content = True
 client = discord.Client(intents=intents)
 
 # Claude setup
-anthropic = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+anthropic = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+# Commands started by tools, by Discord user, for !cancel
+RUNNING_JOBS = JobBoard()
+
+# Token, prompt-cache and latency totals per channel
+AI_USAGE = UsageStats()
 
 # Projects configuration - Updated for your Windows setup
 PROJECTS = {
@@ -78,15 +88,16 @@ PROJECTS = {
 # CNS context loading - Windows compatible
 CNS_DIR = Path(r"E:\Repos\my-ai-agent-team\.personal-cns\cns")
 
+REPO_SEARCH_PATHS = [
+    Path(r"E:\Repos"),
+    Path(r"C:\Repo")
+]
+
 def discover_repositories():
     """Auto-discover all Git repositories in the workspace folders."""
     discovered = {}
-    search_paths = [
-        Path(r"E:\Repos"),
-        Path(r"C:\Repo")
-    ]
     
-    for search_path in search_paths:
+    for search_path in REPO_SEARCH_PATHS:
         if not search_path.exists():
             continue
             
@@ -104,6 +115,18 @@ def discover_repositories():
     
     return discovered
 
+def scan_projects() -> Dict:
+    """Configured and discovered projects, each flagged "available" if its path exists."""
+    projects = {key: project for key, project in PROJECTS.items() if key != "auto-discover"}
+    projects.update(discover_repositories())
+    return {key: {**project, "available": project["path"].exists()} for key, project in projects.items()}
+
+# Scanned once, then rescanned in the background only when the workspace folders change
+PROJECT_REGISTRY = RepoRegistry(
+    scan_projects,
+    roots=REPO_SEARCH_PATHS + [project["path"].parent for key, project in PROJECTS.items() if key != "auto-discover"]
+)
+
 def load_cns_context() -> str:
     """Load CNS brain, memory, reflexes for Claude context."""
     context = []
@@ -140,12 +163,11 @@ def load_cns_context() -> str:
     
     return "\n\n---\n\n".join(context)
 
-def load_project_context(project_key: str) -> str:
+async def load_project_context(project_key: str) -> str:
     """Load project-specific context (README, recent changes, structure)."""
-    all_projects = {**PROJECTS, **discover_repositories()}
-    project = all_projects.get(project_key)
+    project = PROJECT_REGISTRY.get(project_key)
     
-    if not project or not project["path"].exists():
+    if not project or not project["available"]:
         return f"Project '{project_key}' not found or path doesn't exist."
     
     context = []
@@ -165,29 +187,17 @@ def load_project_context(project_key: str) -> str:
     
     # Get recent git commits
     try:
-        result = subprocess.run(
-            ["git", "log", "-10", "--oneline", "--no-merges"],
-            cwd=project_path,
-            capture_output=True,
-            text=True,
-            encoding='utf-8'
-        )
-        if result.returncode == 0:
-            context.append(f"## Recent Commits\n{result.stdout}")
+        job = CommandJob(["git", "log", "-10", "--oneline", "--no-merges"], cwd=str(project_path), timeout=30)
+        if await job.run() == 0:
+            context.append(f"## Recent Commits\n{job.output.render(2000)}")
     except Exception as e:
         context.append(f"## Git Log Error\n{e}")
     
     # Get git status
     try:
-        result = subprocess.run(
-            ["git", "status", "--short"],
-            cwd=project_path,
-            capture_output=True,
-            text=True,
-            encoding='utf-8'
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            context.append(f"## Git Status\n{result.stdout}")
+        job = CommandJob(["git", "status", "--short"], cwd=str(project_path), timeout=30)
+        if await job.run() == 0 and job.output.render(2000).strip():
+            context.append(f"## Git Status\n{job.output.render(2000)}")
     except Exception as e:
         pass
     
@@ -208,8 +218,20 @@ def load_project_context(project_key: str) -> str:
     
     return "\n\n".join(context)
 
-def execute_tool(tool_name: str, tool_input: Dict) -> str:
-    """Execute development tools with enhanced Windows support."""
+async def run_job(job: CommandJob, message=None, title: str = "") -> CommandJob:
+    """Run a command job, streaming into a status reply when there is a message to reply to."""
+    if message is None:
+        await job.run()
+        return job
+    return await RUNNING_JOBS.run(job, message, title if len(title) <= 80 else title[:77] + "...",
+                                  show_after=QUIET_SECONDS)
+
+async def execute_tool(tool_name: str, tool_input: Dict, message=None) -> str:
+    """Execute development tools with enhanced Windows support.
+
+    Commands run as async subprocesses; with a message, their output streams
+    into a status reply to it and !cancel from its author stops them.
+    """
     
     if tool_name == "read_file":
         try:
@@ -278,66 +300,51 @@ def execute_tool(tool_name: str, tool_input: Dict) -> str:
             if cmd_parts and cmd_parts[0] not in safe_commands:
                 return f"❌ Command not allowed for security: {cmd_parts[0]}"
             
-            result = subprocess.run(
-                command,
-                shell=True,
-                cwd=cwd,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                encoding='utf-8'
-            )
+            job = await run_job(CommandJob(command, cwd=cwd, timeout=timeout), message, command)
+            if job.timed_out:
+                return f"❌ Command timed out after {timeout}s\n```\n{job.output.render(1000)}\n```"
+            if job.cancelled:
+                return f"❌ Command canceled by the user\n```\n{job.output.render(1000)}\n```"
             
             output = f"**Command:** `{command}`\n"
-            output += f"**Exit Code:** {result.returncode}\n\n"
+            output += f"**Exit Code:** {job.returncode}\n\n"
             
-            if result.stdout:
-                output += f"**Output:**\n```\n{result.stdout[:2000]}\n```\n"
-            if result.stderr:
-                output += f"**Errors:**\n```\n{result.stderr[:1000]}\n```"
+            # stdout and stderr arrive interleaved, as in a terminal
+            text = job.output.render(3000)
+            if text.strip():
+                output += f"**Output:**\n```\n{text}\n```\n"
                 
             return output
-        except subprocess.TimeoutExpired:
-            return f"❌ Command timed out after {timeout}s"
         except Exception as e:
             return f"❌ Error running command: {e}"
     
     elif tool_name == "git_status":
         project_path = Path(tool_input["project_path"])
-        return execute_tool("run_command", {"command": "git status", "cwd": str(project_path)})
+        return await execute_tool("run_command", {"command": "git status", "cwd": str(project_path)}, message)
     
     elif tool_name == "git_diff":
         project_path = Path(tool_input["project_path"])
-        return execute_tool("run_command", {"command": "git diff", "cwd": str(project_path)})
+        return await execute_tool("run_command", {"command": "git diff", "cwd": str(project_path)}, message)
     
     elif tool_name == "git_commit":
         try:
             project_path = Path(tool_input["project_path"])
-            message = tool_input["message"]
+            commit_message = tool_input["message"]
             
             # Stage all changes
-            stage_result = subprocess.run(
-                ["git", "add", "."],
-                cwd=project_path,
-                capture_output=True,
-                text=True
-            )
+            await CommandJob(["git", "add", "."], cwd=str(project_path), timeout=60).run()
             
             # Commit
-            commit_result = subprocess.run(
-                ["git", "commit", "-m", message],
-                cwd=project_path,
-                capture_output=True,
-                text=True
-            )
+            commit = await run_job(CommandJob(["git", "commit", "-m", commit_message], cwd=str(project_path),
+                                              timeout=60), message, "git commit")
             
-            return f"**Git Commit Result:**\n```\n{commit_result.stdout}\n{commit_result.stderr}\n```"
+            return f"**Git Commit Result:**\n```\n{commit.output.render(2000)}\n```"
         except Exception as e:
             return f"❌ Git commit error: {e}"
     
     elif tool_name == "git_push":
         project_path = Path(tool_input["project_path"])
-        return execute_tool("run_command", {"command": "git push", "cwd": str(project_path)})
+        return await execute_tool("run_command", {"command": "git push", "cwd": str(project_path)}, message)
     
     elif tool_name == "list_files":
         try:
@@ -365,14 +372,9 @@ def execute_tool(tool_name: str, tool_input: Dict) -> str:
             return f"❌ Error listing files: {e}"
     
     elif tool_name == "discover_projects":
-        discovered = discover_repositories()
-        all_projects = {**PROJECTS, **discovered}
-        
         result = "**Available Projects:**\n\n"
-        for key, project in all_projects.items():
-            if key == "auto-discover":
-                continue
-            status = "✅" if project["path"].exists() else "❌"
+        for key, project in PROJECT_REGISTRY.repos.items():
+            status = "✅" if project["available"] else "❌"
             result += f"{status} **{key}**: {project['name']} ({project['stack']})\n"
             result += f"   📁 {project['path']}\n\n"
         
@@ -501,15 +503,48 @@ TOOLS = [
 # Load CNS context once at startup
 CNS_CONTEXT = load_cns_context()
 
+def build_system_prefix(all_projects: Dict) -> str:
+    """The part of the system prompt that is the same for every message.
+
+    It is sent with a prompt-cache breakpoint, which also covers TOOLS, so
+    nothing here may vary per message: the project list is sorted and the
+    per-message project context goes after it, uncached.
+    """
+    project_lines = [f"- **{key}**: {project['name']} at {project['path']}"
+                     for key, project in sorted(all_projects.items())
+                     if project['available']]
+    return f"""You are a Discord development bot with full access to the user's codebase.
+
+**Your Capabilities:**
+- Read/write files across all repositories
+- Execute git operations (status, diff, commit, push)
+- Run safe terminal commands
+- Access user's CNS (Central Neural System) knowledge base
+
+**Guidelines:**
+1. Always confirm destructive operations (delete, overwrite) before executing
+2. Use tools to gather information before making changes
+3. Provide clear explanations of what you're doing
+4. Create backups when modifying files
+5. Follow the user's CNS principles and preferences
+6. Be proactive - if you see issues, suggest improvements
+
+Respond naturally and helpfully. The user expects you to take action, not just provide instructions.
+
+**Available Projects:**
+{chr(10).join(project_lines)}
+
+**CNS Context (User's Personal Knowledge Base):**
+{CNS_CONTEXT}"""
+
 @client.event
 async def on_ready():
     print(f'🤖 Discord Development Bot connected as {client.user}')
     print(f'📁 Watching repositories in: E:\\Repos & C:\\Repo')
     
-    # Discover and show available projects
-    all_projects = {**PROJECTS, **discover_repositories()}
-    available_projects = [key for key, project in all_projects.items() 
-                         if key != "auto-discover" and project["path"].exists()]
+    # Projects were discovered at startup; keep the list fresh from here on
+    await PROJECT_REGISTRY.start()
+    available_projects = [key for key, project in PROJECT_REGISTRY.repos.items() if project["available"]]
     print(f'🚀 Available projects: {", ".join(available_projects)}')
 
 @client.event
@@ -524,50 +559,45 @@ async def on_message(message):
         and not isinstance(message.channel, discord.DMChannel)):
         return
     
+    # Stop commands this user's tool calls are running
+    if message.content.strip() == "!cancel":
+        if RUNNING_JOBS.cancel(message.author.id):
+            await message.reply("🛑 Stopping the running command...")
+        else:
+            await message.reply("ℹ️ No running command to cancel.")
+        return
+    
+    reply = None
     try:
         # Show typing indicator
         async with message.channel.typing():
             # Detect project context from message
             current_project = None
-            all_projects = {**PROJECTS, **discover_repositories()}
+            all_projects = PROJECT_REGISTRY.repos
             
             for project_key in all_projects.keys():
-                if project_key != "auto-discover" and project_key in message.content.lower():
+                if project_key in message.content.lower():
                     current_project = project_key
                     break
             
-            # Build context for Claude
-            system_context = f"""You are a Discord development bot with full access to the user's codebase.
-
-**Your Capabilities:**
-- Read/write files across all repositories
-- Execute git operations (status, diff, commit, push)
-- Run safe terminal commands
-- Access user's CNS (Central Neural System) knowledge base
-
-**Available Projects:**
-{chr(10).join([f"- **{key}**: {project['name']} at {project['path']}" 
-               for key, project in all_projects.items() 
-               if key != "auto-discover" and project['path'].exists()])}
-
-**CNS Context (User's Personal Knowledge Base):**
-{CNS_CONTEXT}
-
-**Current Project Context:**
-{load_project_context(current_project) if current_project else "No specific project detected. Use discover_projects tool to see all available projects."}
-
-**Guidelines:**
-1. Always confirm destructive operations (delete, overwrite) before executing
-2. Use tools to gather information before making changes
-3. Provide clear explanations of what you're doing
-4. Create backups when modifying files
-5. Follow the user's CNS principles and preferences
-6. Be proactive - if you see issues, suggest improvements
-
-Respond naturally and helpfully. The user expects you to take action, not just provide instructions."""
+            if current_project:
+                project_context = await load_project_context(current_project)
+            else:
+                project_context = "No specific project detected. Use discover_projects tool to see all available projects."
+            
+            # Build context for Claude: a cached prefix (tools, identity, CNS, projects)
+            # and the current project's README and git state after it
+            system_context = cached_system(
+                build_system_prefix(all_projects),
+                f"**Current Project Context:**\n{project_context}"
+            )
 
-            # Call Claude API
-            response = anthropic.messages.create(
+            # Call Claude API; its text streams into the reply while tool calls are still to come
+            usage_key = getattr(message.channel, "name", "DM")
+            reply = StreamingReply(message)
+            await reply.start()
+            response = await stream_tool_message(
+                anthropic, reply.feed, AI_USAGE, usage_key,
                 model="claude-sonnet-4-6",
                 max_tokens=4000,
                 system=system_context,
@@ -575,50 +605,35 @@ Respond naturally and helpfully. The user expects you to take action, not just p
                 tools=TOOLS
             )
             
-            # Process response and tool calls
-            response_text = ""
-            
+            # Run the tool calls, each followed by Claude's interpretation, streamed as well
             for content_block in response.content:
-                if content_block.type == "text":
-                    response_text += content_block.text
-                elif content_block.type == "tool_use":
-                    tool_name = content_block.name
-                    tool_input = content_block.input
-                    
-                    # Execute tool
-                    tool_result = execute_tool(tool_name, tool_input)
-                    
-                    # Add tool result to response
-                    response_text += f"\n\n🔧 **Tool Used: {tool_name}**\n{tool_result}"
-                    
-                    # If this was a tool call, get Claude's interpretation
-                    if tool_result and not tool_result.startswith("❌"):
-                        follow_up = anthropic.messages.create(
-                            model="claude-sonnet-4-6",
-                            max_tokens=1000,
-                            system="Interpret this tool result and provide a helpful summary or next steps.",
-                            messages=[
-                                {"role": "user", "content": f"Tool '{tool_name}' returned: {tool_result}"}
-                            ]
-                        )
-                        if follow_up.content:
-                            response_text += f"\n\n💡 **Analysis:** {follow_up.content[0].text}"
+                if content_block.type != "tool_use":
+                    continue
+                tool_name = content_block.name
+                tool_result = await execute_tool(tool_name, content_block.input, message)
+                await reply.feed(f"\n\n🔧 **Tool Used: {tool_name}**\n{tool_result}")
+                
+                if tool_result and not tool_result.startswith("❌"):
+                    await reply.feed("\n\n💡 **Analysis:** ")
+                    await stream_tool_message(
+                        anthropic, reply.feed, AI_USAGE, usage_key,
+                        model="claude-sonnet-4-6",
+                        max_tokens=1000,
+                        system="Interpret this tool result and provide a helpful summary or next steps.",
+                        messages=[
+                            {"role": "user", "content": f"Tool '{tool_name}' returned: {tool_result}"}
+                        ]
+                    )
             
-            # Split long messages
-            if len(response_text) > 2000:
-                chunks = [response_text[i:i+2000] for i in range(0, len(response_text), 2000)]
-                for i, chunk in enumerate(chunks):
-                    if i == 0:
-                        await message.reply(chunk)
-                    else:
-                        await message.channel.send(chunk)
-            else:
-                await message.reply(response_text)
+            await reply.finish()
             
     except Exception as e:
         error_msg = f"❌ **Bot Error:** {str(e)}"
         print(f"Error processing message: {e}")
-        await message.reply(error_msg)
+        if reply is not None:
+            await reply.fail(error_msg)
+        else:
+            await message.reply(error_msg)
 
 if __name__ == "__main__":
     # Check for required environment variables
@@ -6,10 +6,12 @@ Responds in #token-macbook-air channel with Claude API and CNS context.
 """
 import os
 import discord
-from anthropic import Anthropic
 from pathlib import Path
 from dotenv import load_dotenv
 
+from ai_providers import AnthropicProvider, ProviderChain, cached_system
+from streaming_reply import StreamingReply
+
 # Load environment variables
 load_dotenv()
 
@@ -18,8 +20,8 @@ intents = discord.Intents.default()
 intents.message_content = True
 client = discord.Client(intents=intents)
 
-# Claude setup
-anthropic = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+# Claude setup: async client, so replies stream in without blocking the event loop
+ai = ProviderChain([AnthropicProvider(os.getenv("ANTHROPIC_API_KEY"))])
 
 # Load CNS context
 CNS_DIR = Path("~/.personal-cns/cns").expanduser()
@@ -53,6 +55,19 @@ def load_cns_context():
 
 CNS_CONTEXT = load_cns_context()
 
+# Built once: every request sends the same prefix, so Anthropic serves it from the prompt cache
+SYSTEM_PROMPT = cached_system(f"""You are Christian's AI development assistant with access to his CNS (Central Neural System) knowledge base.
+
+{CNS_CONTEXT}
+
+You have access to these projects:
+- f.insight.AI Advanced: /Users/christian/Repos/f.insight.AI Advanced (Next.js + FastAPI + PostgreSQL)
+- slow-hand-studio: /Users/christian/Repos/slow-hand-studio (Python guitar learning webapp)
+- Memorias.AI: /Users/christian/Repos/Memorias.AI (Next.js + TypeScript)
+- My-AI-Agent-Team: /Users/christian/Repos/My-AI-Agent-Team (Next.js + TypeScript + Claude agents)
+
+Provide development assistance based on the context above. Be concise and actionable.""")
+
 @client.event
 async def on_ready():
     print(f'✅ Bot connected as {client.user}')
@@ -78,41 +93,26 @@ async def on_message(message):
     
     # Send "typing" indicator
     async with message.channel.typing():
+        # Placeholder reply, edited as Claude writes and continued in new messages past Discord's limit
+        reply = StreamingReply(message)
         try:
-            # Call Claude API
-            response = anthropic.messages.create(
-                model="claude-sonnet-4-6",
-                max_tokens=4000,
-                system=f"""You are Christian's AI development assistant with access to his CNS (Central Neural System) knowledge base.
-
-{CNS_CONTEXT}
-
-You have access to these projects:
-- f.insight.AI Advanced: /Users/christian/Repos/f.insight.AI Advanced (Next.js + FastAPI + PostgreSQL)
-- slow-hand-studio: /Users/christian/Repos/slow-hand-studio (Python guitar learning webapp)
-- Memorias.AI: /Users/christian/Repos/Memorias.AI (Next.js + TypeScript)
-- My-AI-Agent-Team: /Users/christian/Repos/My-AI-Agent-Team (Next.js + TypeScript + Claude agents)
-
-Provide development assistance based on the context above. Be concise and actionable.""",
-                messages=[
-                    {"role": "user", "content": message.content}
-                ]
-            )
+            await reply.start()
             
-            # Extract reply text
-            reply = response.content[0].text
+            # Call Claude API; token and cache usage is logged per channel
+            reply_text, ai_used = await ai.stream(
+                [{"role": "user", "content": message.content}],
+                SYSTEM_PROMPT,
+                reply.feed,
+                usage_key=getattr(message.channel, "name", "DM")
+            )
             
-            # Discord has 2000 char limit per message
-            if len(reply) <= 2000:
-                await message.reply(reply)
+            if ai_used == "error":
+                await reply.fail(reply_text)
             else:
-                # Split into chunks
-                chunks = [reply[i:i+2000] for i in range(0, len(reply), 2000)]
-                for chunk in chunks:
-                    await message.channel.send(chunk)
+                await reply.finish()
                     
         except Exception as e:
-            await message.reply(f"❌ Error: {str(e)}")
+            await reply.fail(f"❌ Error: {str(e)}")
             print(f"Error processing message: {e}")
 
 # Run bot
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Async shell command runner for the Discord bots.
+
+Commands run as asyncio subprocesses, so a long build no longer stalls the
+event loop. Output (stdout and stderr interleaved, as in a terminal) streams
+into a bounded buffer that keeps the head and tail of huge outputs, one
+Discord status message is edited as it grows, and a running job can be
+cancelled from another message (!cancel).
+"""
+import asyncio
+import codecs
+import os
+import signal
+import subprocess
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Union
+
+DEFAULT_TIMEOUT_SECONDS = 180
+# Discord allows about five edits per five seconds per channel
+EDIT_INTERVAL_SECONDS = 1.5
+# Time a cancelled or timed-out job gets to exit before it is killed outright
+KILL_GRACE_SECONDS = 5
+# Tool-call commands that finish sooner than this get no status message
+QUIET_SECONDS = 3
+HEAD_CHARS = 4000
+TAIL_CHARS = 16000
+READ_CHUNK = 8192
+MAX_DISCORD_MESSAGE = 1900
+
+
+class OutputBuffer:
+    """Keeps the first HEAD_CHARS and a ring of the last TAIL_CHARS of output."""
+
+    def __init__(self, head_chars: int = HEAD_CHARS, tail_chars: int = TAIL_CHARS):
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.head: List[str] = []
+        self.head_size = 0
+        self.tail: deque = deque()
+        self.tail_size = 0
+        self.partial = ""
+        self.omitted_lines = 0
+        self.total_lines = 0
+        # Bumped on every write, so a status message is only edited when something changed
+        self.version = 0
+
+    def write(self, text: str) -> None:
+        if not text:
+            return
+        self.version += 1
+        lines = (self.partial + text.replace("\r\n", "\n")).split("\n")
+        self.partial = lines.pop()
+        for line in lines:
+            self._append(line)
+
+    def close(self) -> None:
+        if self.partial:
+            self._append(self.partial)
+            self.partial = ""
+
+    def _append(self, line: str) -> None:
+        # Progress bars redraw with a bare carriage return; only the last frame matters
+        line = line.rsplit("\r", 1)[-1]
+        self.total_lines += 1
+        if self.head_size < self.head_chars and not self.tail:
+            self.head.append(line)
+            self.head_size += len(line) + 1
+            return
+        self.tail.append(line)
+        self.tail_size += len(line) + 1
+        while self.tail_size > self.tail_chars and len(self.tail) > 1:
+            self.tail_size -= len(self.tail.popleft()) + 1
+            self.omitted_lines += 1
+
+    def render(self, max_chars: int) -> str:
+        """Head and tail of the output in at most about max_chars, with a marker for the gap."""
+        head = self.head
+        rest = list(self.tail) + ([self.partial.rsplit("\r", 1)[-1]] if self.partial else [])
+        full = "\n".join(head + rest)
+        if not self.omitted_lines and len(full) <= max_chars:
+            return full
+
+        shown_head, used = [], 0
+        for line in head:
+            if used + len(line) + 1 > max_chars // 3:
+                break
+            shown_head.append(line)
+            used += len(line) + 1
+        shown_tail, used = [], 0
+        budget = max_chars - sum(len(line) + 1 for line in shown_head) - 40
+        for line in reversed(head[len(shown_head):] + rest):
+            if used + len(line) + 1 > budget:
+                break
+            shown_tail.append(line)
+            used += len(line) + 1
+        shown_tail.reverse()
+        hidden = self.total_lines + (1 if self.partial else 0) - len(shown_head) - len(shown_tail)
+        return "\n".join(shown_head + [f"... ({hidden} lines omitted) ..."] + shown_tail)
+
+
+class CommandJob:
+    """One shell command (string) or argv (list) run without blocking the event loop."""
+
+    def __init__(self, command: Union[str, List[str]], cwd: Optional[str] = None,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS):
+        self.command = command
+        self.cwd = cwd
+        self.timeout = timeout
+        self.output = OutputBuffer()
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.returncode: Optional[int] = None
+        self.cancelled = False
+        self.timed_out = False
+        self.started = None
+        self.elapsed = 0.0
+        self.killed_at = None
+        self.force_killed = False
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.returncode is None
+
+    async def run(self, on_update: Optional[Callable[["CommandJob"], Awaitable[None]]] = None,
+                  interval: float = EDIT_INTERVAL_SECONDS) -> int:
+        """Run to completion, cancellation or timeout; returns the exit code.
+
+        on_update is awaited at most once per interval while output keeps
+        arriving, and once more at the end.
+        """
+        loop = asyncio.get_running_loop()
+        self.started = loop.time()
+        # A session (POSIX) or process group (Windows) of its own, so the whole tree can be stopped
+        if os.name == "nt":
+            spawn = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            spawn = {"start_new_session": True}
+        pipes = {"stdout": asyncio.subprocess.PIPE, "stderr": asyncio.subprocess.STDOUT,
+                 "stdin": asyncio.subprocess.DEVNULL, "cwd": self.cwd}
+        if isinstance(self.command, str):
+            self.process = await asyncio.create_subprocess_shell(self.command, **pipes, **spawn)
+        else:
+            self.process = await asyncio.create_subprocess_exec(*self.command, **pipes, **spawn)
+
+        reader = asyncio.ensure_future(self._pump(self.process.stdout))
+        exited = asyncio.ensure_future(self.process.wait())
+        seen = self.output.version
+        if on_update:
+            await on_update(self)
+        try:
+            while not (reader.done() and exited.done()):
+                now = loop.time()
+                if not self.timed_out and not self.cancelled and now - self.started >= self.timeout:
+                    self.timed_out = True
+                    self._signal_tree(kill=False)
+                if self.killed_at is not None and now - self.killed_at >= KILL_GRACE_SECONDS:
+                    if not self.force_killed:
+                        # The whole group, including children the shell may have left behind
+                        self.force_killed = True
+                        self.killed_at = now
+                        self._signal_tree(kill=True)
+                    else:
+                        # Something outside the group still holds the pipe; stop waiting for it
+                        reader.cancel()
+                        exited.cancel()
+                        break
+                await asyncio.wait({reader, exited}, timeout=interval, return_when=asyncio.ALL_COMPLETED)
+                if on_update and self.output.version != seen:
+                    seen = self.output.version
+                    await on_update(self)
+        except asyncio.CancelledError:
+            self._signal_tree(kill=True)
+            reader.cancel()
+            raise
+
+        # wait() also waits for the pipe to close, which an escaped grandchild can hold open
+        self.returncode = self.process.returncode if exited.cancelled() else await exited
+        self.output.close()
+        self.elapsed = loop.time() - self.started
+        if on_update:
+            await on_update(self)
+        return self.returncode
+
+    async def _pump(self, stream) -> None:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            chunk = await stream.read(READ_CHUNK)
+            if not chunk:
+                self.output.write(decoder.decode(b"", final=True))
+                return
+            self.output.write(decoder.decode(chunk))
+
+    def cancel(self) -> bool:
+        """Ask a running job to stop; it is killed if still alive after KILL_GRACE_SECONDS."""
+        if not self.running or self.cancelled:
+            return False
+        self.cancelled = True
+        self._signal_tree(kill=False)
+        return True
+
+    def _signal_tree(self, kill: bool) -> None:
+        if self.process is None:
+            return
+        if self.killed_at is None:
+            self.killed_at = asyncio.get_running_loop().time()
+        try:
+            if os.name == "nt":
+                if self.process.returncode is not None:
+                    return
+                # /T takes the children too (npm -> node); there is no gentler tree-wide signal
+                subprocess.Popen(["taskkill", "/F", "/T", "/PID", str(self.process.pid)],
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            else:
+                # The group outlives its leader; its pid is still the group id
+                os.killpg(self.process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+        except OSError:
+            if self.process.returncode is None:
+                self.process.kill()
+
+    def state(self) -> str:
+        if self.returncode is None and (self.cancelled or self.timed_out):
+            return "⏳ Stopping"
+        if self.cancelled:
+            return "🛑 Command canceled"
+        if self.timed_out:
+            return f"⏰ Command timed out ({self.timeout:g}s)"
+        if self.returncode is None:
+            return "⏳ Running"
+        if self.returncode == 0:
+            return "✅ Command successful"
+        return f"❌ Command failed (exit {self.returncode})"
+
+    def status_text(self, title: str, max_chars: int = MAX_DISCORD_MESSAGE) -> str:
+        """A Discord status message: state, elapsed time and the head/tail of the output."""
+        loop_time = asyncio.get_running_loop().time()
+        elapsed = self.elapsed if self.returncode is not None else loop_time - (self.started or loop_time)
+        header = f"{self.state()} — {title} ({elapsed:.0f}s)"
+        if self.returncode is None:
+            header += "\nSend !cancel to stop it."
+        body = self.output.render(max_chars - len(header) - 10)
+        if not body.strip():
+            return header + ("\n(no output)" if self.returncode is not None else "")
+        return f"{header}\n```\n{body}\n```"
+
+
+class LiveStatus:
+    """One Discord message, sent on the first update and edited in place afterwards.
+
+    With show_after, the message only appears once the job has run that long,
+    so quick commands (git status from a tool call) leave no status behind.
+    """
+
+    def __init__(self, reply_to, title: str, show_after: float = 0):
+        self.reply_to = reply_to
+        self.title = title
+        self.show_after = show_after
+        self.message = None
+        self.text = None
+
+    async def __call__(self, job: CommandJob) -> None:
+        if self.message is None and self.show_after:
+            if job.returncode is not None:
+                return
+            if asyncio.get_running_loop().time() - job.started < self.show_after:
+                return
+        text = job.status_text(self.title)
+        if text == self.text:
+            return
+        self.text = text
+        try:
+            if self.message is None:
+                self.message = await self.reply_to.reply(text)
+            else:
+                await self.message.edit(content=text)
+        except Exception as e:
+            # A failed edit (rate limit, deleted message) must not stop the job
+            print(f"Status update failed: {e}")
+
+
+class JobBoard:
+    """Running jobs by Discord user, so a !cancel message can reach them."""
+
+    def __init__(self):
+        self.jobs: Dict[int, Set[CommandJob]] = {}
+
+    def __contains__(self, user_id: int) -> bool:
+        return bool(self.jobs.get(user_id))
+
+    async def run(self, job: CommandJob, message, title: str, show_after: float = 0) -> CommandJob:
+        """Run a job for message.author with a live status reply to message."""
+        user_id = message.author.id
+        self.jobs.setdefault(user_id, set()).add(job)
+        try:
+            await job.run(on_update=LiveStatus(message, title, show_after))
+        finally:
+            self.jobs[user_id].discard(job)
+            if not self.jobs[user_id]:
+                del self.jobs[user_id]
+        return job
+
+    def cancel(self, user_id: int) -> bool:
+        """Stop every running job of a user; True if there was one."""
+        return any([job.cancel() for job in self.jobs.get(user_id, ())])
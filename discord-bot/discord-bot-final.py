@@ -5,13 +5,17 @@ One bot to rule them all - fully functional with repository access.
 """
 import os
 import discord
-import subprocess
 import asyncio
 from pathlib import Path
 from typing import Dict, List, Optional
 from collections import defaultdict
 from dotenv import load_dotenv
 
+from ai_providers import build_provider_chain
+from command_runner import CommandJob, JobBoard
+from repo_registry import RepoRegistry
+from streaming_reply import StreamingReply
+
 SAFE_COMMAND_PREFIXES = (
     "git status",
     "git diff",
@@ -49,24 +53,12 @@ BLOCKED_COMMAND_SNIPPETS = (
 )
 
 PENDING_COMMANDS: Dict[int, Dict[str, str]] = {}
+RUNNING_JOBS = JobBoard()
 ACTIVE_REPO_BY_CONTEXT: Dict[int, str] = {}
 CONVERSATION_MEMORY: Dict[int, List[Dict[str, str]]] = defaultdict(list)
-MAX_DISCORD_MESSAGE = 1900
 MAX_MEMORY_MESSAGES = 12
 AI_REQUEST_TIMEOUT_SECONDS = 90
-
-# AI providers
-try:
-    from anthropic import Anthropic
-    HAS_ANTHROPIC = True
-except ImportError:
-    HAS_ANTHROPIC = False
-
-try:
-    import openai
-    HAS_OPENAI = True
-except ImportError:
-    HAS_OPENAI = False
+COMMAND_TIMEOUT_SECONDS = 180
 
 # Load environment variables
 if Path(".env.local").exists():
@@ -79,28 +71,23 @@ intents = discord.Intents.default()
 intents.message_content = True
 client = discord.Client(intents=intents)
 
-# AI Setup with fallback
-anthropic_client = None
-openai_client = None
+# AI Setup with fallback: async clients with pooled connections, so a generation
+# never blocks the gateway heartbeat or other conversations
+ai = build_provider_chain(timeout=AI_REQUEST_TIMEOUT_SECONDS)
 
-if HAS_ANTHROPIC and os.getenv("ANTHROPIC_API_KEY"):
-    anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 
-if HAS_OPENAI and os.getenv("OPENAI_API_KEY"):
-    openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+REPOSITORY_PATHS = {
+    "slow-hand-studio": Path(r"C:\Repo\slow-hand-studio"),
+    "FinsightAI": Path(r"C:\Repo\FinsightAI"),
+    "observatory": Path(r"C:\Repo\observatory"),
+    "my-ai-agent-team": Path(r"E:\Repos\my-ai-agent-team"),
+}
 
 
-def check_repository_status() -> Dict[str, Dict[str, object]]:
+def scan_repository_status() -> Dict[str, Dict[str, object]]:
     """Check which repositories actually exist and are accessible."""
-    repos = {
-        "slow-hand-studio": Path(r"C:\Repo\slow-hand-studio"),
-        "FinsightAI": Path(r"C:\Repo\FinsightAI"),
-        "observatory": Path(r"C:\Repo\observatory"),
-        "my-ai-agent-team": Path(r"E:\Repos\my-ai-agent-team"),
-    }
-
     status: Dict[str, Dict[str, object]] = {}
-    for name, path in repos.items():
+    for name, path in REPOSITORY_PATHS.items():
         if path.exists():
             git_dir = path / ".git"
             if git_dir.exists():
@@ -130,6 +117,19 @@ def normalize_repo_key(repo_key: str) -> str:
     return repo_key.strip().lower().replace("_", "-")
 
 
+# Scanned once, then rescanned in the background only when the repo folders change
+REPOSITORIES = RepoRegistry(
+    scan_repository_status,
+    roots=[path.parent for path in REPOSITORY_PATHS.values()],
+    normalize=normalize_repo_key,
+)
+
+
+def check_repository_status() -> Dict[str, Dict[str, object]]:
+    """Repository status from the registry; no filesystem access."""
+    return REPOSITORIES.repos
+
+
 def get_context_key(message) -> int:
     """Use channel context for servers and user context for DMs."""
     if isinstance(message.channel, discord.DMChannel):
@@ -154,15 +154,13 @@ def find_repo_in_text(text: str) -> Optional[str]:
 
 def set_active_repo(context_key: int, repo_key: str) -> Optional[str]:
     """Set active repo for this conversation context."""
-    status = check_repository_status()
-    normalized = normalize_repo_key(repo_key)
-
-    for key, info in status.items():
-        if normalize_repo_key(key) == normalized and info["accessible"]:
-            ACTIVE_REPO_BY_CONTEXT[context_key] = key
-            return key
+    found = REPOSITORIES.lookup(repo_key)
+    if found is None or not found[1]["accessible"]:
+        return None
+    key = found[0]
 
-    return None
+    ACTIVE_REPO_BY_CONTEXT[context_key] = key
+    return key
 
 
 def get_active_repo(context_key: int) -> Optional[str]:
@@ -190,14 +188,11 @@ def clear_memory(context_key: int) -> None:
 
 def resolve_repo_path(repo_key: str) -> Optional[Path]:
     """Resolve a repository key to an accessible path."""
-    status = check_repository_status()
-    normalized = normalize_repo_key(repo_key)
+    info = REPOSITORIES.get(repo_key)
+    if info is None or not info["accessible"]:
+        return None
 
-    for key, info in status.items():
-        if normalize_repo_key(key) == normalized and info["accessible"]:
-            return Path(info["path"])
-
-    return None
+    return Path(info["path"])
 
 
 def format_repo_status() -> str:
@@ -251,40 +246,13 @@ def parse_run_command(content: str) -> tuple[Optional[str], Optional[str], bool]
     return repo_key, command, False
 
 
-def clip_text(text: str, max_len: int = MAX_DISCORD_MESSAGE) -> str:
-    """Clip long output for Discord limits."""
-    if len(text) <= max_len:
-        return text
-    return text[:max_len] + "\n... (output truncated)"
-
-
-def execute_command(command: str, cwd: Optional[str] = None) -> str:
-    """Execute a shell command safely."""
+async def execute_command(message, repo_key: str, command: str, cwd: Optional[str] = None) -> None:
+    """Run a confirmed command, editing one status message as its output streams in."""
+    title = f"{repo_key} :: {command if len(command) <= 80 else command[:77] + '...'}"
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            cwd=cwd,
-            timeout=180,
-        )
-
-        stdout = (result.stdout or "").strip()
-        stderr = (result.stderr or "").strip()
-
-        if result.returncode == 0:
-            if stdout:
-                return f"✅ Command successful:\n```\n{clip_text(stdout)}\n```"
-            return "✅ Command successful (no output)."
-
-        combined = stderr or stdout or "No output captured."
-        return f"❌ Command failed (exit {result.returncode}):\n```\n{clip_text(combined)}\n```"
-
-    except subprocess.TimeoutExpired:
-        return "⏰ Command timed out (180s)"
+        await RUNNING_JOBS.run(CommandJob(command, cwd=cwd, timeout=COMMAND_TIMEOUT_SECONDS), message, title)
     except Exception as e:
-        return f"💥 Error: {str(e)}"
+        await message.reply(f"💥 Error: {str(e)}")
 
 
 async def try_handle_control_command(message) -> bool:
@@ -303,7 +271,7 @@ async def try_handle_control_command(message) -> bool:
             "- !run <repo> :: <command>\n"
             "- !run :: <command>   (uses active repo)\n"
             "- !confirm\n"
-            "- !cancel\n\n"
+            "- !cancel   (discard a pending command or stop a running one)\n\n"
             "Code examples:\n"
             "!use FinsightAI\n"
             "!run :: git status\n"
@@ -389,8 +357,10 @@ async def try_handle_control_command(message) -> bool:
         if user_id in PENDING_COMMANDS:
             del PENDING_COMMANDS[user_id]
             await message.reply("🛑 Pending command canceled.")
+        elif RUNNING_JOBS.cancel(user_id):
+            await message.reply("🛑 Stopping the running command...")
         else:
-            await message.reply("ℹ️ No pending command to cancel.")
+            await message.reply("ℹ️ No pending or running command to cancel.")
         return True
 
     if content == "!confirm":
@@ -403,60 +373,39 @@ async def try_handle_control_command(message) -> bool:
         cwd = pending["cwd"]
         repo_key = pending["repo_key"]
 
+        if user_id in RUNNING_JOBS:
+            await message.reply("⏳ A command is already running. Wait for it or !cancel it first.")
+            return True
+
         del PENDING_COMMANDS[user_id]
         set_active_repo(context_key, repo_key)
 
-        result = execute_command(command, cwd=cwd)
-        await message.reply(f"⚙️ Executed in {repo_key}:\n{result}")
+        await execute_command(message, repo_key, command, cwd=cwd)
         return True
 
     return False
 
 
-async def call_ai_api(messages, system_prompt):
-    """Call AI API with fallback from Claude to OpenAI."""
-    # Try Claude first (2026 model)
-    if anthropic_client:
-        try:
-            response = anthropic_client.messages.create(
-                model="claude-sonnet-4-6",
-                max_tokens=4000,
-                system=system_prompt,
-                messages=messages,
-            )
-            return response.content[0].text, "claude-sonnet-4-6"
-        except Exception as e:
-            print(f"Claude error: {e}")
-
-    # Fallback to OpenAI
-    if openai_client:
-        try:
-            openai_messages = [{"role": "system", "content": system_prompt}] + messages
-            response = openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=openai_messages,
-                max_tokens=4000,
-            )
-            return response.choices[0].message.content, "gpt-4"
-        except Exception as e:
-            print(f"OpenAI error: {e}")
-
-    return "❌ No AI providers available", "error"
+async def call_ai_api(messages, system_prompt, on_text=None, timeout=AI_REQUEST_TIMEOUT_SECONDS):
+    """Call AI API with fallback from Claude to OpenAI; raises asyncio.TimeoutError past the deadline.
+
+    With on_text, the reply is streamed and on_text is awaited with each piece as it arrives.
+    """
+    if on_text is None:
+        return await ai.complete(messages, system_prompt, timeout=timeout)
+    return await ai.stream(messages, system_prompt, on_text, timeout=timeout)
 
 
 @client.event
 async def on_ready():
-    ai_providers = []
-    if anthropic_client:
-        ai_providers.append("🧠 Claude Sonnet 4.6")
-    if openai_client:
-        ai_providers.append("🤖 GPT-4")
+    ai_providers = ai.names
 
     print(f"🤖 Discord Bot connected as {client.user}")
     print(f"🧠 AI: {' + '.join(ai_providers) if ai_providers else '❌ None'}")
     print("📁 Repository checking enabled")
 
-    # Check repository status on startup
+    # Repository status was scanned at startup; keep it fresh from here on
+    await REPOSITORIES.start()
     repo_status = check_repository_status()
     accessible = [name for name, info in repo_status.items() if info["accessible"]]
     print(f"✅ Accessible repos: {', '.join(accessible)}")
@@ -490,6 +439,7 @@ async def on_message(message):
     if mentioned_repo:
         set_active_repo(context_key, mentioned_repo)
 
+    reply = None
     try:
         async with message.channel.typing():
             repo_status = check_repository_status()
@@ -529,35 +479,32 @@ async def on_message(message):
 Respond naturally and be proactive. The user expects continuity across messages."""
 
             messages = memory_messages + [{"role": "user", "content": message.content}]
-            response_text, ai_used = await asyncio.wait_for(
-                call_ai_api(messages, system_context),
-                timeout=AI_REQUEST_TIMEOUT_SECONDS,
-            )
+            # The reply fills in as it is generated; the deadline cancels the request itself
+            reply = StreamingReply(message)
+            await reply.start()
+            response_text, ai_used = await call_ai_api(messages, system_context, on_text=reply.feed)
 
             append_memory(context_key, "user", message.content)
             append_memory(context_key, "assistant", response_text)
 
-            if ai_used != "error":
-                response_text += f"\n\n*Powered by {ai_used}*"
-
-            if len(response_text) > 2000:
-                chunks = [response_text[i : i + 2000] for i in range(0, len(response_text), 2000)]
-                for i, chunk in enumerate(chunks):
-                    if i == 0:
-                        await message.reply(chunk)
-                    else:
-                        await message.channel.send(chunk)
+            if ai_used == "error":
+                await reply.fail(response_text)
             else:
-                await message.reply(response_text)
+                await reply.finish(f"\n\n*Powered by {ai_used}*")
 
     except asyncio.TimeoutError:
-        await message.reply(
-            "⏰ AI request timed out. Please try again, or run !context and !use <repo> to tighten context."
-        )
+        timeout_msg = "⏰ AI request timed out. Please try again, or run !context and !use <repo> to tighten context."
+        if reply:
+            await reply.fail(timeout_msg)
+        else:
+            await message.reply(timeout_msg)
     except Exception as e:
         error_msg = f"❌ **Bot Error:** {str(e)}"
         print(f"Error processing message: {e}")
-        await message.reply(error_msg)
+        if reply:
+            await reply.fail(error_msg)
+        else:
+            await message.reply(error_msg)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Cached repository registry for the Discord bots.
+
+The bots used to rescan the repository folders (exists() on every repo and
+its .git, iterdir() over the workspace roots) several times per message.
+A RepoRegistry scans once and answers lookups from memory. A background
+task keeps it fresh. With watchdog installed, filesystem events mark it
+stale. Without watchdog, a cheap mtime poll of the roots and their direct
+subfolders does the same job. Adding, removing or renaming a repository
+folder, or a .git folder directly inside one, changes one of those mtimes.
+
+Messages never touch the filesystem; the scan runs in a worker thread only
+after something changed.
+"""
+import asyncio
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+    FileSystemEventHandler = object
+
+# Seconds between mtime polls when there is no watcher
+DEFAULT_POLL_SECONDS = 5
+# With a watcher, a slow poll still catches what it misses (network drives, dropped events)
+WATCHED_POLL_SECONDS = 60
+# Events come in bursts (git init, a clone); wait for them to settle before rescanning
+SETTLE_SECONDS = 0.5
+
+Repos = Dict[str, Dict[str, object]]
+Signature = Tuple[Tuple[str, Optional[int]], ...]
+
+
+def watching_enabled() -> bool:
+    return WATCHDOG_AVAILABLE and os.getenv("REPO_WATCH", "1").lower() not in ["0", "false", "no"]
+
+
+def folder_signature(roots: Iterable[Path]) -> Signature:
+    """The mtimes of each root and each folder directly inside it; None for a missing root."""
+    signature = []
+    for root in roots:
+        try:
+            signature.append((str(root), root.stat().st_mtime_ns))
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir() and not entry.name.startswith("."):
+                            signature.append((entry.path, entry.stat().st_mtime_ns))
+                    except OSError:
+                        continue
+        except OSError:
+            signature.append((str(root), None))
+    return tuple(sorted(signature))
+
+
+class _MarkStale(FileSystemEventHandler):
+    def __init__(self, registry: "RepoRegistry"):
+        self.registry = registry
+
+    def on_any_event(self, event) -> None:
+        # Called on the observer's thread
+        self.registry.mark_stale()
+
+
+class RepoRegistry:
+    """Repositories by key, from scan(), kept fresh in the background.
+
+    scan returns {key: info} and must only look at the roots and the folders
+    directly inside them; that is all the watcher and the poll can see.
+    """
+
+    def __init__(self, scan: Callable[[], Repos], roots: Iterable[Path],
+                 normalize: Callable[[str], str] = str.lower,
+                 poll_interval: float = DEFAULT_POLL_SECONDS):
+        self.scan = scan
+        self.roots = list({str(root): Path(root) for root in roots}.values())
+        self.normalize = normalize
+        self.poll_interval = poll_interval
+        # (index, repos), published in one assignment; read it once per lookup
+        self.snapshot: Tuple[Dict[str, str], Repos] = ({}, {})
+        self.signature: Signature = ()
+        self.version = 0
+        self.task: Optional[asyncio.Task] = None
+        self.observer = None
+        self.watched: List[str] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stale: Optional[asyncio.Event] = None
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Rescan now; True if the repositories changed. Blocking; the background task runs it in a thread."""
+        signature = folder_signature(self.roots)
+        repos = self.scan()
+        changed = repos != self.repos
+        self.snapshot = ({self.normalize(key): key for key in repos}, repos)
+        self.signature = signature
+        if changed:
+            self.version += 1
+        return changed
+
+    @property
+    def repos(self) -> Repos:
+        return self.snapshot[1]
+
+    @property
+    def index(self) -> Dict[str, str]:
+        return self.snapshot[0]
+
+    def lookup(self, key: str) -> Optional[Tuple[str, Dict[str, object]]]:
+        """The registry's own spelling of a key and its info, from one snapshot, or None."""
+        index, repos = self.snapshot
+        name = index.get(self.normalize(key))
+        return None if name is None else (name, repos[name])
+
+    def get(self, key: str) -> Optional[Dict[str, object]]:
+        """The info for a key, matched after normalize(), or None."""
+        found = self.lookup(key)
+        return None if found is None else found[1]
+
+    def resolve(self, key: str) -> Optional[str]:
+        """The registry's own spelling of a key, or None."""
+        found = self.lookup(key)
+        return None if found is None else found[0]
+
+    def mark_stale(self) -> None:
+        """Thread-safe: have the background task rescan soon."""
+        if self.loop is not None and self.stale is not None:
+            self.loop.call_soon_threadsafe(self.stale.set)
+
+    async def start(self) -> None:
+        """Start keeping the registry fresh; safe to call again (on_ready runs on every reconnect)."""
+        if self.task is not None and not self.task.done():
+            return
+        self.loop = asyncio.get_running_loop()
+        self.stale = asyncio.Event()
+        if watching_enabled():
+            try:
+                self.observer = Observer()
+                self.observer.daemon = True
+                self._watch()
+                self.observer.start()
+            except Exception as e:
+                print(f"⚠️ Repository watcher unavailable, polling instead: {e}")
+                self.observer = None
+        mode = "watching" if self.observer is not None else f"polling every {self.poll_interval:g}s"
+        print(f"👀 Repository registry {mode}: {', '.join(str(root) for root in self.roots)}")
+        self.task = asyncio.ensure_future(self._keep_fresh())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer = None
+
+    async def _keep_fresh(self) -> None:
+        interval = WATCHED_POLL_SECONDS if self.observer is not None else self.poll_interval
+        while True:
+            try:
+                await asyncio.wait_for(self.stale.wait(), timeout=interval)
+                await asyncio.sleep(SETTLE_SECONDS)
+                self.stale.clear()
+                due = True
+            except asyncio.TimeoutError:
+                due = await asyncio.to_thread(folder_signature, self.roots) != self.signature
+            if not due:
+                continue
+            try:
+                if await asyncio.to_thread(self.refresh):
+                    print(f"🔄 Repositories changed: {', '.join(self.repos) or 'none'}")
+                if self.observer is not None:
+                    self._watch()
+            except Exception as e:
+                # A failed scan keeps the last good snapshot
+                print(f"⚠️ Repository rescan failed: {e}")
+
+    def _watch(self) -> None:
+        """Watch the roots and the folders directly inside them, each non-recursively."""
+        folders = [path for path, _ in self.signature]
+        if folders == self.watched:
+            return
+        self.observer.unschedule_all()
+        handler = _MarkStale(self)
+        for folder in folders:
+            if os.path.isdir(folder):
+                self.observer.schedule(handler, folder, recursive=False)
+        self.watched = folders
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Streamed AI replies for the Discord bots.
+
+A placeholder reply is sent as soon as a request starts and edited as text
+arrives from the provider, at most once per EDIT_INTERVAL_SECONDS so a
+channel stays inside Discord's edit rate limit. When a message fills up the
+reply rolls over to a new one, breaking at a line end and closing and
+reopening any code fence that was open at the cut.
+
+Set STREAM_REPLIES=0 to send each message once, complete, instead.
+"""
+import asyncio
+import os
+from typing import Optional
+
+# Discord's hard limit is 2000; the margin leaves room for a closing fence and the cursor
+MAX_MESSAGE_CHARS = 1900
+# Discord allows about five edits per five seconds per channel
+EDIT_INTERVAL_SECONDS = 1.2
+PLACEHOLDER = "💭 Thinking..."
+CURSOR = " ▌"
+FENCE = "```"
+
+
+def stream_replies_enabled() -> bool:
+    return os.getenv("STREAM_REPLIES", "1").lower() not in ["0", "false", "no"]
+
+
+def open_fence(text: str) -> Optional[str]:
+    """The opening line of the code fence still open at the end of text, if any."""
+    opening = None
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped.startswith(FENCE):
+            opening = None if opening is not None else stripped
+    return opening
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_CHARS):
+    """Split off one message's worth of text; returns (this message, the rest).
+
+    Prefers a line break, then a space, in the second half of the window;
+    a code fence open at the cut is closed here and reopened in the rest.
+    """
+    cut = text.rfind("\n", 0, limit)
+    if cut < limit // 2:
+        cut = text.rfind(" ", 0, limit)
+    if cut < limit // 2:
+        cut = limit
+    head, rest = text[:cut], text[cut:]
+    if rest.startswith("\n"):
+        rest = rest[1:]
+    fence = open_fence(head)
+    if fence is not None:
+        head += "\n" + FENCE
+        rest = fence + "\n" + rest
+    return head, rest
+
+
+class StreamingReply:
+    """A reply to one Discord message that fills in while the AI is still writing it."""
+
+    def __init__(self, reply_to, live: Optional[bool] = None, interval: float = EDIT_INTERVAL_SECONDS):
+        self.reply_to = reply_to
+        self.live = stream_replies_enabled() if live is None else live
+        self.interval = interval
+        self.messages = []
+        self.text = ""
+        self.shown = None
+        self.started = None
+        self.last_edit = 0.0
+        self.first_token_seconds: Optional[float] = None
+
+    async def start(self) -> None:
+        """Send the placeholder; the time to first token is measured from here."""
+        loop = asyncio.get_running_loop()
+        self.started = loop.time()
+        if self.live:
+            self.messages.append(await self.reply_to.reply(PLACEHOLDER))
+            self.shown = PLACEHOLDER
+            self.last_edit = loop.time()
+
+    async def feed(self, delta: str) -> None:
+        if not delta:
+            return
+        loop = asyncio.get_running_loop()
+        if self.first_token_seconds is None:
+            self.first_token_seconds = loop.time() - self.started
+        self.text += delta
+        while len(self.text) > MAX_MESSAGE_CHARS:
+            head, self.text = split_message(self.text)
+            await self._send(head, final=True)
+        if self.live and loop.time() - self.last_edit >= self.interval:
+            await self._send(self.text + CURSOR)
+
+    async def finish(self, suffix: str = "") -> None:
+        """Show the complete text; suffix (a footer) goes at the very end."""
+        self.text += suffix
+        while len(self.text) > MAX_MESSAGE_CHARS:
+            head, self.text = split_message(self.text)
+            await self._send(head, final=True)
+        await self._send(self.text or "(empty response)", final=True)
+        total = asyncio.get_running_loop().time() - self.started
+        if self.live and self.first_token_seconds is not None:
+            print(f"⏱️ First token after {self.first_token_seconds:.2f}s, reply complete after {total:.1f}s")
+
+    async def fail(self, error_text: str) -> None:
+        """Replace the placeholder with an error, or add it under the text already shown."""
+        if self.text or len(self.messages) > 1:
+            await self.finish("\n\n" + error_text)
+        elif self.messages:
+            await self.messages[-1].edit(content=error_text)
+        else:
+            await self.reply_to.reply(error_text)
+
+    async def _send(self, content: str, final: bool = False) -> None:
+        """Put content in the current message; a final one is left as is and the next goes to a new message."""
+        if self.live and self.messages and self.shown is not None:
+            if content != self.shown:
+                await self.messages[-1].edit(content=content)
+        elif not self.messages:
+            self.messages.append(await self.reply_to.reply(content))
+        else:
+            self.messages.append(await self.reply_to.channel.send(content))
+        self.last_edit = asyncio.get_running_loop().time()
+        # After a final write the current message is done; the next write starts a new one
+        self.shown = None if final else content
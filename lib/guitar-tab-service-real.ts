@@ -3,12 +3,10 @@
  * Uses Python scraper to access Ultimate Guitar's actual database
  */
 
-import { exec } from 'child_process';
-import { promisify } from 'util';
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import readline from 'readline';
 import path from 'path';
 
-const execAsync = promisify(exec);
-
 export interface GuitarTab {
   title: string;
   artist: string;
@@ -27,12 +25,132 @@ export interface SearchOptions {
   includeContent?: boolean;
 }
 
+interface PendingCall {
+  resolve: (value: any) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+}
+
+/**
+ * Long-running Python scraper process (scripts/ultimate_guitar_server.py).
+ * Keeps one warm interpreter and HTTP session instead of spawning python3 per call,
+ * and is respawned automatically if it exits.
+ */
+class ScraperDaemon {
+  private child: ChildProcessWithoutNullStreams | null = null;
+  private readonly pending = new Map<number, PendingCall>();
+  private nextId = 1;
+
+  constructor(private readonly serverPath: string) {}
+
+  call<T>(method: string, params: Record<string, unknown>, timeoutMs: number): Promise<T> {
+    const child = this.ensureStarted();
+    const id = this.nextId++;
+
+    return new Promise<T>((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`Scraper call ${method} timed out after ${timeoutMs}ms`));
+      }, timeoutMs);
+
+      this.pending.set(id, { resolve, reject, timer });
+      child.stdin.write(JSON.stringify({ id, method, params }) + '\n');
+    });
+  }
+
+  health(): Promise<Record<string, unknown>> {
+    return this.call('health', {}, 5000);
+  }
+
+  restart(): Promise<Record<string, unknown>> {
+    return this.call('restart', {}, 5000);
+  }
+
+  private ensureStarted(): ChildProcessWithoutNullStreams {
+    if (this.child) {
+      return this.child;
+    }
+
+    const child = spawn('python3', [this.serverPath], {
+      cwd: path.dirname(this.serverPath),
+      stdio: ['pipe', 'pipe', 'pipe']
+    });
+
+    readline.createInterface({ input: child.stdout }).on('line', (line) => this.handleLine(line));
+    child.stderr.on('data', (chunk) => {
+      console.log('🐍 Python scraper debug:', chunk.toString().trimEnd());
+    });
+    child.on('exit', (code) => {
+      console.log(`🐍 Scraper daemon exited (code ${code})`);
+      this.child = null;
+      this.failPending(new Error(`Scraper daemon exited with code ${code}`));
+    });
+    child.on('error', (error) => {
+      this.child = null;
+      this.failPending(error);
+    });
+
+    this.child = child;
+    return child;
+  }
+
+  private handleLine(line: string): void {
+    let message: { id?: number; result?: unknown; error?: { message: string } };
+    try {
+      message = JSON.parse(line);
+    } catch {
+      console.log('🐍 Unparseable scraper output:', line);
+      return;
+    }
+
+    if (message.id === undefined || message.id === null) {
+      return; // ready/lifecycle events
+    }
+
+    const call = this.pending.get(message.id);
+    if (!call) {
+      return; // caller already timed out
+    }
+
+    this.pending.delete(message.id);
+    clearTimeout(call.timer);
+
+    if (message.error) {
+      call.reject(new Error(message.error.message));
+    } else {
+      call.resolve(message.result);
+    }
+  }
+
+  private failPending(error: Error): void {
+    for (const [id, call] of this.pending) {
+      clearTimeout(call.timer);
+      call.reject(error);
+      this.pending.delete(id);
+    }
+  }
+}
+
+// Shared across GuitarTabService instances so every route reuses one warm process
+let sharedDaemon: ScraperDaemon | null = null;
+
 export class GuitarTabService {
-  private readonly scriptPath: string;
+  private readonly daemon: ScraperDaemon;
 
   constructor() {
-    // Path to our Python Ultimate Guitar scraper
-    this.scriptPath = path.join(process.cwd(), 'scripts', 'ultimate_guitar_scraper.py');
+    // Path to our long-running Python Ultimate Guitar scraper
+    if (!sharedDaemon) {
+      sharedDaemon = new ScraperDaemon(path.join(process.cwd(), 'scripts', 'ultimate_guitar_server.py'));
+    }
+    this.daemon = sharedDaemon;
+  }
+
+  async healthCheck(): Promise<Record<string, unknown>> {
+    return this.daemon.health();
+  }
+
+  async restartScraper(): Promise<Record<string, unknown>> {
+    return this.daemon.restart();
   }
 
   async searchTabs(options: SearchOptions): Promise<GuitarTab[]> {
@@ -41,22 +159,17 @@ export class GuitarTabService {
     try {
       console.log(`🔍 Searching Ultimate Guitar for: "${query}"`);
       
-      const command = `python3 "${this.scriptPath}" "${query}" ${limit} ${includeContent ? 'true' : 'false'}`;
-      const { stdout, stderr } = await execAsync(command, { 
-        timeout: 30000,
-        maxBuffer: 1024 * 1024 // 1MB buffer for large responses
-      });
+      const results = await this.daemon.call<GuitarTab[]>(
+        'search_and_get_tabs',
+        { query, limit, include_content: includeContent },
+        30000
+      );
       
-      if (stderr) {
-        console.log('🐍 Python scraper debug:', stderr);
-      }
-      
-      if (!stdout.trim()) {
+      if (!results || results.length === 0) {
         console.log('❌ No results from scraper');
         return [];
       }
       
-      const results = JSON.parse(stdout) as GuitarTab[];
       console.log(`✅ Found ${results.length} tabs from Ultimate Guitar`);
       
       return results;
@@ -74,18 +187,11 @@ export class GuitarTabService {
 
   async getTabContent(tabUrl: string): Promise<{ success: boolean; content?: string; error?: string }> {
     try {
-      const command = `python3 -c "
-import sys
-sys.path.append('scripts')
-from ultimate_guitar_scraper import UltimateGuitarScraper
-import json
-scraper = UltimateGuitarScraper()
-result = scraper.get_tab_content('${tabUrl}')
-print(json.dumps(result))
-"`;
-      
-      const { stdout } = await execAsync(command, { timeout: 15000 });
-      const result = JSON.parse(stdout);
+      const result = await this.daemon.call<{ success: boolean; content?: string; error?: string }>(
+        'get_tab_content',
+        { tab_url: tabUrl },
+        15000
+      );
       
       return {
         success: result.success,
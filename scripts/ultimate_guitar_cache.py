@@ -0,0 +1,170 @@
+"""
+Persistent HTTP response cache for the Ultimate Guitar scraper
+SQLite-backed, keyed by normalized URL, with per-endpoint TTLs, size-bounded
+LRU eviction and ETag/Last-Modified revalidation. Bodies whose download
+stopped once the scraper's payload had arrived are flagged partial.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_CACHE_DIR = Path("~/.cache/ultimate-guitar-scraper").expanduser()
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# A hit rewrites last_access only when the stored one is older than this; LRU order is kept to the minute
+ACCESS_RESOLUTION = 60
+
+# Search results churn quickly; published tab bodies almost never change
+DEFAULT_TTLS = {
+    'search': 10 * 60,
+    'tab': 7 * 24 * 60 * 60,
+}
+
+CachedResponse = namedtuple('CachedResponse', 'url body etag last_modified fetched_at expires_at partial')
+
+
+class CacheMiss(Exception):
+    """Raised in cache-only mode when a URL has never been fetched"""
+
+
+def normalize_url(url):
+    """Canonical cache key: lowercase scheme/host, sorted query, no fragment"""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    path = parts.path or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+
+
+class ResponseCache:
+    """Thread-safe on-disk response cache"""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, ttls=None):
+        self.cache_dir = Path(cache_dir or os.getenv('UG_CACHE_DIR') or DEFAULT_CACHE_DIR).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+        self.db = sqlite3.connect(str(self.cache_dir / 'responses.sqlite3'), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                partial INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # Caches written before partial bodies were flagged
+        columns = {row[1] for row in self.db.execute('PRAGMA table_info(responses)')}
+        if 'partial' not in columns:
+            self.db.execute('ALTER TABLE responses ADD COLUMN partial INTEGER NOT NULL DEFAULT 0')
+        self.db.execute('CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)')
+        self.db.commit()
+        # Running total of body sizes, so a put does not sum the whole table
+        self.total_bytes = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, url):
+        """Return the cached entry (fresh or stale) for url, or None"""
+        key = normalize_url(url)
+        with self.lock:
+            row = self.db.execute(
+                'SELECT url, body, etag, last_modified, fetched_at, expires_at, partial, last_access'
+                ' FROM responses WHERE url = ?',
+                (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            now = time.time()
+            if now - row[7] >= ACCESS_RESOLUTION:
+                self.db.execute('UPDATE responses SET last_access = ? WHERE url = ?', (now, key))
+                self.db.commit()
+        return CachedResponse(row[0], bytes(row[1]), row[2], row[3], row[4], row[5], bool(row[6]))
+
+    def is_fresh(self, entry):
+        return entry is not None and entry.expires_at > time.time()
+
+    def put(self, url, endpoint, body, etag=None, last_modified=None, partial=False):
+        """Store a response body and evict least-recently-used entries past max_bytes
+
+        partial: the download stopped before the end of the body.
+        """
+        key = normalize_url(url)
+        now = time.time()
+        with self.lock:
+            replaced = self.db.execute('SELECT size FROM responses WHERE url = ?', (key,)).fetchone()
+            self.db.execute(
+                'INSERT OR REPLACE INTO responses'
+                ' (url, endpoint, body, size, etag, last_modified, fetched_at, expires_at, last_access, partial)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, endpoint, sqlite3.Binary(body), len(body), etag, last_modified,
+                 now, now + self.ttl_for(endpoint), now, int(partial))
+            )
+            self.total_bytes += len(body) - (replaced[0] if replaced else 0)
+            self._evict()
+            self.db.commit()
+
+    def refresh(self, url, endpoint):
+        """Extend an entry's lifetime after a 304 Not Modified"""
+        key = normalize_url(url)
+        now = time.time()
+        with self.lock:
+            self.revalidated += 1
+            self.db.execute(
+                'UPDATE responses SET expires_at = ?, last_access = ? WHERE url = ?',
+                (now + self.ttl_for(endpoint), now, key)
+            )
+            self.db.commit()
+
+    def ttl_for(self, endpoint):
+        return self.ttls.get(endpoint, DEFAULT_TTLS['search'])
+
+    def stats(self):
+        with self.lock:
+            entries, size = self.db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        return {
+            'entries': entries,
+            'bytes': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated
+        }
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        # Other processes may share the file; recount before deleting anything
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        self.total_bytes = total
+        if total <= self.max_bytes:
+            return
+
+        # Walk from least recently used until we are back under budget
+        doomed = []
+        for url, size in self.db.execute('SELECT url, size FROM responses ORDER BY last_access ASC'):
+            if total <= self.max_bytes:
+                break
+            doomed.append((url,))
+            total -= size
+        self.db.executemany('DELETE FROM responses WHERE url = ?', doomed)
+        self.total_bytes = total
@@ -0,0 +1,86 @@
+"""
+Tab content classifier for the Ultimate Guitar scraper
+Scores a block of text (a <pre> body, a decoded JS string) on how much it
+looks like guitar tablature or a chord sheet. One compiled multi-line
+alternation finds every interesting line in a single pass over the text:
+
+    tab      a string line:          e|--0---2---|
+    chords   a line of only chords:  Am   G/B   Cadd9   D
+    section  a section marker:       [Chorus], [Verse 2]
+    meta     a header line:          Capo 3, Tuning: E A D G B E, 120 BPM
+
+Confidence combines how much of that evidence there is with how dense it is
+among the non-blank lines, so a long tab and a short chord sheet both score
+high while prose that mentions "Capo" or a Markdown table (|---|) does not.
+Scanning stops as soon as the evidence alone clears the threshold.
+"""
+
+import re
+from collections import namedtuple
+
+TAB_CONFIDENCE_THRESHOLD = 0.5
+
+# Evidence needed for full marks on that half of the score; six string lines is one full tab system
+STRONG_EVIDENCE = 6.0
+# Share of non-blank lines that are tab or chord lines for full marks on the density half
+FULL_DENSITY = 0.3
+EVIDENCE_WEIGHT = 0.7
+WEIGHTS = {'tab': 1.0, 'chords': 0.5, 'section': 1.0, 'meta': 0.5}
+
+CHORD = r'[A-G](?:#|b)?(?:maj|min|m|dim|aug|sus|add)?\d{0,2}(?:(?:sus|add|maj)\d{1,2})?(?:/[A-G](?:#|b)?)?'
+
+LINE_RE = re.compile(
+    r'^[ \t]*(?:'
+    r'(?P<tab>[A-Ga-g](?:#|b)?[ \t]?\|[-0-9hpbrsx/\\~|().^*<>=]{6,})'
+    rf'|(?P<chords>(?:(?i:intro|verse|chorus|bridge|outro|solo)[ \t]*\d?:[ \t]*)?{CHORD}(?:[ \t]+{CHORD})*[ \t]*\r?$)'
+    r'|(?P<section>\[(?i:intro|verse|pre-chorus|chorus|bridge|solo|outro|interlude|hook|refrain|instrumental|riff)[^\]\n]*\])'
+    r'|(?P<meta>(?i:capo\b|tuning:|key:|\d{2,3}[ \t]?bpm\b))'
+    r')',
+    # Case-insensitive only where it must be: IGNORECASE slows every character class, and
+    # chord names are case-sensitive anyway ("am" is a word, "Am" a chord)
+    re.MULTILINE,
+)
+
+ContentScore = namedtuple('ContentScore', 'confidence tab_lines chord_lines sections meta')
+
+NO_SCORE = ContentScore(0.0, 0, 0, 0, 0)
+
+
+def _confidence(counts, nonblank):
+    evidence = sum(WEIGHTS[kind] * count for kind, count in counts.items())
+    density = (counts['tab'] + counts['chords']) / max(nonblank, 1)
+    return (EVIDENCE_WEIGHT * min(1.0, evidence / STRONG_EVIDENCE)
+            + (1 - EVIDENCE_WEIGHT) * min(1.0, density / FULL_DENSITY))
+
+
+def classify(content, threshold=TAB_CONFIDENCE_THRESHOLD):
+    """Score how much content looks like a tab or chord sheet; returns a ContentScore
+
+    With a threshold, scanning stops once the evidence alone guarantees it, so
+    the counts are then lower bounds. Pass threshold=None for a full scan.
+    """
+    if not content or len(content) < 20:
+        return NO_SCORE
+    # Whitespace-only lines are blank too
+    nonblank = sum(1 for line in content.splitlines() if line.strip())
+    counts = {'tab': 0, 'chords': 0, 'section': 0, 'meta': 0}
+    # Evidence at which the evidence half alone clears the threshold
+    enough = STRONG_EVIDENCE * threshold / EVIDENCE_WEIGHT if threshold is not None else None
+    evidence = 0.0
+    for match in LINE_RE.finditer(content):
+        kind = match.lastgroup
+        counts[kind] += 1
+        evidence += WEIGHTS[kind]
+        # A lone chord line is zeroed below, so it must not be what ends the scan
+        if enough is not None and evidence >= enough and (
+                counts['chords'] != 1 or counts['tab'] or evidence - WEIGHTS['chords'] >= enough):
+            break
+    # Chord names alone ("A", "Am") are also ordinary words; one chord line is not evidence
+    if counts['chords'] == 1 and not counts['tab']:
+        counts['chords'] = 0
+    return ContentScore(round(_confidence(counts, nonblank), 3), counts['tab'], counts['chords'],
+                        counts['section'], counts['meta'])
+
+
+def looks_like_tab_content(content, threshold=TAB_CONFIDENCE_THRESHOLD):
+    return classify(content, threshold).confidence >= threshold
@@ -0,0 +1,256 @@
+"""
+Local tab corpus for the Ultimate Guitar scraper
+Every tab the scraper sees (search metadata plus fetched content) is kept in
+SQLite with an FTS5 index so repeat searches can be answered offline.
+Content is stored once per content hash: a tab whose normalized text matches
+one already stored keeps only the hash, and reads follow it.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from ultimate_guitar_cache import DEFAULT_CACHE_DIR
+from ultimate_guitar_fingerprint import collapse_near_duplicates, fingerprint
+
+TAB_FIELDS = ('title', 'artist', 'type', 'rating', 'votes', 'url', 'difficulty', 'id')
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def matches_filters(tab, filters):
+    """Apply search_tabs_local filters to a tab dict"""
+    if not filters:
+        return True
+    if filters.get('type') and tab.get('type', '').lower() != filters['type'].lower():
+        return False
+    if filters.get('artist') and filters['artist'].lower() not in tab.get('artist', '').lower():
+        return False
+    if filters.get('difficulty') and tab.get('difficulty', '').lower() != filters['difficulty'].lower():
+        return False
+    if filters.get('min_rating') and float(tab.get('rating') or 0) < float(filters['min_rating']):
+        return False
+    return True
+
+
+def fts_query(query):
+    """Turn free text into an FTS5 prefix query (all terms must match)"""
+    tokens = TOKEN_RE.findall(query.lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+class TabCorpus:
+    """Thread-safe SQLite tab store with full-text search"""
+
+    def __init__(self, path=None):
+        path = path or os.getenv('UG_CORPUS_PATH') or (DEFAULT_CACHE_DIR / 'corpus.sqlite3')
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS tabs (
+                rowid INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                id TEXT,
+                title TEXT NOT NULL,
+                artist TEXT NOT NULL,
+                type TEXT,
+                rating REAL,
+                votes INTEGER,
+                difficulty TEXT,
+                content TEXT,
+                page_title TEXT,
+                updated_at REAL NOT NULL,
+                content_fetched_at REAL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS tabs_fts USING fts5(
+                title, artist, content, content='tabs', content_rowid='rowid'
+            );
+            CREATE TRIGGER IF NOT EXISTS tabs_ai AFTER INSERT ON tabs BEGIN
+                INSERT INTO tabs_fts (rowid, title, artist, content)
+                VALUES (new.rowid, new.title, new.artist, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tabs_ad AFTER DELETE ON tabs BEGIN
+                INSERT INTO tabs_fts (tabs_fts, rowid, title, artist, content)
+                VALUES ('delete', old.rowid, old.title, old.artist, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tabs_au AFTER UPDATE ON tabs BEGIN
+                INSERT INTO tabs_fts (tabs_fts, rowid, title, artist, content)
+                VALUES ('delete', old.rowid, old.title, old.artist, old.content);
+                INSERT INTO tabs_fts (rowid, title, artist, content)
+                VALUES (new.rowid, new.title, new.artist, new.content);
+            END;
+        """)
+        # Corpora created before content fingerprinting lack these columns
+        columns = {row[1] for row in self.db.execute('PRAGMA table_info(tabs)')}
+        for column in ('content_hash', 'simhash'):
+            if column not in columns:
+                self.db.execute(f'ALTER TABLE tabs ADD COLUMN {column} TEXT')
+        self.db.execute('CREATE INDEX IF NOT EXISTS tabs_content_hash ON tabs (content_hash)')
+        self.db.commit()
+
+    def store_tabs(self, tabs):
+        """Upsert search-result metadata; previously fetched content is kept"""
+        now = time.time()
+        rows = [
+            (tab['url'], tab.get('id', ''), tab['title'], tab['artist'], tab.get('type', ''),
+             tab.get('rating') or 0, tab.get('votes') or 0, tab.get('difficulty', ''), now)
+            for tab in tabs if tab.get('url') and tab.get('title') and tab.get('artist')
+        ]
+        if not rows:
+            return
+        with self.lock:
+            self.db.executemany("""
+                INSERT INTO tabs (url, id, title, artist, type, rating, votes, difficulty, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    id = excluded.id, title = excluded.title, artist = excluded.artist,
+                    type = excluded.type, rating = excluded.rating, votes = excluded.votes,
+                    difficulty = excluded.difficulty, updated_at = excluded.updated_at
+            """, rows)
+            self.db.commit()
+
+    def store_content(self, url, content_result):
+        """Attach fetched tab content to a known tab (or a bare URL row)"""
+        self.store_contents([(url, content_result)])
+
+    def store_contents(self, results):
+        """store_content for many (url, content_result) pairs in one transaction
+
+        Text already stored under the same content hash is not stored again.
+        """
+        now = time.time()
+        rows = []
+        for url, result in results:
+            if not result.get('success') or not result.get('content'):
+                continue
+            digest, simhash = result.get('content_hash'), result.get('simhash')
+            if not digest:
+                digest, simhash = fingerprint(result['content'])
+            rows.append((url, result['content'], result.get('title') or '', digest, simhash))
+        if not rows:
+            return
+        with self.lock:
+            for url, content, page_title, digest, simhash in rows:
+                self._release_content(url, digest)
+                holder = self.db.execute(
+                    'SELECT 1 FROM tabs WHERE content_hash = ? AND content IS NOT NULL AND url != ? LIMIT 1',
+                    (digest, url)
+                ).fetchone()
+                self.db.execute("""
+                    INSERT INTO tabs (url, title, artist, content, page_title, updated_at, content_fetched_at,
+                                      content_hash, simhash)
+                    VALUES (?, ?, '', ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        content = excluded.content, page_title = excluded.page_title,
+                        content_fetched_at = excluded.content_fetched_at,
+                        content_hash = excluded.content_hash, simhash = excluded.simhash
+                """, (url, page_title, None if holder else content, page_title, now, now, digest, simhash))
+            self.db.commit()
+
+    def _release_content(self, url, new_digest):
+        """Before url's text changes, hand its old text to a tab that was deduplicated against it"""
+        old = self.db.execute(
+            'SELECT content_hash FROM tabs WHERE url = ? AND content IS NOT NULL', (url,)
+        ).fetchone()
+        if not old or not old[0] or old[0] == new_digest:
+            return
+        self.db.execute("""
+            UPDATE tabs SET content = (SELECT content FROM tabs WHERE url = ?)
+            WHERE rowid = (SELECT rowid FROM tabs WHERE content_hash = ? AND content IS NULL LIMIT 1)
+        """, (url, old[0]))
+
+    def get_content(self, url):
+        """Return a get_tab_content-shaped result from the corpus, or None"""
+        with self.lock:
+            row = self.db.execute("""
+                SELECT COALESCE(t.content, (SELECT c.content FROM tabs c
+                                            WHERE c.content_hash = t.content_hash AND c.content IS NOT NULL
+                                            LIMIT 1)),
+                       t.page_title, t.content_hash, t.simhash
+                FROM tabs t WHERE t.url = ?
+            """, (url,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return {'success': True, 'content': row[0], 'url': url, 'title': row[1] or 'Unknown',
+                'content_hash': row[2], 'simhash': row[3]}
+
+    def iter_contents(self):
+        """Yield {url, title, content} for every tab with content, duplicates resolved"""
+        with self.lock:
+            rows = self.db.execute("""
+                SELECT t.url, t.page_title,
+                       COALESCE(t.content, (SELECT c.content FROM tabs c
+                                            WHERE c.content_hash = t.content_hash AND c.content IS NOT NULL
+                                            LIMIT 1))
+                FROM tabs t WHERE t.content IS NOT NULL OR t.content_hash IS NOT NULL
+            """).fetchall()
+        for url, title, content in rows:
+            if content:
+                yield {'url': url, 'title': title, 'content': content}
+
+    def search(self, query, limit=10, filters=None, collapse=False):
+        """Full-text search over title/artist/content, best matches first
+
+        collapse folds versions whose content is a near-duplicate of a better-ranked
+        match into it, listed under its 'near_duplicates'.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+
+        sql = """
+            SELECT t.title, t.artist, t.type, t.rating, t.votes, t.url, t.difficulty, t.id, t.simhash
+            FROM tabs_fts f JOIN tabs t ON t.rowid = f.rowid
+            WHERE tabs_fts MATCH ? AND t.artist != ''
+        """
+        params = [match]
+        filters = filters or {}
+        if filters.get('type'):
+            sql += ' AND lower(t.type) = lower(?)'
+            params.append(filters['type'])
+        if filters.get('artist'):
+            sql += ' AND t.artist LIKE ?'
+            params.append(f"%{filters['artist']}%")
+        if filters.get('difficulty'):
+            sql += ' AND lower(t.difficulty) = lower(?)'
+            params.append(filters['difficulty'])
+        if filters.get('min_rating'):
+            sql += ' AND t.rating >= ?'
+            params.append(float(filters['min_rating']))
+        if filters.get('has_content'):
+            sql += ' AND (t.content IS NOT NULL OR t.content_hash IS NOT NULL)'
+        # Title/artist hits outrank matches buried in tab bodies; votes break ties
+        sql += ' ORDER BY bm25(tabs_fts, 10.0, 5.0, 1.0), t.votes DESC LIMIT ?'
+        # Headroom for the versions that collapse into a better-ranked one
+        params.append(int(limit) * 3 if collapse else int(limit))
+
+        with self.lock:
+            rows = self.db.execute(sql, params).fetchall()
+        tabs = [dict(zip(TAB_FIELDS + ('simhash',), row)) for row in rows]
+        if collapse:
+            tabs = collapse_near_duplicates(tabs)
+        for tab in tabs:
+            del tab['simhash']
+        return tabs[:limit]
+
+    def stats(self):
+        with self.lock:
+            tabs, with_content, stored, deduplicated = self.db.execute("""
+                SELECT COUNT(*), COUNT(COALESCE(content, content_hash)), COUNT(content),
+                       COALESCE(SUM(content IS NULL AND content_hash IS NOT NULL), 0)
+                FROM tabs
+            """).fetchone()
+        return {'tabs': tabs, 'with_content': with_content, 'stored_contents': stored,
+                'deduplicated': deduplicated}
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,223 @@
+"""
+Resumable catalog crawl for the Ultimate Guitar scraper
+Takes artist names or other search seeds, walks every result page of each,
+then fetches the content of every tab URL found. Fetches go through the
+scraper's FetchEngine (bounded concurrency, per-host rate limit); results are
+written to the corpus one batch per transaction, and a checkpoint database
+records which pages and tabs are done, so an interrupted crawl picks up where
+it stopped instead of refetching.
+
+The corpus batch is committed before the checkpoint marks it done: a crash
+between the two refetches at most one batch and never loses one.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from ultimate_guitar_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_BATCH_SIZE = 50
+# Seconds between progress lines
+DEFAULT_REPORT_INTERVAL = 5.0
+
+
+class CrawlCheckpoint:
+    """SQLite record of crawl progress: seeds with their page counts, done pages, found tabs"""
+
+    def __init__(self, path=None):
+        path = path or os.getenv('UG_CRAWL_STATE') or (DEFAULT_CACHE_DIR / 'crawl.sqlite3')
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS seeds (
+                seed TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                total_pages INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                seed TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                PRIMARY KEY (seed, page)
+            );
+            CREATE TABLE IF NOT EXISTS tabs (
+                url TEXT PRIMARY KEY,
+                seed TEXT NOT NULL,
+                fetched INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        self.db.commit()
+
+    def add_seeds(self, seeds):
+        with self.lock:
+            start = self.db.execute('SELECT COUNT(*) FROM seeds').fetchone()[0]
+            self.db.executemany('INSERT OR IGNORE INTO seeds (seed, position) VALUES (?, ?)',
+                                [(seed, start + i) for i, seed in enumerate(seeds)])
+            self.db.commit()
+
+    def seeds(self):
+        """(seed, total_pages or None) in the order they were first added"""
+        with self.lock:
+            return self.db.execute('SELECT seed, total_pages FROM seeds ORDER BY position').fetchall()
+
+    def pending_pages(self, seed, total_pages):
+        with self.lock:
+            done = {row[0] for row in self.db.execute('SELECT page FROM pages WHERE seed = ?', (seed,))}
+        return [page for page in range(1, total_pages + 1) if page not in done]
+
+    def complete_pages(self, seed, pages, tab_urls, total_pages=None):
+        """Mark result pages done and queue the tab URLs they listed, in one transaction"""
+        with self.lock:
+            if total_pages is not None:
+                self.db.execute('UPDATE seeds SET total_pages = ? WHERE seed = ?', (total_pages, seed))
+            self.db.executemany('INSERT OR IGNORE INTO pages (seed, page) VALUES (?, ?)',
+                                [(seed, page) for page in pages])
+            self.db.executemany('INSERT OR IGNORE INTO tabs (url, seed) VALUES (?, ?)',
+                                [(url, seed) for url in tab_urls])
+            self.db.commit()
+
+    def pending_tabs(self, limit):
+        with self.lock:
+            rows = self.db.execute('SELECT url FROM tabs WHERE fetched = 0 ORDER BY rowid LIMIT ?',
+                                   (limit,)).fetchall()
+        return [row[0] for row in rows]
+
+    def complete_tabs(self, urls):
+        with self.lock:
+            self.db.executemany('UPDATE tabs SET fetched = 1 WHERE url = ?', [(url,) for url in urls])
+            self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            seeds, enumerated = self.db.execute('SELECT COUNT(*), COUNT(total_pages) FROM seeds').fetchone()
+            pages = self.db.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+            tabs, fetched = self.db.execute('SELECT COUNT(*), COALESCE(SUM(fetched), 0) FROM tabs').fetchone()
+        return {'seeds': seeds, 'seeds_enumerated': enumerated, 'pages_done': pages,
+                'tabs_found': tabs, 'tabs_fetched': fetched}
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class Crawler:
+    """Enumerate search seeds into the corpus, then fetch every tab they list
+
+    The scraper should be built without its own corpus (use_corpus=False);
+    the crawler does the corpus writes itself, one transaction per batch.
+    """
+
+    def __init__(self, scraper, corpus, checkpoint, batch_size=DEFAULT_BATCH_SIZE,
+                 report_interval=DEFAULT_REPORT_INTERVAL, include_content=True):
+        self.scraper = scraper
+        self.corpus = corpus
+        self.checkpoint = checkpoint
+        self.batch_size = max(1, int(batch_size))
+        self.report_interval = report_interval
+        self.include_content = include_content
+        self.stopping = threading.Event()
+
+        self.pages_fetched = 0
+        self.tabs_fetched = 0
+        self.failed = 0
+        self.started_at = None
+        self.start_bytes = 0
+        self.last_report = 0.0
+
+    def run(self, seeds=()):
+        """Crawl the given seeds plus any unfinished work from earlier runs; returns checkpoint stats"""
+        self.checkpoint.add_seeds([seed.strip() for seed in seeds if seed.strip()])
+        self.started_at = self.last_report = time.monotonic()
+        self.start_bytes = self.scraper.transport.stats()['bytes_received']
+
+        for seed, total_pages in self.checkpoint.seeds():
+            if self.stopping.is_set():
+                break
+            self._enumerate(seed, total_pages)
+        if self.include_content:
+            self._fetch_tabs()
+
+        self._report(final=True)
+        return self.checkpoint.stats()
+
+    def stop(self):
+        """Finish the batch in progress, then return from run(); the checkpoint is left resumable"""
+        self.stopping.set()
+
+    def _enumerate(self, seed, total_pages):
+        if total_pages is None:
+            first = self.scraper._fetch_search_page(self.scraper._search_page_url(seed, 1))
+            self.pages_fetched += 1
+            if not first:
+                # Left unenumerated, so the next run tries it again
+                self.failed += 1
+                print(f"Crawl: no results for seed '{seed}'", file=sys.stderr)
+                return
+            tabs, total_pages, _ = first
+            self._store_pages(seed, [1], tabs, total_pages)
+
+        pending = self.checkpoint.pending_pages(seed, total_pages)
+        for start in range(0, len(pending), self.batch_size):
+            if self.stopping.is_set():
+                return
+            pages = pending[start:start + self.batch_size]
+            urls = [self.scraper._search_page_url(seed, page) for page in pages]
+            results = self.scraper.fetch_engine.map(self.scraper._fetch_search_page, urls)
+            self.pages_fetched += len(pages)
+            done, tabs = [], []
+            for page, result in zip(pages, results):
+                if result:
+                    done.append(page)
+                    tabs.extend(result[0])
+                else:
+                    self.failed += 1
+            self._store_pages(seed, done, tabs)
+
+    def _store_pages(self, seed, pages, tabs, total_pages=None):
+        self.corpus.store_tabs(tabs)
+        self.checkpoint.complete_pages(seed, pages, [tab['url'] for tab in tabs if tab.get('url')],
+                                       total_pages=total_pages)
+        self._report()
+
+    def _fetch_tabs(self):
+        # Failed URLs stay pending; skip them for the rest of this run instead of spinning on them
+        skipped = set()
+        while not self.stopping.is_set():
+            urls = [url for url in self.checkpoint.pending_tabs(self.batch_size + len(skipped))
+                    if url not in skipped][:self.batch_size]
+            if not urls:
+                return
+            results = self.scraper.fetch_engine.map(self.scraper.get_tab_content, urls)
+            self.tabs_fetched += len(urls)
+            done = []
+            for url, result in zip(urls, results):
+                if result.get('success'):
+                    done.append(url)
+                else:
+                    skipped.add(url)
+                    self.failed += 1
+            self.corpus.store_contents(list(zip(urls, results)))
+            self.checkpoint.complete_tabs(done)
+            self._report()
+
+    def _report(self, final=False):
+        now = time.monotonic()
+        if not final and now - self.last_report < self.report_interval:
+            return
+        self.last_report = now
+        elapsed = max(now - self.started_at, 1e-9)
+        received = self.scraper.transport.stats()['bytes_received'] - self.start_bytes
+        state = self.checkpoint.stats()
+        label = 'Crawl finished' if final else 'Crawl'
+        print(f"{label}: {self.pages_fetched} pages ({self.pages_fetched / elapsed:.1f} pages/s), "
+              f"{self.tabs_fetched} tab fetches ({self.tabs_fetched / elapsed:.1f} tabs/s), "
+              f"{received / 1024:.0f} KiB ({received / 1024 / elapsed:.1f} KiB/s), "
+              f"tabs {state['tabs_fetched']}/{state['tabs_found']}, {self.failed} failed", file=sys.stderr)
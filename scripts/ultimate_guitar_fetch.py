@@ -0,0 +1,179 @@
+"""
+Bounded, rate-limited concurrent fetching for the Ultimate Guitar scraper
+Overlaps tab downloads while keeping each origin host under a token-bucket budget,
+and coalesces identical in-flight calls so a burst costs one upstream request.
+"""
+
+import copy
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+DEFAULT_BURST = 4
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """One token bucket per origin host"""
+
+    def __init__(self, rate=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self.buckets[host] = bucket
+        bucket.acquire()
+
+
+class FetchEngine:
+    """Run fetch calls on a bounded thread pool, gated by the per-host limiter"""
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 requests_per_second=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.limiter = HostRateLimiter(requests_per_second, burst)
+
+    def map(self, fetch, urls):
+        """Call fetch(url) for every url concurrently; results keep input order"""
+        urls = list(urls)
+        if not urls:
+            return []
+
+        def limited(url):
+            self.limiter.acquire(url)
+            return fetch(url)
+
+        workers = min(self.max_concurrency, len(urls))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ug-fetch') as executor:
+            return list(executor.map(limited, urls))
+
+    def stream(self, fetch, urls, window=None):
+        """Yield fetch(url) results in input order as they become available
+
+        urls is consumed lazily and at most `window` calls are in flight, so a
+        caller that stops iterating early never triggers the remaining fetches;
+        calls not yet started are cancelled when the generator is closed.
+        """
+        window = max(1, min(window or self.max_concurrency, self.max_concurrency))
+        urls = iter(urls)
+
+        def limited(url):
+            self.limiter.acquire(url)
+            return fetch(url)
+
+        executor = ThreadPoolExecutor(max_workers=window, thread_name_prefix='ug-stream')
+        pending = deque()
+        try:
+            for url in urls:
+                pending.append(executor.submit(limited, url))
+                if len(pending) >= window:
+                    break
+            while pending:
+                result = pending.popleft().result()
+                for url in urls:
+                    pending.append(executor.submit(limited, url))
+                    break
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution
+
+    The first caller (the leader) runs the function; callers that arrive while
+    it is running wait and receive a deep copy of the leader's result, or the
+    same exception. Nothing is cached once the call completes.
+    """
+
+    class Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+            self.waiters = 0
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn() unless a call with this key is already running; then share its outcome"""
+        with self.lock:
+            call = self.calls.get(key)
+            if call is None:
+                call = self.Call()
+                self.calls[key] = call
+                self.executed += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Callers may mutate what they get back (search_and_get_tabs adds content)
+            return copy.deepcopy(call.result)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.error = e
+            self._finish(key)
+            call.done.set()
+            raise
+
+        if self._finish(key):
+            # Waiters copy from a snapshot the leader never hands out, so its own edits can't leak
+            call.result = copy.deepcopy(result)
+        call.done.set()
+        return result
+
+    def _finish(self, key):
+        """Retire the in-flight call; True if anyone is waiting on it"""
+        with self.lock:
+            return self.calls.pop(key).waiters > 0
+
+    def stats(self):
+        with self.lock:
+            return {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self.calls)}
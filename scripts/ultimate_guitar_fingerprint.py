@@ -0,0 +1,102 @@
+"""
+Tab content fingerprints for the Ultimate Guitar scraper
+UG carries many versions of the same song that differ only in whitespace,
+a comment line or a few chord names. Two fingerprints are computed over the
+normalized lines of a tab:
+
+    content_hash  SHA-1 of the normalized text; equal means duplicate
+    simhash       64-bit SimHash over line and word-shingle features; a small
+                  Hamming distance means near-duplicate
+
+Both are hex strings so they survive JSON round trips to the UI unchanged.
+"""
+
+import hashlib
+import re
+
+SIMHASH_BITS = 64
+# Near-duplicate when at most this many of the 64 bits differ. Unrelated tabs
+# sit around 32; a couple of changed chord lines move a short tab by up to ~12
+NEAR_DUPLICATE_DISTANCE = 12
+SHINGLE_SIZE = 3
+
+WHITESPACE_RE = re.compile(r'\s+')
+# Header lines that vary between uploads of the same arrangement
+BOILERPLATE_RE = re.compile(r'^(tabbed|transcribed|submitted|corrected|edited|ver(sion)?\b|email|e-mail|\*+$|#)')
+WORD_RE = re.compile(r'[^\s|]+')
+
+
+def normalize_lines(content):
+    """Lowercased, whitespace-collapsed, non-empty lines with uploader boilerplate dropped"""
+    lines = []
+    for line in (content or '').splitlines():
+        line = WHITESPACE_RE.sub(' ', line).strip().lower()
+        if line and not BOILERPLATE_RE.match(line):
+            lines.append(line)
+    return lines
+
+
+def content_hash(lines):
+    return hashlib.sha1('\n'.join(lines).encode('utf-8')).hexdigest()
+
+
+# Per bit position, a translate table mapping each byte to 1 if that bit is set
+BIT_TABLES = [bytes(value >> bit & 1 for value in range(256)) for bit in range(8)]
+
+
+def simhash(lines):
+    """64-bit SimHash; lines carry the layout, word shingles survive re-spacing and re-wrapping"""
+    features = list(lines)
+    words = [word for line in lines for word in WORD_RE.findall(line)]
+    features.extend(' '.join(words[i:i + SHINGLE_SIZE]) for i in range(max(0, len(words) - SHINGLE_SIZE + 1)))
+    if not features:
+        return 0
+    # Column-wise bit counts over the packed 8-byte feature hashes, done with C-level slices
+    # and translate/count instead of a Python loop over 64 bits per feature
+    packed = b''.join(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest() for feature in features)
+    value = 0
+    for byte in range(8):
+        column = packed[byte::8]
+        for bit in range(8):
+            if column.translate(BIT_TABLES[bit]).count(1) * 2 > len(features):
+                value |= 1 << ((7 - byte) * 8 + bit)
+    return value
+
+
+def fingerprint(content):
+    """(content_hash, simhash) as hex strings, or (None, None) for empty content"""
+    lines = normalize_lines(content)
+    if not lines:
+        return None, None
+    return content_hash(lines), f"{simhash(lines):016x}"
+
+
+def hamming(a, b):
+    """Bits that differ between two hex simhashes"""
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def is_near_duplicate(a, b, distance=NEAR_DUPLICATE_DISTANCE):
+    return bool(a and b) and hamming(a, b) <= distance
+
+
+def collapse_near_duplicates(tabs, simhash_of=None, distance=NEAR_DUPLICATE_DISTANCE):
+    """Drop tabs whose content matches an earlier (better ranked) one
+
+    Each kept tab lists the URLs it absorbed under 'near_duplicates'. Tabs
+    without a simhash (content not fetched) are always kept. simhash_of
+    reads a tab's simhash (default: its 'simhash' key).
+    """
+    simhash_of = simhash_of or (lambda tab: tab.get('simhash'))
+    kept = []
+    for tab in tabs:
+        mine = simhash_of(tab)
+        original = None
+        if mine:
+            original = next((other for other in kept if is_near_duplicate(mine, simhash_of(other), distance)),
+                            None)
+        if original is None:
+            kept.append(tab)
+        else:
+            original.setdefault('near_duplicates', []).append(tab.get('url'))
+    return kept
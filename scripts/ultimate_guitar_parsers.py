@@ -0,0 +1,319 @@
+"""
+Pluggable HTML parser backends for the Ultimate Guitar scraper
+Wraps selectolax (lexbor), BeautifulSoup+lxml and BeautifulSoup+html.parser
+behind one small node API so the scraper behaves the same on all of them.
+selectolax and lxml are optional (pip install selectolax lxml); html.parser
+always works. Set UG_HTML_PARSER to force a specific backend.
+
+Node API used by the scraper:
+    node.tag                   lowercase tag name
+    node.attr(name, default)   attribute value as a string
+    node.text()                concatenated descendant text
+    node.select(css)           matching descendants (never the node itself)
+    node.select_one(css)       first matching descendant or None
+    node.find_all(tag)         descendants with the given tag name
+    node.scan(group)           (descendant, matched indices) for a SelectorGroup
+    node.parent                parent node, or None above the document
+    node.key                   hashable identity of the underlying node
+    node.decompose()           release the underlying tree
+
+SelectorGroup compiles the simple selectors the scraper uses into one
+classifier, and node.scan(group) finds and classifies every matching
+descendant in a single pass over the tree. That pass runs in Python, so a
+backend with native_selectors set (lexbor's C engine) is faster queried
+one selector at a time, and callers with a selector cascade keep it there.
+"""
+
+import os
+import re
+import sys
+
+# Fastest first; the first importable one wins unless UG_HTML_PARSER says otherwise
+BACKEND_PREFERENCE = ('selectolax', 'lxml', 'html.parser')
+
+SIMPLE_SELECTOR_RE = re.compile(
+    r'(?P<tag>[a-z][a-z0-9]*)'
+    r'|\.(?P<cls>[\w-]+)'
+    r'|\[(?P<attr>[\w-]+)(?:(?P<op>\*?=)"(?P<value>[^"]*)"(?P<flag>\s+i)?)?\]'
+)
+
+
+class SoupNode:
+    """BeautifulSoup element adapter"""
+
+    __slots__ = ('el',)
+
+    def __init__(self, el):
+        self.el = el
+
+    @property
+    def tag(self):
+        return self.el.name
+
+    def attr(self, name, default=None):
+        value = self.el.get(name, default)
+        # bs4 returns multi-valued attributes (class, rel) as lists
+        if isinstance(value, list):
+            return ' '.join(value)
+        return value
+
+    def text(self):
+        return self.el.get_text()
+
+    def select(self, css):
+        return [SoupNode(el) for el in self.el.select(css)]
+
+    def select_one(self, css):
+        el = self.el.select_one(css)
+        return SoupNode(el) if el is not None else None
+
+    def find_all(self, tag):
+        return [SoupNode(el) for el in self.el.find_all(tag)]
+
+    def scan(self, group):
+        # One generator walk with the compiled classifier beats soupsieve matching a selector list
+        classify = group.classify
+        found = []
+        for el in self.el.descendants:
+            if el.name is None:
+                continue  # text, comments, doctype
+            matched = classify(el.name, el.attrs)
+            if matched:
+                found.append((SoupNode(el), matched))
+        return found
+
+    @property
+    def parent(self):
+        el = self.el.parent
+        return SoupNode(el) if el is not None else None
+
+    @property
+    def key(self):
+        return id(self.el)
+
+    def decompose(self):
+        self.el.decompose()
+
+
+class LexborNode:
+    """selectolax (lexbor) node adapter"""
+
+    __slots__ = ('node', 'tree')
+
+    def __init__(self, node, tree=None):
+        self.node = node
+        # Holding the tree keeps the lexbor document alive while nodes are in use
+        self.tree = tree
+
+    @property
+    def tag(self):
+        return self.node.tag
+
+    def attr(self, name, default=None):
+        value = self.node.attributes.get(name, default)
+        # Valueless attributes come back as None
+        return '' if value is None and name in self.node.attributes else value
+
+    def text(self):
+        return self.node.text(deep=True)
+
+    def select(self, css):
+        # lexbor includes the context node itself in css() matches, and repeats a node
+        # once per selector it matches in a group; soupsieve does neither
+        seen = {self.node.mem_id}
+        matches = []
+        for n in self.node.css(css):
+            if n.mem_id not in seen:
+                seen.add(n.mem_id)
+                matches.append(LexborNode(n, self.tree))
+        return matches
+
+    def select_one(self, css):
+        matches = self.select(css)
+        return matches[0] if matches else None
+
+    def find_all(self, tag):
+        return self.select(tag)
+
+    def scan(self, group):
+        # lexbor's C engine finds candidates fastest; only those get classified in Python
+        classify = group.classify
+        return [(node, classify(node.tag, node.node.attributes)) for node in self.select(group.css)]
+
+    @property
+    def parent(self):
+        node = self.node.parent
+        return LexborNode(node, self.tree) if node is not None else None
+
+    @property
+    def key(self):
+        return self.node.mem_id
+
+    def decompose(self):
+        if self.tree is not None and self.node.mem_id == self.tree.root.mem_id:
+            # Dropping our references lets lexbor free the whole document
+            self.tree = None
+        else:
+            self.node.decompose()
+
+
+def parse_compound(css):
+    """Split a compound selector into (tag or None, [(attr, op, value, ignore_case)])
+
+    Supports tag, .class, [attr], [attr="v"] and [attr*="v" i]; combinators
+    and pseudo-classes are not supported.
+    """
+    tag = None
+    tests = []
+    pos = 0
+    css = css.strip()
+    while pos < len(css):
+        part = SIMPLE_SELECTOR_RE.match(css, pos)
+        if not part:
+            raise ValueError(f"Unsupported selector: {css}")
+        pos = part.end()
+        if part.group('tag'):
+            tag = part.group('tag')
+        elif part.group('cls'):
+            tests.append(('class', '~=', part.group('cls'), False))
+        else:
+            ignore_case = bool(part.group('flag'))
+            value = part.group('value')
+            tests.append((part.group('attr'), part.group('op'),
+                          value.lower() if ignore_case and value else value, ignore_case))
+    return tag, tests
+
+
+class SelectorGroup:
+    """Selectors compiled once for classifying many nodes in a single pass
+
+    classify(tag, attrs) returns the indices of the selectors a node matches,
+    following the CSS engines' rules. Selectors are bucketed by tag up front
+    so each node is only tested against the ones that can apply to it.
+    """
+
+    def __init__(self, selectors):
+        self.selectors = list(dict.fromkeys(selectors))
+        # Grouped form for backends whose native engine is the fastest way to find candidates
+        self.css = ', '.join(self.selectors)
+        plans = [parse_compound(css) for css in self.selectors]
+        self.untagged = tuple((i, tests) for i, (tag, tests) in enumerate(plans) if tag is None)
+        self.by_tag = {
+            tag: tuple((i, tests) for i, (want, tests) in enumerate(plans) if want in (None, tag))
+            for tag, _ in plans if tag
+        }
+
+    def index(self, css):
+        return self.selectors.index(css)
+
+    def classify(self, tag, attrs):
+        matched = []
+        # Normalized attribute values, shared by every selector tested on this node
+        seen = {}
+        for index, tests in self.by_tag.get(tag, self.untagged):
+            for name, op, value, ignore_case in tests:
+                if name not in attrs:
+                    break
+                if op is None:
+                    continue
+                form = (name, op == '~=', ignore_case)
+                text = seen.get(form)
+                if text is None:
+                    text = attrs[name]
+                    if text is None:
+                        text = ''
+                    elif isinstance(text, list):
+                        # bs4 keeps multi-valued attributes (class, rel) as lists
+                        text = ' '.join(text)
+                    if ignore_case:
+                        text = text.lower()
+                    if op == '~=':
+                        text = text.split()
+                    seen[form] = text
+                if op == '~=':
+                    if value not in text:
+                        break
+                elif op == '*=':
+                    # An empty substring never matches in CSS
+                    if not value or value not in text:
+                        break
+                elif text != value:
+                    break
+            else:
+                matched.append(index)
+        return matched
+
+
+class SoupBackend:
+    """BeautifulSoup with a named tree builder"""
+
+    # soupsieve matches selectors in Python, one tree walk per select()
+    native_selectors = False
+    # Tree building runs in Python too; a byte-level scan for one attribute is far cheaper
+    fast_dom = False
+
+    def __init__(self, features):
+        from bs4 import BeautifulSoup
+        self.name = features
+        self.features = features
+        self.BeautifulSoup = BeautifulSoup
+
+    def parse(self, body):
+        return SoupNode(self.BeautifulSoup(body, self.features))
+
+
+class SelectolaxBackend:
+    """selectolax on the lexbor engine"""
+
+    name = 'selectolax'
+    native_selectors = True
+    fast_dom = True
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self.LexborHTMLParser = LexborHTMLParser
+
+    def parse(self, body):
+        tree = self.LexborHTMLParser(body)
+        return LexborNode(tree.root, tree)
+
+
+def available_backends():
+    """Names of the backends importable in this environment, fastest first"""
+    names = []
+    for name in BACKEND_PREFERENCE:
+        try:
+            create_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def create_backend(name):
+    """Instantiate a backend by name; raises ImportError if its engine is missing"""
+    if name == 'selectolax':
+        return SelectolaxBackend()
+    if name == 'lxml':
+        import lxml  # noqa: F401 - bs4 only fails at parse time otherwise
+        return SoupBackend('lxml')
+    if name == 'html.parser':
+        return SoupBackend('html.parser')
+    raise ValueError(f"Unknown HTML parser backend: {name}")
+
+
+def get_backend(name=None):
+    """Return the requested backend, or the fastest installed one"""
+    name = name or os.getenv('UG_HTML_PARSER')
+    if name:
+        return create_backend(name)
+
+    for candidate in BACKEND_PREFERENCE:
+        try:
+            backend = create_backend(candidate)
+        except ImportError:
+            continue
+        print(f"Using HTML parser backend: {backend.name}", file=sys.stderr)
+        return backend
+
+    raise ImportError("No HTML parser available; install beautifulsoup4")
@@ -0,0 +1,240 @@
+"""
+Query canonicalization for the Ultimate Guitar scraper
+Folds case, accents, punctuation and noise words, expands artist aliases and
+resolves near-duplicate or misspelled queries against the song titles the
+scraper has already seen, so they reuse one upstream search (and its cache
+entry) instead of each triggering their own.
+
+Resolution order for a folded query:
+    exact    the folded query, or its alias expansion, is a query already searched
+    artist   "<known artist> <part of one of their titles>" (led zep stairway)
+    fuzzy    trigram similarity to one known title is high enough (stairway to heven)
+    new      nothing matched; the query goes upstream with only case/spacing normalized
+
+A query only ever folds onto an earlier search for the same title. Titles an
+artist or other broad search returned help recognise a later query, but
+answer it only once their own title has been searched; "oasis" does not
+answer "wonderwall". An artist resolution answers with the title search,
+whose results rank() then reorders for the artist the user named.
+"""
+
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+# Common short forms -> canonical artist name (both sides folded)
+ARTIST_ALIASES = {
+    'led zep': 'led zeppelin',
+    'zep': 'led zeppelin',
+    'zeppelin': 'led zeppelin',
+    'gnr': 'guns n roses',
+    'guns and roses': 'guns n roses',
+    'rhcp': 'red hot chili peppers',
+    'chili peppers': 'red hot chili peppers',
+    'acdc': 'ac dc',
+    'floyd': 'pink floyd',
+    'skynyrd': 'lynyrd skynyrd',
+    'ccr': 'creedence clearwater revival',
+    'creedence': 'creedence clearwater revival',
+    'srv': 'stevie ray vaughan',
+    'hendrix': 'jimi hendrix',
+    'stones': 'rolling stones',
+    'tswift': 'taylor swift',
+    'foos': 'foo fighters',
+}
+
+# Words that describe what the user wants from UG, not which song
+NOISE_WORDS = {'chords', 'chord', 'tab', 'tabs', 'guitar'}
+
+FUZZY_THRESHOLD = 0.72
+# The best fuzzy candidate must beat the runner-up by this much to be trusted
+FUZZY_MARGIN = 0.08
+
+PUNCTUATION_RE = re.compile(r"[^\w\s]|_")
+
+
+def fold(query):
+    """Lowercase, strip accents and punctuation, drop noise words, collapse whitespace"""
+    text = unicodedata.normalize('NFKD', query or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    # Apostrophes join words (don't -> dont); other punctuation separates them
+    text = PUNCTUATION_RE.sub(lambda m: '' if m.group(0) in "'’" else ' ', text.replace('&', ' and '))
+    tokens = [token for token in text.split() if token not in NOISE_WORDS]
+    return ' '.join(tokens)
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(a, b):
+    """Dice coefficient of two trigram sets"""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class QueryResolver:
+    """Maps raw queries to the canonical upstream query that answers them
+
+    learn() records the titles and artists a search returned; resolve() then
+    maps later variants of a title search back onto the same upstream query.
+    Thread-safe.
+    """
+
+    def __init__(self, aliases=None, aliases_path=None):
+        table = dict(ARTIST_ALIASES)
+        aliases_path = aliases_path or os.getenv('UG_ALIASES_PATH')
+        if aliases_path:
+            with open(aliases_path, encoding='utf-8') as f:
+                table.update(json.load(f))
+        table.update(aliases or {})
+        aliases = {fold(short): fold(full) for short, full in table.items()}
+        # Full names map to themselves so "led zeppelin" is never re-expanded via "zeppelin";
+        # longest phrase first so "led zep" wins over "zep"
+        phrases = {**{full: full for full in aliases.values()}, **aliases}
+        self.phrases = sorted(((tuple(phrase.split()), full) for phrase, full in phrases.items()),
+                              key=lambda item: len(item[0]), reverse=True)
+
+        self.lock = threading.Lock()
+        self.known = {}                           # folded query -> upstream query
+        self.titles_by_artist = defaultdict(set)  # folded artist -> folded titles
+        self.grams = {}                           # folded title -> trigram set
+        self.gram_index = defaultdict(set)        # trigram -> folded titles
+        self.counts = defaultdict(int)
+
+    def resolve(self, query):
+        """Return (upstream_query, how) where how is exact, artist, fuzzy or new"""
+        folded = fold(query)
+        expanded = self.expand_aliases(folded)
+        with self.lock:
+            upstream, how = self._resolve_locked(folded, expanded)
+            self.counts[how] += 1
+        if upstream is None:
+            upstream = ' '.join(query.lower().split())
+        return upstream, how
+
+    def _resolve_locked(self, folded, expanded):
+        for form in (folded, expanded):
+            if form in self.known:
+                return self.known[form], 'exact'
+        by_artist = self._resolve_by_artist(expanded)
+        if by_artist:
+            return by_artist, 'artist'
+        fuzzy = self._resolve_fuzzy(expanded)
+        if fuzzy:
+            return fuzzy, 'fuzzy'
+        return None, 'new'
+
+    def learn(self, upstream_query, tabs):
+        """Record the titles/artists an upstream search returned
+
+        Only the search itself becomes a known query: its results may answer
+        a different question (an artist search lists the catalog, not the
+        song), so a title maps to an upstream query once it has been searched.
+        """
+        folded_query = fold(upstream_query)
+        with self.lock:
+            if folded_query:
+                self.known.setdefault(folded_query, upstream_query)
+                # "led zep" and "led zeppelin" are the same search
+                self.known.setdefault(self.expand_aliases(folded_query), upstream_query)
+            for tab in tabs:
+                title = fold(tab.get('title', ''))
+                artist = self.expand_aliases(fold(tab.get('artist', '')))
+                if not title:
+                    continue
+                if artist:
+                    self.titles_by_artist[artist].add(title)
+                    # "The Rolling Stones" is usually typed without the article
+                    if artist.startswith('the '):
+                        self.titles_by_artist[artist[4:]].add(title)
+                if title not in self.grams:
+                    grams = trigrams(title)
+                    self.grams[title] = grams
+                    for gram in grams:
+                        self.gram_index[gram].add(title)
+
+    def expand_aliases(self, folded):
+        """Replace alias phrases with full artist names, on token boundaries"""
+        tokens = folded.split()
+        expanded = []
+        i = 0
+        while i < len(tokens):
+            for phrase, full in self.phrases:
+                if tuple(tokens[i:i + len(phrase)]) == phrase:
+                    expanded.append(full)
+                    i += len(phrase)
+                    break
+            else:
+                expanded.append(tokens[i])
+                i += 1
+        return ' '.join(expanded)
+
+    def rank(self, query, tabs):
+        """tabs with those matching every word of query first, or None if none do
+
+        For an artist resolution: the title search's results put the versions
+        by the artist the user named ahead of covers. None tells the caller
+        the shared search does not answer this query.
+        """
+        words = self.expand_aliases(fold(query)).split()
+        matching, rest = [], []
+        for tab in tabs:
+            tokens = f"{fold(tab.get('title', ''))} {self.expand_aliases(fold(tab.get('artist', '')))}".split()
+            (matching if self._covers(tokens, words) else rest).append(tab)
+        return matching + rest if matching else None
+
+    def stats(self):
+        with self.lock:
+            return {'known': len(self.known), 'artists': len(self.titles_by_artist), **self.counts}
+
+    def _resolve_by_artist(self, expanded):
+        """'<artist> <song words>' or '<song words> <artist>' with a unique matching title"""
+        padded = f" {expanded} "
+        for artist in sorted(self.titles_by_artist, key=len, reverse=True):
+            if f" {artist} " not in padded:
+                continue
+            rest = padded.replace(f" {artist} ", ' ').split()
+            if not rest:
+                return None
+            matches = [title for title in self.titles_by_artist[artist]
+                       if self._covers(title.split(), rest)]
+            if len(matches) == 1:
+                return self.known.get(matches[0])
+            # Several titles share the words; fall back to the closest spelling
+            if matches:
+                wanted = trigrams(' '.join(rest))
+                scored = sorted(((dice(wanted, self.grams[t]), t) for t in matches), reverse=True)
+                if scored[0][0] - scored[1][0] >= FUZZY_MARGIN:
+                    return self.known.get(scored[0][1])
+            return None
+        return None
+
+    def _covers(self, title_tokens, words):
+        """Every query word is a title word, or a prefix of one (stair -> stairway)"""
+        return all(any(token.startswith(word) for token in title_tokens) for word in words)
+
+    def _resolve_fuzzy(self, expanded):
+        if len(expanded) < 4:
+            return None
+        wanted = trigrams(expanded)
+        # Only titles sharing at least a few trigrams are scored
+        overlap = defaultdict(int)
+        for gram in wanted:
+            for title in self.gram_index.get(gram, ()):
+                overlap[title] += 1
+        candidates = [title for title, shared in overlap.items() if shared >= min(3, len(wanted))]
+        if not candidates:
+            return None
+        scored = sorted(((dice(wanted, self.grams[title]), title) for title in candidates), reverse=True)
+        best_score, best = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        if best_score >= FUZZY_THRESHOLD and best_score - runner_up >= FUZZY_MARGIN:
+            # A misspelling of a title nobody has searched for yet goes upstream as typed
+            return self.known.get(best)
+        return None
@@ -4,57 +4,288 @@ Real Ultimate Guitar scraper for guitar tabs
 Based on Ultimate Guitar's public search functionality
 """
 
-import requests
+import argparse
+import asyncio
+import html
 import json
+import os
 import sys
 import re
-from bs4 import BeautifulSoup
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import quote, urljoin
-import time
+
+from ultimate_guitar_cache import ResponseCache, CacheMiss, normalize_url
+from ultimate_guitar_classify import TAB_CONFIDENCE_THRESHOLD, classify
+from ultimate_guitar_corpus import TabCorpus, matches_filters
+from ultimate_guitar_crawl import Crawler, CrawlCheckpoint, DEFAULT_BATCH_SIZE
+from ultimate_guitar_fetch import FetchEngine, SingleFlight, DEFAULT_MAX_CONCURRENCY, DEFAULT_REQUESTS_PER_SECOND
+from ultimate_guitar_fingerprint import collapse_near_duplicates, fingerprint
+from ultimate_guitar_parsers import SelectorGroup, get_backend
+from ultimate_guitar_query import QueryResolver
+from ultimate_guitar_stream import JsStoreScanner, read_until
+from ultimate_guitar_tabstore import TabStore, build_store
+from ultimate_guitar_transport import Transport, DEFAULT_MAX_RETRIES
+
+# Entities other than the five that HTML serializers emit for attribute values
+UNCOMMON_ENTITY = re.compile(rb'&(?!amp;|quot;|lt;|gt;|#0?39;)')
+
+# Possible result containers for the HTML fallback, most specific first
+RESULT_SELECTORS = [
+    'tr[data-id]',  # Table rows with data-id
+    '.search-result',  # Result divs
+    '.js-result',  # JS result elements
+    'tr[class*="search"]',  # Any tr with search in class
+    'div[class*="search"]',  # Any div with search in class
+    'a[href*="/tab/"]',  # Direct links to tabs
+]
+TAB_LINK_SELECTOR = 'a[href*="/tab/"]'
+ARTIST_SELECTOR = '[class*="artist" i]'
+# Containers, tab links and artists, classified together in one pass
+RESULT_GROUP = SelectorGroup(RESULT_SELECTORS + [TAB_LINK_SELECTOR, ARTIST_SELECTOR])
+RESULT_LINK_INDEX = RESULT_GROUP.index(TAB_LINK_SELECTOR)
+RESULT_ARTIST_INDEX = RESULT_GROUP.index(ARTIST_SELECTOR)
+ELEMENT_GROUP = SelectorGroup([TAB_LINK_SELECTOR, ARTIST_SELECTOR])
+# An empty first artist node falls back to the first td, div, then span artist node
+ARTIST_FALLBACK_TAGS = ('td', 'div', 'span')
+
+# Tab pages: inline store on older templates, chord/tab markup in wiki_tab content, and the page title
+UGAPP_STORE_RE = re.compile(rb'window\.UGAPP\.store(?:\.page)?\s*=\s*')
+TAB_MARKUP_RE = re.compile(r'\[/?(?:ch|tab)\]')
+TITLE_RE = re.compile(rb'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+DEFAULT_TAB_PAGE_MEMO_SIZE = 256
 
 class UltimateGuitarScraper:
-    def __init__(self):
-        self.base_url = "https://www.ultimate-guitar.com"
-        self.search_url = "https://www.ultimate-guitar.com/search.php"
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                 use_cache=None, cache_dir=None, cache_only=None, parser_backend=None, streaming=True,
+                 use_corpus=None, corpus_path=None, base_url=None, max_retries=None, canonicalize_queries=None,
+                 tab_page_memo_size=None, tab_store=None):
+        # UG_BASE_URL points the scraper at a stand-in server (offline benchmarks)
+        self.base_url = (base_url or os.getenv('UG_BASE_URL') or "https://www.ultimate-guitar.com").rstrip('/')
+        self.search_url = f"{self.base_url}/search.php"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # Keep-alive pool, retry/backoff on 429/5xx and adaptive per-host concurrency
+        if max_retries is None:
+            max_retries = int(os.getenv('UG_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+        self.transport = Transport(headers=self.headers, initial_concurrency=max_concurrency,
+                                   max_retries=max_retries)
+        self.session = self.transport.session
+        # Stream bodies and stop reading once the payload we need has arrived
+        self.streaming = streaming
+        # Fastest installed HTML engine (selectolax > lxml > html.parser) unless one is requested
+        self.parser = get_backend(parser_backend)
+        # Tab content fetches overlap, but each host stays under a token-bucket budget
+        self.fetch_engine = FetchEngine(max_concurrency=max_concurrency, requests_per_second=requests_per_second)
+        # Identical concurrent searches / tab fetches share one upstream request and parse
+        self.flights = SingleFlight()
+        # Variants, aliases and typos of a query we have already run reuse its upstream search
+        if canonicalize_queries is None:
+            canonicalize_queries = os.getenv('UG_NO_CANONICALIZE', '').lower() not in ['1', 'true', 'yes']
+        self.queries = QueryResolver() if canonicalize_queries else None
+
+        # Response cache; env vars let the long-running server be configured without code changes
+        if use_cache is None:
+            use_cache = os.getenv('UG_NO_CACHE', '').lower() not in ['1', 'true', 'yes']
+        if cache_only is None:
+            cache_only = os.getenv('UG_CACHE_ONLY', '').lower() in ['1', 'true', 'yes']
+        self.cache_only = cache_only
+        self.cache = ResponseCache(cache_dir) if use_cache or cache_only else None
+
+        # Local corpus of every tab we have seen, searchable offline
+        if use_corpus is None:
+            use_corpus = os.getenv('UG_NO_CORPUS', '').lower() not in ['1', 'true', 'yes']
+        self.corpus = TabCorpus(corpus_path) if use_corpus else None
+        # Compressed tab store written by --export-store, read before the network for tab content
+        tab_store = tab_store or os.getenv('UG_TAB_STORE')
+        self.tab_store = TabStore(tab_store) if tab_store else None
+        self.refreshing = set()
+        self.refresh_lock = threading.Lock()
+        # Parsed tab pages by URL, reused while the page body is unchanged
+        if tab_page_memo_size is None:
+            tab_page_memo_size = int(os.getenv('UG_TAB_PAGE_MEMO', DEFAULT_TAB_PAGE_MEMO_SIZE))
+        self.tab_page_memo_size = tab_page_memo_size
+        self.tab_pages = OrderedDict()
+        self.tab_page_lock = threading.Lock()
+
+    def close(self):
+        """Close the HTTP session, the cache and corpus databases and the tab store"""
+        self.transport.close()
+        if self.cache:
+            self.cache.close()
+        if self.corpus:
+            self.corpus.close()
+        if self.tab_store:
+            self.tab_store.close()
+
+    def _fetch(self, url, endpoint, timeout, scanner=None):
+        """GET a URL through the response cache, revalidating stale entries
+
+        With a scanner and streaming enabled, the body is read incrementally and
+        the download stops as soon as scanner.feed() reports the payload complete.
+        Returns (body, partial); partial bodies are cached as such, and a call
+        without a scanner (the whole page) never gets one.
+        """
+        cached = self.cache.get(url) if self.cache else None
+        if cached and cached.partial and scanner is None and not self.cache_only:
+            # Neither served nor revalidated: a 304 would only confirm the truncated body
+            cached = None
+
+        if cached and (self.cache_only or self.cache.is_fresh(cached)):
+            return cached.body, cached.partial
+        if self.cache_only:
+            raise CacheMiss(f"Not in cache: {url}")
+
+        headers = {}
+        if cached:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
+        stream = bool(scanner and self.streaming)
+        response = self.transport.get(url, headers=headers, timeout=timeout, stream=stream)
+        if cached and response.status_code == 304:
+            response.close()
+            self.cache.refresh(url, endpoint)
+            return cached.body, cached.partial
+
+        if not response.ok:
+            response.close()
+        response.raise_for_status()
+        print(f"Response status: {response.status_code}", file=sys.stderr)
+
+        stopped_early = False
+        if stream:
+            body, stopped_early = read_until(response, scanner)
+            if stopped_early:
+                print(f"Payload complete after {len(body)} bytes; stopped reading", file=sys.stderr)
+        else:
+            body = response.content
+        self.transport.record_body(len(body))
+
+        # A truncated body holds what this scanner waited for, not necessarily the rest of the page
+        if self.cache:
+            self.cache.put(url, endpoint, body,
+                           etag=response.headers.get('ETag'),
+                           last_modified=response.headers.get('Last-Modified'),
+                           partial=stopped_early)
+        return body, stopped_early
 
     def search_tabs(self, query, tab_type="tab", limit=10):
         """Search for guitar tabs on Ultimate Guitar"""
+        upstream, how = self._canonical_query(query)
+        tabs = self._search_shared(upstream, tab_type, limit)
+        if how != 'artist':
+            return tabs
+        # The shared title search also holds covers; the named artist's versions go first
+        ranked = self.queries.rank(query, tabs)
+        if ranked is not None:
+            return ranked
+        print(f"No '{upstream}' result matches '{query}'; searching it as typed", file=sys.stderr)
+        return self._search_shared(' '.join(query.lower().split()), tab_type, limit)
+
+    def _search_shared(self, query, tab_type, limit):
+        # Case and spacing don't change UG's results, so they don't split the flight
+        key = ('search', ' '.join(query.lower().split()), tab_type, limit)
+        return self.flights.do(key, lambda: self._search_tabs(query, tab_type, limit))
+
+    def _canonical_query(self, query, rerank=True):
+        """(upstream query that answers this one, how it was resolved)
+
+        An 'artist' resolution answers with a broader title search whose
+        results the caller must rerank; without rerank the query goes
+        upstream as typed instead. Without canonicalization, (query, 'new').
+        """
+        if not self.queries:
+            return query, 'new'
+        upstream, how = self.queries.resolve(query)
+        if how == 'artist' and not rerank:
+            return ' '.join(query.lower().split()), 'new'
+        if upstream != query:
+            print(f"Query '{query}' resolved to '{upstream}' ({how})", file=sys.stderr)
+        return upstream, how
+
+    def _search_tabs(self, query, tab_type, limit):
+        """Collect up to limit results, reading as many result pages as that takes"""
+        tabs = []
+        for page_tabs in self._iter_search_pages(query, tab_type, limit):
+            tabs.extend(page_tabs)
+        return tabs
+
+    def iter_search(self, query, tab_type="tab", limit=10):
+        """Yield up to limit tab dicts as result pages arrive; later pages are fetched concurrently"""
+        # Pages are yielded as they arrive, so there is no whole result list to rerank
+        upstream, _ = self._canonical_query(query, rerank=False)
+        for page_tabs in self._iter_search_pages(upstream, tab_type, limit):
+            yield from page_tabs
+
+    async def aiter_search(self, query, tab_type="tab", limit=10):
+        """Async variant of iter_search; the blocking page fetches run on worker threads"""
+        upstream, _ = self._canonical_query(query, rerank=False)
+        pages = self._iter_search_pages(upstream, tab_type, limit)
         try:
-            # Try the new API-style search first
-            api_url = f"https://www.ultimate-guitar.com/search.php?search_type=title&value={quote(query)}"
-            
-            print(f"Searching for: {query}", file=sys.stderr)
-            
-            response = self.session.get(api_url, timeout=15)
-            response.raise_for_status()
-            
-            print(f"Response status: {response.status_code}", file=sys.stderr)
-            
-            # Parse the search results page
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for the data-content attribute in the js-store div
-            store_div = soup.find('div', class_='js-store')
-            if not store_div:
-                print("No js-store div found", file=sys.stderr)
-                return []
-            
-            data_content = store_div.get('data-content')
-            if not data_content:
-                print("No data-content attribute found", file=sys.stderr)
-                return []
-            
-            # The data is HTML-encoded JSON, so we need to decode it
-            import html
-            decoded_data = html.unescape(data_content)
+            while True:
+                page_tabs = await asyncio.to_thread(next, pages, None)
+                if page_tabs is None:
+                    break
+                for tab in page_tabs:
+                    yield tab
+        finally:
+            try:
+                pages.close()
+            except ValueError:
+                # Cancelled mid-fetch: the worker thread still owns the generator; GC closes it later
+                pass
+
+    def _iter_search_pages(self, query, tab_type, limit):
+        """Yield each result page's tabs in page order until limit tabs have been produced"""
+        print(f"Searching for: {query}", file=sys.stderr)
+        first = self._fetch_search_page(self._search_page_url(query, 1))
+        if not first:
+            return
+        tabs, total_pages, page_size = first
+        if self.queries:
+            self.queries.learn(query, tabs)
+        produced = len(tabs[:limit])
+        yield tabs[:limit]
+        if produced >= limit or total_pages <= 1:
+            return
+        
+        # Only as many pages in flight as the remaining limit needs; more follow if pages come up short
+        needed = -(-(limit - produced) // max(page_size, 1))
+        urls = (self._search_page_url(query, page) for page in range(2, total_pages + 1))
+        pages = self.fetch_engine.stream(self._fetch_search_page, urls, window=needed)
+        try:
+            for result in pages:
+                if not result:
+                    continue
+                tabs = result[0][:limit - produced]
+                produced += len(tabs)
+                yield tabs
+                if produced >= limit:
+                    return
+        finally:
+            pages.close()
+
+    def _search_page_url(self, query, page):
+        url = f"{self.search_url}?search_type=title&value={quote(query)}"
+        # Page 1 keeps the historical URL so existing cache entries still hit
+        return url if page == 1 else f"{url}&page={page}"
+
+    def _fetch_search_page(self, api_url):
+        """Fetch one search results page; returns (tabs, total_pages, raw_result_count) or None"""
+        try:
+            # Search results come from the js-store alone, so a partial body is complete for us
+            body, _ = self._fetch(api_url, 'search', timeout=15, scanner=JsStoreScanner())
             
             try:
-                page_data = json.loads(decoded_data)
+                page_data = self._load_js_store(body)
+                if page_data is None:
+                    print("No js-store data-content found", file=sys.stderr)
+                    return None
                 print("Successfully parsed JSON data", file=sys.stderr)
                 
                 # Navigate to the search results
@@ -65,7 +296,7 @@ class UltimateGuitarScraper:
                         print(f"Found {len(results)} search results", file=sys.stderr)
                         
                         tabs = []
-                        for result in results[:limit]:
+                        for result in results:
                             # Extract tab info from result
                             tab_info = {
                                 'title': result.get('song_name', ''),
@@ -82,7 +313,10 @@ class UltimateGuitarScraper:
                             if tab_info['title'] and tab_info['artist']:
                                 tabs.append(tab_info)
                         
-                        return tabs
+                        if self.corpus:
+                            self.corpus.store_tabs(tabs)
+                        pagination = page_info['data'].get('pagination') or {}
+                        return tabs, int(pagination.get('total') or 1), len(results)
                         
                 else:
                     print("Could not find search results in page data structure", file=sys.stderr)
@@ -90,13 +324,72 @@ class UltimateGuitarScraper:
             except json.JSONDecodeError as e:
                 print(f"Failed to parse JSON: {e}", file=sys.stderr)
                 
-            return []
+            return None
             
+        except CacheMiss as e:
+            print(str(e), file=sys.stderr)
+            return None
         except Exception as e:
             print(f"Error searching tabs: {e}", file=sys.stderr)
             import traceback
             traceback.print_exc()
-            return []
+            return None
+
+    def _load_js_store(self, body):
+        """Decode the page's js-store JSON; None if the page has none
+
+        Search and tab pages share this. Raises json.JSONDecodeError on a
+        malformed payload.
+        """
+        # The byte scan beats a bs4 DOM build by an order of magnitude, but lexbor builds
+        # its DOM about as fast as the scan and its entity decoding run
+        data_content = None if self.parser.fast_dom else self._extract_js_store_fast(body)
+        # Only markup the byte scan could not follow needs a DOM; pages without the marker have no store
+        if data_content is None and b'js-store' in body:
+            data_content = self._extract_js_store_dom(body)
+        if not data_content:
+            return None
+        # Both extractors hand back the attribute value already entity-decoded
+        return json.loads(data_content)
+
+    def _extract_js_store_fast(self, body):
+        """Pull the raw js-store data-content attribute straight from the response bytes"""
+        marker = body.find(b'js-store')
+        while marker != -1:
+            tag_start = body.rfind(b'<', 0, marker)
+            tag_end = body.find(b'>', marker)
+            if tag_start != -1 and tag_end != -1 and body[tag_start:tag_start + 4].lower() == b'<div':
+                # Attribute values cannot contain their own quote character, so the next quote ends it
+                attr = body.find(b'data-content=', tag_start, tag_end)
+                if attr != -1:
+                    quote_pos = attr + len(b'data-content=')
+                    quote_char = body[quote_pos:quote_pos + 1]
+                    if quote_char in (b'"', b"'"):
+                        value_end = body.find(quote_char, quote_pos + 1)
+                        if value_end != -1:
+                            # Match what a DOM parser hands back for an attribute value
+                            return self._decode_attribute(body[quote_pos + 1:value_end])
+            marker = body.find(b'js-store', marker + 1)
+        return None
+
+    def _decode_attribute(self, raw):
+        """Entity-decode an attribute value; plain byte replaces cover the common case"""
+        if UNCOMMON_ENTITY.search(raw):
+            return html.unescape(raw.decode('utf-8', errors='replace'))
+        return (raw.replace(b'&quot;', b'"').replace(b'&lt;', b'<').replace(b'&gt;', b'>')
+                .replace(b'&#039;', b"'").replace(b'&#39;', b"'").replace(b'&amp;', b'&')
+                .decode('utf-8', errors='replace'))
+
+    def _extract_js_store_dom(self, body):
+        """Fallback: full DOM parse to locate the js-store div"""
+        doc = self.parser.parse(body)
+        try:
+            store_div = doc.select_one('div.js-store')
+            if not store_div:
+                return None
+            return store_div.attr('data-content')
+        finally:
+            doc.decompose()
 
     def _extract_tabs_from_json(self, results_data, limit):
         """Extract tab info from JSON results"""
@@ -126,30 +419,29 @@ class UltimateGuitarScraper:
         
         return tabs
 
-    def _parse_html_results(self, soup, limit):
+    def _parse_html_results(self, doc, limit):
         """Fallback HTML parsing if JSON extraction fails"""
         tabs = []
         
         print("Parsing HTML for results...", file=sys.stderr)
         
-        # Look for various possible result containers
-        selectors_to_try = [
-            'tr[data-id]',  # Table rows with data-id
-            '.search-result',  # Result divs
-            '.js-result',  # JS result elements
-            'tr[class*="search"]',  # Any tr with search in class
-            'div[class*="search"]',  # Any div with search in class
-            'a[href*="/tab/"]',  # Direct links to tabs
-        ]
+        if self.parser.native_selectors:
+            # A C selector engine runs each selector faster than a Python pass classifies the
+            # tree, and the cascade stops at the first selector that yields results
+            candidates = (doc.select(selector) for selector in RESULT_SELECTORS)
+            extract = self._extract_tab_from_element
+        else:
+            # One pass classifies every node against all selectors; tried in order as before
+            candidates = self._collect_result_candidates(doc)
+            extract = lambda candidate: self._build_tab_info(candidate[1], self._artist_text(candidate[2]))
         
-        for selector in selectors_to_try:
-            elements = soup.select(selector)
+        for selector, elements in zip(RESULT_SELECTORS, candidates):
             print(f"Found {len(elements)} elements with selector '{selector}'", file=sys.stderr)
             
             if elements:
                 for element in elements[:limit*2]:  # Get extra in case some fail
                     try:
-                        tab_info = self._extract_tab_from_element(element)
+                        tab_info = extract(element)
                         if tab_info and tab_info.get('title') and tab_info.get('artist'):
                             tabs.append(tab_info)
                             if len(tabs) >= limit:
@@ -164,35 +456,116 @@ class UltimateGuitarScraper:
         print(f"Extracted {len(tabs)} tabs from HTML", file=sys.stderr)
         return tabs
 
+    def _collect_result_candidates(self, doc):
+        """Per selector, [element, first tab link, artist nodes] in document order
+
+        One scan finds every container, link and artist node in document
+        order, classified by the precompiled RESULT_GROUP; links and artists
+        are credited to the candidates enclosing them.
+        """
+        per_selector = [[] for _ in RESULT_SELECTORS]
+        candidates = {}
+        # node key -> candidates among that node and its ancestors
+        enclosing = {}
+        
+        for node, matched in doc.scan(RESULT_GROUP):
+            is_link = RESULT_LINK_INDEX in matched
+            is_artist = RESULT_ARTIST_INDEX in matched
+            if is_link or is_artist:
+                # Descendants only, so start from the parent
+                self._credit_link_and_artist(node, is_link, is_artist,
+                                             self._enclosing_candidates(node.parent, candidates, enclosing))
+            
+            candidate = None
+            for index in matched:
+                if index < len(RESULT_SELECTORS):
+                    if candidate is None:
+                        candidate = [node, None, {}]
+                        candidates[node.key] = candidate
+                    per_selector[index].append(candidate)
+        
+        for elements in per_selector:
+            for candidate in elements:
+                node = candidate[0]
+                # Maybe the element itself is the link
+                if candidate[1] is None and node.tag == 'a' and '/tab/' in (node.attr('href') or ''):
+                    candidate[1] = node
+        return per_selector
+
+    def _enclosing_candidates(self, node, candidates, enclosing):
+        """Candidates at or above node, nearest first; memoized per ancestor"""
+        path = []
+        found = ()
+        while node is not None:
+            key = node.key
+            if key in enclosing:
+                found = enclosing[key]
+                break
+            path.append(key)
+            node = node.parent
+        for key in reversed(path):
+            if key in candidates:
+                found = (candidates[key],) + found
+            enclosing[key] = found
+        return found
+
+    def _credit_link_and_artist(self, node, is_link, is_artist, candidates):
+        """Record node as the tab link for candidates that lack one, and as an artist node"""
+        for candidate in candidates:
+            if is_link and candidate[1] is None:
+                candidate[1] = node
+            if is_artist:
+                self._note_artist(candidate[2], node)
+
+    def _note_artist(self, artists, node):
+        """Keep the first artist node, and the first td, div and span one, for _artist_text"""
+        artists.setdefault(None, node)
+        if node.tag in ARTIST_FALLBACK_TAGS:
+            artists.setdefault(node.tag, node)
+
+    def _artist_text(self, artists):
+        """Text of the first artist node, else of the first td, div or span artist node that has any"""
+        for key in (None,) + ARTIST_FALLBACK_TAGS:
+            node = artists.get(key)
+            text = node.text().strip() if node is not None else ''
+            if text:
+                return text
+        return None
+
     def _extract_tab_from_element(self, element):
         """Extract tab info from a single HTML element"""
-        tab_info = {}
+        title_link = None
+        artists = {}
+        if self.parser.native_selectors:
+            title_link = element.select_one(TAB_LINK_SELECTOR)
+            for node in element.select(ARTIST_SELECTOR):
+                self._note_artist(artists, node)
+        else:
+            # One scan covers both lookups; the first tab link in document order wins
+            for node, matched in element.scan(ELEMENT_GROUP):
+                if title_link is None and 0 in matched:
+                    title_link = node
+                if 1 in matched:
+                    self._note_artist(artists, node)
+                if title_link is not None and len(artists) == 1 + len(ARTIST_FALLBACK_TAGS):
+                    break
         
-        # Find title/song link
-        title_link = element.find('a', href=re.compile(r'/tab/'))
         if not title_link:
             # Maybe the element itself is the link
-            if element.name == 'a' and '/tab/' in element.get('href', ''):
+            if element.tag == 'a' and '/tab/' in (element.attr('href') or ''):
                 title_link = element
+        return self._build_tab_info(title_link, self._artist_text(artists))
+
+    def _build_tab_info(self, title_link, artist):
+        """Tab dict from a result's title link and artist text (either may be None)"""
+        tab_info = {}
         
         if title_link:
-            tab_info['title'] = title_link.get_text().strip()
-            tab_info['url'] = urljoin(self.base_url, title_link.get('href'))
+            tab_info['title'] = title_link.text().strip()
+            tab_info['url'] = urljoin(self.base_url, title_link.attr('href'))
             tab_info['id'] = tab_info['url'].split('/')[-1] if tab_info['url'] else ''
         
-        # Try to find artist - could be in various places
-        artist_candidates = [
-            element.find(attrs={'class': re.compile(r'artist', re.I)}),
-            element.find('td', {'class': lambda x: x and 'artist' in x.lower()}),
-            element.find('div', {'class': lambda x: x and 'artist' in x.lower()}),
-            element.find('span', {'class': lambda x: x and 'artist' in x.lower()}),
-        ]
-        
-        artist = "Unknown"
-        for candidate in artist_candidates:
-            if candidate and candidate.get_text().strip():
-                artist = candidate.get_text().strip()
-                break
+        artist = artist or "Unknown"
         
         # If no specific artist element, try to extract from title or nearby text
         if artist == "Unknown" and tab_info.get('title'):
@@ -212,43 +585,38 @@ class UltimateGuitarScraper:
 
     def get_tab_content(self, tab_url):
         """Get the actual tab content from a tab URL"""
+        return self.flights.do(('tab', normalize_url(tab_url)), lambda: self._get_tab_content(tab_url))
+
+    def _get_tab_content(self, tab_url):
+        """Fetch and parse one tab page; runs once per in-flight URL"""
         try:
-            response = self.session.get(tab_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for tab content in various possible containers
-            tab_content = None
-            
-            # Try to find pre-formatted tab content
-            pre_elements = soup.find_all('pre')
-            for pre in pre_elements:
-                content = pre.get_text()
-                if self._looks_like_tab_content(content):
-                    tab_content = content
-                    break
-            
-            if not tab_content:
-                # Look for JavaScript data containing tab content
-                scripts = soup.find_all('script')
-                for script in scripts:
-                    if script.string and 'tab_view' in script.string:
-                        # Try to extract tab content from JS
-                        match = re.search(r'"content":"([^"]*)"', script.string)
-                        if match:
-                            # Decode the content (it might be escaped)
-                            content = match.group(1).encode().decode('unicode_escape')
-                            if self._looks_like_tab_content(content):
-                                tab_content = content
-                                break
-            
-            return {
-                'success': True,
-                'content': tab_content,
-                'url': tab_url,
-                'title': soup.find('title').get_text() if soup.find('title') else 'Unknown'
-            }
+            stored = self.tab_store.get(tab_url) if self.tab_store else None
+            if stored is not None:
+                stored['content_hash'], stored['simhash'] = fingerprint(stored['content'])
+                return stored
+
+            # Only the page data ends a tab download early: it holds the text and the metadata, while a
+            # <pre> block can come before page data that is still on its way
+            body, partial = self._fetch(tab_url, 'tab', timeout=10, scanner=JsStoreScanner())
+
+            # A cached or revalidated body we have already parsed is not parsed again
+            key = normalize_url(tab_url)
+            result = self._memoized_tab_page(key, body)
+            if result is not None:
+                return result
+
+            result = self._extract_tab_page(body, tab_url)
+            # Page data that holds no tab sends extraction to a <pre> fallback the download may have cut off
+            if partial and not result.get('content'):
+                body, _ = self._fetch(tab_url, 'tab', timeout=10)
+                result = self._extract_tab_page(body, tab_url)
+            if result.get('content'):
+                result['content_hash'], result['simhash'] = fingerprint(result['content'])
+            self._memoize_tab_page(key, body, result)
+
+            if self.corpus:
+                self.corpus.store_content(tab_url, result)
+            return result
             
         except Exception as e:
             return {
@@ -257,50 +625,359 @@ class UltimateGuitarScraper:
                 'url': tab_url
             }
 
-    def _looks_like_tab_content(self, content):
-        """Check if content looks like guitar tablature"""
-        if not content or len(content.strip()) < 20:
-            return False
-            
-        # Look for common tab patterns
-        tab_indicators = [
-            'e|---', 'B|---', 'G|---', 'D|---', 'A|---', 'E|---',  # Standard tuning
-            '|---', '|--', '|-',  # General tab lines
-            '[Verse]', '[Chorus]', '[Bridge]',  # Song sections
-            'Capo', 'Tuning:', 'BPM'  # Tab metadata
-        ]
-        
-        content_lower = content.lower()
-        for indicator in tab_indicators:
-            if indicator.lower() in content_lower:
-                return True
-                
-        return False
+    def _memoized_tab_page(self, key, body):
+        with self.tab_page_lock:
+            entry = self.tab_pages.get(key)
+            if entry is None or entry[0] != len(body) or entry[1] != hash(body):
+                return None
+            self.tab_pages.move_to_end(key)
+            result = entry[2]
+        # Callers may annotate their result; the memo keeps its own copy
+        return {**result, 'metadata': dict(result['metadata'])}
+
+    def _memoize_tab_page(self, key, body, result):
+        if not self.tab_page_memo_size:
+            return
+        with self.tab_page_lock:
+            self.tab_pages[key] = (len(body), hash(body), {**result, 'metadata': dict(result['metadata'])})
+            self.tab_pages.move_to_end(key)
+            while len(self.tab_pages) > self.tab_page_memo_size:
+                self.tab_pages.popitem(last=False)
+
+    def _extract_tab_page(self, body, tab_url):
+        """Pull tab content, title and metadata out of a tab page
+
+        The page data (the js-store attribute, or an inline window.UGAPP.store
+        script on older pages) is decoded once and supplies the tab text and its
+        metadata together; pages that only render the tab in <pre> get a DOM pass.
+        """
+        title = self._page_title(body)
+        try:
+            page_data = self._load_tab_page_data(body)
+        except json.JSONDecodeError as e:
+            print(f"Failed to parse tab page data: {e}", file=sys.stderr)
+            page_data = None
+
+        if page_data:
+            tab_view = page_data.get('tab_view') or {}
+            content = (tab_view.get('wiki_tab') or {}).get('content')
+            if content:
+                content = TAB_MARKUP_RE.sub('', content.replace('\r\n', '\n'))
+                score = classify(content)
+                if score.confidence >= TAB_CONFIDENCE_THRESHOLD:
+                    return {
+                        'success': True,
+                        'content': content,
+                        'confidence': score.confidence,
+                        'url': tab_url,
+                        'title': title,
+                        'metadata': self._tab_metadata(page_data),
+                    }
+
+        tab_content = None
+        confidence = 0.0
+        doc = self.parser.parse(body)
+        try:
+            for pre in doc.find_all('pre'):
+                content = pre.text()
+                score = classify(content)
+                if score.confidence >= TAB_CONFIDENCE_THRESHOLD:
+                    tab_content, confidence = content, score.confidence
+                    break
+        finally:
+            # Free the DOM right away; batch runs otherwise hold one tree per worker
+            doc.decompose()
+
+        return {
+            'success': True,
+            'content': tab_content,
+            'confidence': confidence,
+            'url': tab_url,
+            'title': title,
+            'metadata': self._tab_metadata(page_data) if page_data else {},
+        }
+
+    def _load_tab_page_data(self, body):
+        """The tab page's store.page.data, from whichever form of page data it carries"""
+        store = self._load_js_store(body)
+        if store is not None:
+            return (store.get('store') or {}).get('page', {}).get('data')
+        match = UGAPP_STORE_RE.search(body)
+        if match:
+            # raw_decode stops at the end of the object literal; the rest of the script is ignored
+            store, _ = json.JSONDecoder().raw_decode(body[match.end():].decode('utf-8', errors='replace'))
+            # The store itself ({page: {data}}), one wrapped in "store", or just its page ({data})
+            page = store.get('page') or (store.get('store') or {}).get('page') or store
+            return page.get('data')
+        return None
+
+    def _page_title(self, body):
+        match = TITLE_RE.search(body)
+        if not match:
+            return 'Unknown'
+        return html.unescape(match.group(1).decode('utf-8', errors='replace')).strip() or 'Unknown'
 
-    def search_and_get_tabs(self, query, limit=5, include_content=False):
-        """Complete workflow: search and optionally get tab content"""
-        search_results = self.search_tabs(query, limit=limit)
+    def _tab_metadata(self, page_data):
+        """Tuning, capo, key, author, version and rating from the tab page data"""
+        tab = page_data.get('tab') or {}
+        meta = (page_data.get('tab_view') or {}).get('meta') or {}
+        tuning = meta.get('tuning')
+        if isinstance(tuning, dict):
+            tuning = tuning.get('value') or tuning.get('name')
+        return {
+            'song': tab.get('song_name'),
+            'artist': tab.get('artist_name'),
+            'type': tab.get('type'),
+            'tuning': tuning,
+            'capo': meta.get('capo'),
+            'key': meta.get('tonality') or tab.get('tonality_name'),
+            'author': tab.get('username'),
+            'version': tab.get('version'),
+            'rating': tab.get('rating'),
+            'votes': tab.get('votes'),
+            'difficulty': meta.get('difficulty') or tab.get('difficulty'),
+        }
+
+    def search_tabs_local(self, query, limit=10, filters=None, refresh=False, collapse_duplicates=False):
+        """Answer a search from the local corpus, falling back to the network on a miss
+
+        filters: optional dict with type, artist, difficulty, min_rating, has_content.
+            Network results carry no text, so has_content keeps only those the corpus holds text for.
+        refresh: on a hit, also re-run the network search in the background.
+        collapse_duplicates: fold near-duplicate corpus versions into the better-ranked one.
+        """
+        if self.corpus:
+            tabs = self.corpus.search(query, limit=limit, filters=filters, collapse=collapse_duplicates)
+            if tabs:
+                print(f"Found {len(tabs)} tabs in local corpus", file=sys.stderr)
+                if refresh:
+                    self._refresh_in_background(query, limit)
+                return tabs
+
+        tabs = [tab for tab in self.search_tabs(query, limit=limit) if matches_filters(tab, filters)]
+        if filters and filters.get('has_content'):
+            tabs = [tab for tab in tabs if self.corpus and self.corpus.get_content(tab['url'])]
+        return tabs
+
+    def _refresh_in_background(self, query, limit):
+        key = (query.strip().lower(), limit)
+        with self.refresh_lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def refresh():
+            try:
+                self.search_tabs(query, limit=limit)
+            finally:
+                with self.refresh_lock:
+                    self.refreshing.discard(key)
+
+        threading.Thread(target=refresh, name='ug-refresh', daemon=True).start()
+
+    def search_and_get_tabs(self, query, limit=5, include_content=False, local=False, collapse_duplicates=False):
+        """Complete workflow: search and optionally get tab content
+
+        With content and collapse_duplicates, versions whose text is a (near-)duplicate
+        of a better-ranked result are folded into it and listed under its
+        'near_duplicates'. Off by default so every caller gets one entry per result.
+        """
+        if local:
+            search_results = self.search_tabs_local(query, limit=limit, collapse_duplicates=collapse_duplicates)
+        else:
+            search_results = self.search_tabs(query, limit=limit)
         
         if include_content:
+            tabs_with_urls = []
             for tab in search_results:
-                if tab.get('url'):
-                    content_result = self.get_tab_content(tab['url'])
-                    tab['tab_content'] = content_result
-                    time.sleep(1)  # Be respectful to the server
+                if not tab.get('url'):
+                    continue
+                stored = self.corpus.get_content(tab['url']) if local and self.corpus else None
+                if stored:
+                    tab['tab_content'] = stored
+                else:
+                    tabs_with_urls.append(tab)
+            content_results = self.fetch_engine.map(self.get_tab_content, [tab['url'] for tab in tabs_with_urls])
+            for tab, content_result in zip(tabs_with_urls, content_results):
+                tab['tab_content'] = content_result
+            if collapse_duplicates:
+                search_results = collapse_near_duplicates(
+                    search_results, simhash_of=lambda tab: (tab.get('tab_content') or {}).get('simhash')
+                )
         
         return search_results
 
+def parse_batch_line(line, limit, include_content, local, collapse_duplicates=False):
+    """A batch line is a plain query, a tab URL, or a JSON object with query/url keys"""
+    if line.startswith('{'):
+        request = json.loads(line)
+    elif line.startswith(('http://', 'https://')):
+        request = {'url': line}
+    else:
+        request = {'query': line}
+
+    if 'url' not in request:
+        if not request.get('query'):
+            raise ValueError("batch request needs a 'query' or 'url'")
+        request.setdefault('limit', limit)
+        request.setdefault('include_content', include_content)
+        request.setdefault('local', local)
+        request.setdefault('collapse_duplicates', collapse_duplicates)
+    return request
+
+
+def run_batch(scraper, lines, workers, limit=5, include_content=False, local=False, collapse_duplicates=False,
+              out=None):
+    """Process many queries/tab URLs concurrently, writing one NDJSON record per result as it completes"""
+    out = out or sys.stdout
+    write_lock = threading.Lock()
+
+    def emit(record):
+        with write_lock:
+            out.write(json.dumps(record, separators=(',', ':')) + '\n')
+            out.flush()
+
+    def handle(index, line):
+        try:
+            request = parse_batch_line(line, limit, include_content, local, collapse_duplicates)
+            if 'url' in request:
+                result = scraper.get_tab_content(request['url'])
+                if not result.get('success'):
+                    raise RuntimeError(result.get('error', 'tab fetch failed'))
+            else:
+                result = scraper.search_and_get_tabs(
+                    request['query'], limit=int(request['limit']),
+                    include_content=bool(request['include_content']), local=bool(request['local']),
+                    collapse_duplicates=bool(request['collapse_duplicates'])
+                )
+            emit({'index': index, 'input': line, 'result': result})
+            return True
+        except Exception as e:
+            emit({'index': index, 'input': line, 'error': {'type': type(e).__name__, 'message': str(e)}})
+            return False
+
+    ok = failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='ug-batch') as executor:
+        futures = []
+        for index, line in enumerate(lines):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                futures.append(executor.submit(handle, index, line))
+        for future in as_completed(futures):
+            if future.result():
+                ok += 1
+            else:
+                failed += 1
+
+    print(f"Batch complete: {ok} ok, {failed} failed", file=sys.stderr)
+    print(f"Transport: {json.dumps(scraper.transport.stats())}", file=sys.stderr)
+    return failed
+
+
+def run_crawl(args):
+    """--crawl: the crawler owns corpus writes so they can be batched"""
+    scraper = UltimateGuitarScraper(
+        max_concurrency=args.workers,
+        use_cache=False if args.no_cache else None,
+        cache_dir=args.cache_dir,
+        cache_only=True if args.cache_only else None,
+        use_corpus=False
+    )
+    corpus = TabCorpus()
+    checkpoint = CrawlCheckpoint(args.crawl_state)
+    crawler = Crawler(scraper, corpus, checkpoint, batch_size=args.batch_size,
+                      include_content=not args.metadata_only)
+    source = sys.stdin if args.crawl == '-' else open(args.crawl, encoding='utf-8')
+    with source:
+        seeds = [line.strip() for line in source if line.strip() and not line.startswith('#')]
+    try:
+        stats = crawler.run(seeds)
+    except KeyboardInterrupt:
+        print("Crawl interrupted; run the same command again to resume", file=sys.stderr)
+        stats = checkpoint.stats()
+    finally:
+        corpus.close()
+        checkpoint.close()
+    print(json.dumps(stats, indent=2))
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 ultimate_guitar_scraper.py <search_query> [limit] [include_content]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        usage="python3 ultimate_guitar_scraper.py <search_query> [limit] [include_content] [options]\n"
+              "       python3 ultimate_guitar_scraper.py --batch <file|-> [--limit N] [--include-content] [options]\n"
+              "       python3 ultimate_guitar_scraper.py --crawl <seeds-file|-> [--crawl-state PATH] [options]"
+    )
+    parser.add_argument('query', nargs='?')
+    parser.add_argument('limit', nargs='?', type=int, default=5)
+    parser.add_argument('include_content', nargs='?', default='false')
+    parser.add_argument('--cache-dir', help="Response cache directory (default: $UG_CACHE_DIR or ~/.cache/ultimate-guitar-scraper)")
+    parser.add_argument('--no-cache', action='store_true', help="Always hit the network")
+    parser.add_argument('--cache-only', action='store_true', help="Serve from the response cache only, never the network")
+    parser.add_argument('--local', action='store_true', help="Answer from the local tab corpus; fetch only on a miss")
+    parser.add_argument('--no-corpus', action='store_true', help="Do not record fetched tabs in the local corpus")
+    parser.add_argument('--batch', metavar='FILE', help="Read queries or tab URLs one per line ('-' for stdin) and stream NDJSON results")
+    parser.add_argument('--crawl', metavar='FILE',
+                        help="Crawl every result page and tab for the artists/search seeds listed one per line ('-' for stdin); resumable")
+    parser.add_argument('--crawl-state', help="Crawl checkpoint database (default: $UG_CRAWL_STATE or crawl.sqlite3 in the cache dir)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Pages or tabs per crawl transaction (default {DEFAULT_BATCH_SIZE})")
+    parser.add_argument('--metadata-only', action='store_true', help="Crawl result pages only, not tab content")
+    parser.add_argument('--export-store', metavar='DIR',
+                        help="Write all tab content in the local corpus to a compressed tab store and exit")
+    parser.add_argument('--tab-store', metavar='DIR',
+                        help="Serve tab content from a store written by --export-store before the network (default: $UG_TAB_STORE)")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent batch requests / crawl fetches (default 4)")
+    parser.add_argument('--limit', dest='limit_option', type=int, help="Results per query (same as the positional limit)")
+    parser.add_argument('--include-content', dest='include_content_option', action='store_true',
+                        help="Fetch tab content for each result")
+    parser.add_argument('--collapse-duplicates', action='store_true',
+                        help="With content, fold versions whose text duplicates a better-ranked one into it")
+    args = parser.parse_args()
+    
+    if args.batch and args.query:
+        parser.error("--batch reads queries from the file; use --limit/--include-content for defaults")
+    if args.crawl and (args.query or args.batch):
+        parser.error("--crawl reads seeds from the file and cannot be combined with a query or --batch")
+    if args.crawl and args.no_corpus:
+        parser.error("--crawl writes to the local corpus; drop --no-corpus")
+    if args.export_store:
+        corpus = TabCorpus()
+        try:
+            count = build_store(args.export_store, corpus.iter_contents())
+        finally:
+            corpus.close()
+        print(f"Wrote {count} tabs to {args.export_store}", file=sys.stderr)
+        return
+    if not args.batch and not args.crawl and not args.query:
+        parser.error("a search query, --batch, --crawl or --export-store is required")
+    if args.limit_option is not None:
+        args.limit = args.limit_option
+    if args.include_content_option:
+        args.include_content = 'true'
+    
+    include_content = args.include_content.lower() in ['true', '1', 'yes']
+    
+    if args.crawl:
+        run_crawl(args)
+        return
+    
+    scraper = UltimateGuitarScraper(
+        use_cache=False if args.no_cache else None,
+        cache_dir=args.cache_dir,
+        cache_only=True if args.cache_only else None,
+        use_corpus=False if args.no_corpus else None,
+        tab_store=args.tab_store
+    )
     
-    query = sys.argv[1]
-    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 5
-    include_content = len(sys.argv) > 3 and sys.argv[3].lower() in ['true', '1', 'yes']
+    if args.batch:
+        source = sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8')
+        with source:
+            run_batch(scraper, source, args.workers, limit=args.limit, include_content=include_content,
+                      local=args.local, collapse_duplicates=args.collapse_duplicates)
+        return
     
-    scraper = UltimateGuitarScraper()
-    results = scraper.search_and_get_tabs(query, limit=limit, include_content=include_content)
+    results = scraper.search_and_get_tabs(args.query, limit=args.limit, include_content=include_content,
+                                          local=args.local, collapse_duplicates=args.collapse_duplicates)
     
     print(json.dumps(results, indent=2))
 
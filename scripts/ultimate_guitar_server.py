@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Long-running server mode for the Ultimate Guitar scraper
+Speaks newline-delimited JSON-RPC over stdin/stdout so callers keep one warm
+interpreter, one requests.Session and one set of parser state across calls.
+
+Request:  {"id": 1, "method": "search_tabs", "params": {"query": "wonderwall"}}
+Response: {"id": 1, "result": [...]}  or  {"id": 1, "error": {"message": "..."}}
+
+params are passed through as keyword arguments. search_and_get_tabs lists
+every result unless the caller asks for "collapse_duplicates": true.
+"""
+
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+DEFAULT_WORKERS = 8
+
+
+class ScraperServer:
+    """Serve scraper calls concurrently from a single warm process"""
+
+    METHODS = ('search_tabs', 'get_tab_content', 'search_and_get_tabs')
+
+    def __init__(self, workers=DEFAULT_WORKERS, stdin=None, stdout=None):
+        self.workers = workers
+        self.stdin = stdin or sys.stdin
+        self.stdout = stdout or sys.stdout
+        self.scraper = UltimateGuitarScraper()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ug-worker')
+        self.write_lock = threading.Lock()
+        self.state_lock = threading.Lock()
+        self.started_at = time.time()
+        self.served = 0
+        self.failed = 0
+        self.in_flight = 0
+        # Calls in flight per scraper, and scrapers swapped out by restart() that close once theirs drain
+        self.scraper_calls = {}
+        self.retired = set()
+        self.restarts = 0
+        self.stopping = False
+
+    def serve_forever(self):
+        """Read requests until stdin closes or a shutdown is requested"""
+        print(f"Scraper server ready (pid {os.getpid()}, {self.workers} workers)", file=sys.stderr)
+        self._send({'event': 'ready', 'pid': os.getpid()})
+
+        for line in self.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            self._handle_line(line)
+            if self.stopping:
+                break
+
+        self.shutdown()
+
+    def shutdown(self):
+        """Stop accepting work and let in-flight calls finish"""
+        self.stopping = True
+        self.executor.shutdown(wait=True)
+        self.scraper.close()
+        print("Scraper server stopped", file=sys.stderr)
+
+    def restart(self):
+        """Swap in a fresh scraper (new session) without dropping in-flight calls"""
+        fresh = UltimateGuitarScraper()
+        with self.state_lock:
+            old_scraper, self.scraper = self.scraper, fresh
+            self.restarts += 1
+            # Calls already running keep the old scraper; the last of them closes it
+            idle = not self.scraper_calls.get(old_scraper)
+            if not idle:
+                self.retired.add(old_scraper)
+        if idle:
+            old_scraper.close()
+
+    def health(self):
+        """Report liveness and basic counters"""
+        with self.state_lock:
+            return {
+                'status': 'stopping' if self.stopping else 'ok',
+                'pid': os.getpid(),
+                'uptime': round(time.time() - self.started_at, 3),
+                'workers': self.workers,
+                'in_flight': self.in_flight,
+                'served': self.served,
+                'failed': self.failed,
+                'restarts': self.restarts,
+                'transport': self.scraper.transport.stats(),
+                'single_flight': self.scraper.flights.stats(),
+                'queries': self.scraper.queries.stats() if self.scraper.queries else None
+            }
+
+    def _handle_line(self, line):
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            self._send({'id': None, 'error': {'message': f"Invalid JSON: {e}"}})
+            return
+
+        request_id = request.get('id')
+        method = request.get('method')
+        params = request.get('params') or {}
+
+        # Control methods are answered inline so they never queue behind slow fetches
+        if method == 'health':
+            self._send({'id': request_id, 'result': self.health()})
+        elif method == 'restart':
+            self.restart()
+            self._send({'id': request_id, 'result': self.health()})
+        elif method == 'shutdown':
+            self.stopping = True
+            self._send({'id': request_id, 'result': {'status': 'stopping'}})
+        elif method in self.METHODS:
+            with self.state_lock:
+                scraper = self.scraper
+                self.in_flight += 1
+                self.scraper_calls[scraper] = self.scraper_calls.get(scraper, 0) + 1
+            self.executor.submit(self._run, scraper, request_id, method, params)
+        else:
+            self._send({'id': request_id, 'error': {'message': f"Unknown method: {method}"}})
+
+    def _run(self, scraper, request_id, method, params):
+        try:
+            if not isinstance(params, dict):
+                raise TypeError("params must be an object")
+            result = getattr(scraper, method)(**params)
+            self._send({'id': request_id, 'result': result})
+            succeeded = True
+        except Exception as e:
+            print(f"Error serving {method}: {e}", file=sys.stderr)
+            self._send({'id': request_id, 'error': {'message': str(e)}})
+            succeeded = False
+
+        with self.state_lock:
+            self.in_flight -= 1
+            if succeeded:
+                self.served += 1
+            else:
+                self.failed += 1
+            remaining = self.scraper_calls[scraper] - 1
+            if remaining:
+                self.scraper_calls[scraper] = remaining
+            else:
+                del self.scraper_calls[scraper]
+            drained = not remaining and scraper in self.retired
+            if drained:
+                self.retired.discard(scraper)
+        if drained:
+            scraper.close()
+
+    def _send(self, message):
+        payload = json.dumps(message, separators=(',', ':'))
+        with self.write_lock:
+            self.stdout.write(payload + '\n')
+            self.stdout.flush()
+
+
+def main():
+    workers = DEFAULT_WORKERS
+    if len(sys.argv) > 1:
+        workers = int(sys.argv[1])
+
+    server = ScraperServer(workers=workers)
+
+    # SIGTERM drains in-flight calls; SIGHUP recycles the HTTP session
+    def handle_term(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, handle_term)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, frame: server.restart())
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Streaming fetch helpers for the Ultimate Guitar scraper
+Incremental scanners watch the bytes as they arrive so a download can stop as
+soon as the payload the scraper needs is complete.
+"""
+
+DEFAULT_CHUNK_SIZE = 16 * 1024
+
+
+class JsStoreScanner:
+    """Complete once the js-store div's data-content attribute has been closed"""
+
+    MARKER = b'js-store'
+    ATTR = b'data-content='
+
+    def __init__(self):
+        self.scan_from = 0
+        self.value_start = None
+        self.quote = None
+
+    def feed(self, buffer):
+        if self.value_start is None and not self._find_value_start(buffer):
+            return False
+        end = buffer.find(self.quote, self.scan_from)
+        if end == -1:
+            self.scan_from = len(buffer)
+            return False
+        return True
+
+    def _find_value_start(self, buffer):
+        while True:
+            marker = buffer.find(self.MARKER, self.scan_from)
+            if marker == -1:
+                # Keep a tail so a marker split across chunks is still found
+                self.scan_from = max(0, len(buffer) - len(self.MARKER))
+                return False
+
+            tag_start = buffer.rfind(b'<', 0, marker)
+            if tag_start == -1 or buffer[tag_start:tag_start + 4].lower() != b'<div':
+                self.scan_from = marker + 1
+                continue
+
+            attr = buffer.find(self.ATTR, tag_start)
+            tag_end = buffer.find(b'>', marker)
+            if tag_end != -1 and (attr == -1 or attr > tag_end):
+                # This div closed without a data-content attribute
+                self.scan_from = marker + 1
+                continue
+
+            quote_pos = attr + len(self.ATTR)
+            if attr == -1 or quote_pos >= len(buffer):
+                # Attribute not fully arrived yet; rescan this tag next time
+                self.scan_from = tag_start
+                return False
+
+            quote = buffer[quote_pos:quote_pos + 1]
+            if quote not in (b'"', b"'"):
+                self.scan_from = marker + 1
+                continue
+
+            self.quote = quote
+            self.value_start = quote_pos + 1
+            self.scan_from = self.value_start
+            return True
+
+
+def read_until(response, scanner, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Read a streamed response until the scanner is satisfied or the body ends
+
+    Returns (body, stopped_early). Stopping early closes the response, which
+    drops that connection instead of draining the rest of the body.
+    """
+    buffer = bytearray()
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            buffer.extend(chunk)
+            if scanner.feed(buffer):
+                return bytes(buffer), True
+        return bytes(buffer), False
+    finally:
+        response.close()
@@ -0,0 +1,265 @@
+"""
+Structured, array-backed tablature model for scraped tabs
+Parses tab text once into NumPy fret arrays plus chord, section and metadata
+tokens, so transposing, retuning and difficulty analysis run as array
+operations instead of string scans. Requires numpy.
+
+Fret arrays are shaped (strings, columns), ordered as written (highest string
+first), with NO_NOTE where a string is silent. Only columns that hold at least
+one note are kept; `positions` records each column's character offset.
+"""
+
+import re
+
+import numpy as np
+
+NO_NOTE = -1
+
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+FLATS = {'Db': 'C#', 'Eb': 'D#', 'Gb': 'F#', 'Ab': 'G#', 'Bb': 'A#', 'Cb': 'B', 'Fb': 'E', 'E#': 'F', 'B#': 'C'}
+
+# MIDI note numbers, highest string first to match how tabs are written
+STANDARD_TUNING = np.array([64, 59, 55, 50, 45, 40], dtype=np.int16)
+
+STAFF_RE = re.compile(r'^\s*([A-Ga-g][#b]?)\s*[|:]([^\n]*)$')
+FRET_RE = re.compile(r'\d+')
+SECTION_RE = re.compile(r'^\s*\[([^\]/][^\]]*)\]\s*$')
+CHORD_RE = re.compile(
+    r'^[A-G][#b]?(?:maj|min|m|dim|aug|sus|add|M)?\d*(?:(?:sus|add|b|#)\d+)*(?:/[A-G][#b]?)?$'
+)
+MARKUP_RE = re.compile(r'\[/?(?:ch|tab)\]')
+CAPO_RE = re.compile(r'capo\s*(?:on|:)?\s*(\d+)', re.I)
+BPM_RE = re.compile(r'(?:bpm\s*[:=]?\s*(\d+))|(?:(\d+)\s*bpm)', re.I)
+TUNING_RE = re.compile(r'tuning\s*[:=]\s*([^\n]+)', re.I)
+KEY_RE = re.compile(r'\bkey\s*[:=]\s*([A-G][#b]?m?)', re.I)
+
+
+def note_index(name):
+    """Pitch class (0-11) for a note name like 'E', 'f#' or 'Bb'"""
+    name = name[0].upper() + name[1:]
+    name = FLATS.get(name, name)
+    return NOTE_NAMES.index(name)
+
+
+def tuning_from_names(names):
+    """MIDI tuning for string names written high-to-low (e B G D A E -> standard)"""
+    classes = [note_index(name) for name in names]
+    if [name.upper() for name in names] == ['E', 'B', 'G', 'D', 'A', 'E']:
+        return STANDARD_TUNING.copy()
+
+    # Lowest string sits in octave 2 (B1/A1 for extended range), each higher string is the next pitch up
+    midi = [36 + classes[-1] - (12 if classes[-1] >= 9 else 0)]
+    for pc in reversed(classes[:-1]):
+        step = (pc - midi[-1]) % 12 or 12
+        midi.append(midi[-1] + step)
+    return np.array(list(reversed(midi)), dtype=np.int16)
+
+
+def transpose_chord(chord, semitones):
+    """Transpose a chord symbol, including any slash bass note"""
+    def shift(match):
+        root = match.group(0)
+        return NOTE_NAMES[(note_index(root) + semitones) % 12]
+
+    head, _, bass = chord.partition('/')
+    head = re.sub(r'^[A-G][#b]?', shift, head)
+    if bass:
+        bass = re.sub(r'^[A-G][#b]?', shift, bass)
+        return f"{head}/{bass}"
+    return head
+
+
+class Tablature:
+    """Parsed tab: fret arrays, chord-line tokens, section markers and metadata"""
+
+    def __init__(self, frets, positions, string_names, tuning, chords=None, sections=None,
+                 capo=None, bpm=None, tuning_label=None, key=None):
+        self.frets = frets
+        self.positions = positions
+        self.string_names = string_names
+        self.tuning = tuning
+        self.chords = chords or []
+        self.sections = sections or []
+        self.capo = capo
+        self.bpm = bpm
+        self.tuning_label = tuning_label
+        self.key = key
+
+    @property
+    def note_mask(self):
+        return self.frets != NO_NOTE
+
+    def pitches(self):
+        """MIDI pitch per string per column (capo included); NO_NOTE where silent"""
+        sounding = self.frets + self.tuning[:, None] + (self.capo or 0)
+        return np.where(self.note_mask, sounding, NO_NOTE)
+
+    def transpose(self, semitones):
+        """Shift every note and chord symbol; notes pushed below the nut move up an octave"""
+        shifted = np.where(self.note_mask, self.frets + semitones, NO_NOTE)
+        shifted = np.where(self.note_mask & (shifted < 0), shifted + 12, shifted)
+        chords = [(line, [(col, transpose_chord(chord, semitones)) for col, chord in tokens])
+                  for line, tokens in self.chords]
+        key = transpose_chord(self.key, semitones) if self.key else None
+        return self._copy(frets=shifted.astype(np.int16), chords=chords, key=key)
+
+    def retune(self, new_tuning):
+        """Re-finger for another tuning while keeping every pitch the same"""
+        new_tuning = np.asarray(new_tuning, dtype=np.int16)
+        if new_tuning.shape != self.tuning.shape:
+            raise ValueError(f"Tuning needs {self.tuning.shape[0]} strings, got {new_tuning.shape[0]}")
+        delta = (self.tuning - new_tuning)[:, None]
+        refretted = np.where(self.note_mask, self.frets + delta, NO_NOTE)
+        refretted = np.where(self.note_mask & (refretted < 0), refretted + 12, refretted)
+        return self._copy(frets=refretted.astype(np.int16), tuning=new_tuning)
+
+    def statistics(self):
+        """Fret range and difficulty indicators for this tab"""
+        return batch_statistics([self])[0]
+
+    def _copy(self, **changes):
+        fields = dict(
+            frets=self.frets, positions=self.positions, string_names=self.string_names,
+            tuning=self.tuning, chords=self.chords, sections=self.sections, capo=self.capo,
+            bpm=self.bpm, tuning_label=self.tuning_label, key=self.key
+        )
+        fields.update(changes)
+        return Tablature(**fields)
+
+
+def parse_tab(text):
+    """Parse tab text (plain or UG [ch]/[tab] markup) into a Tablature"""
+    text = MARKUP_RE.sub('', text or '')
+    rows, cols, vals = [], [], []
+    string_names = []
+    chords, sections = [], []
+    system, system_width, offset = [], 0, 0
+
+    def close_system():
+        nonlocal system, system_width, offset
+        if len(system) > len(string_names):
+            string_names[:] = [name for name, _ in system]
+        for row, (_, body) in enumerate(system):
+            for match in FRET_RE.finditer(body):
+                rows.append(row)
+                cols.append(offset + match.start())
+                vals.append(int(match.group(0)))
+        offset += system_width + 1
+        system, system_width = [], 0
+
+    for line_no, line in enumerate(text.splitlines()):
+        staff = STAFF_RE.match(line)
+        if staff:
+            system.append((staff.group(1), staff.group(2)))
+            system_width = max(system_width, len(staff.group(2)))
+            continue
+        if system:
+            close_system()
+
+        section = SECTION_RE.match(line)
+        if section:
+            sections.append((line_no, section.group(1).strip()))
+            continue
+
+        tokens = [(m.start(), m.group(0)) for m in re.finditer(r'\S+', line)]
+        if tokens and all(CHORD_RE.match(token) for _, token in tokens):
+            chords.append((line_no, tokens))
+    if system:
+        close_system()
+
+    n_strings = len(string_names) or len(STANDARD_TUNING)
+    positions, inverse = np.unique(np.array(cols, dtype=np.int32), return_inverse=True)
+    frets = np.full((n_strings, len(positions)), NO_NOTE, dtype=np.int16)
+    if vals:
+        row_idx = np.minimum(np.array(rows), n_strings - 1)
+        frets[row_idx, inverse] = np.array(vals, dtype=np.int16)
+
+    tuning = tuning_from_names(string_names) if string_names else STANDARD_TUNING.copy()
+    capo = CAPO_RE.search(text)
+    bpm = BPM_RE.search(text)
+    tuning_label = TUNING_RE.search(text)
+    key = KEY_RE.search(text)
+
+    return Tablature(
+        frets=frets,
+        positions=positions,
+        string_names=string_names or ['e', 'B', 'G', 'D', 'A', 'E'],
+        tuning=tuning,
+        chords=chords,
+        sections=sections,
+        capo=int(capo.group(1)) if capo else None,
+        bpm=int(bpm.group(1) or bpm.group(2)) if bpm else None,
+        tuning_label=tuning_label.group(1).strip() if tuning_label else None,
+        key=key.group(1) if key else None,
+    )
+
+
+def batch_statistics(tabs):
+    """Fret-range and difficulty statistics for many tabs in one vectorized pass
+
+    Tabs are padded to a common string count and laid end to end; per-column
+    and per-tab reductions then run as segment reductions over one array.
+    """
+    if not tabs:
+        return []
+
+    n_strings = max(tab.frets.shape[0] for tab in tabs)
+    widths = np.array([tab.frets.shape[1] for tab in tabs])
+    frets = np.full((n_strings, int(widths.sum())), NO_NOTE, dtype=np.int16)
+    start = 0
+    for tab, width in zip(tabs, widths):
+        frets[:tab.frets.shape[0], start:start + width] = tab.frets
+        start += width
+
+    # Open strings are free; only fretted notes count towards reach and position
+    fretted = frets > 0
+    high = np.where(fretted, frets, -1).max(axis=0, initial=-1)
+    low = np.where(fretted, frets, 99).min(axis=0, initial=99)
+    has_fretted = fretted.any(axis=0)
+    stretch = np.where(has_fretted, high - low, 0)
+    notes_per_column = (frets != NO_NOTE).sum(axis=0)
+
+    # Hand-position jumps between consecutive fretted columns, never across tab boundaries
+    tab_id = np.repeat(np.arange(len(tabs)), widths)
+    fretted_cols = np.flatnonzero(has_fretted)
+    jumps = np.abs(np.diff(low[fretted_cols]))
+    same_tab = tab_id[fretted_cols][1:] == tab_id[fretted_cols][:-1]
+    big_jump_cols = fretted_cols[1:][same_tab & (jumps >= 5)]
+    jump_counts = np.bincount(tab_id[big_jump_cols], minlength=len(tabs))
+
+    bounds = np.concatenate(([0], np.cumsum(widths)))
+    results = []
+    for i, tab in enumerate(tabs):
+        lo, hi = bounds[i], bounds[i + 1]
+        seg_fretted = has_fretted[lo:hi]
+        notes = int(notes_per_column[lo:hi].sum())
+        if seg_fretted.any():
+            fret_min = int(low[lo:hi][seg_fretted].min())
+            fret_max = int(high[lo:hi][seg_fretted].max())
+            mean_fret = float(frets[:, lo:hi][fretted[:, lo:hi]].mean())
+            max_stretch = int(stretch[lo:hi].max())
+        else:
+            fret_min = fret_max = max_stretch = 0
+            mean_fret = 0.0
+        columns = int(hi - lo)
+        chord_density = float(notes_per_column[lo:hi].mean()) if columns else 0.0
+        jump_rate = float(jump_counts[i]) / max(columns, 1)
+
+        # 0-10 heuristic: reach (3), height up the neck (2), position shifts (3), polyphony (2)
+        difficulty = (3 * min(max_stretch, 6) / 6 + 2 * min(fret_max, 15) / 15
+                      + 3 * min(jump_rate * 10, 1) + 2 * min(chord_density / 6, 1))
+        results.append({
+            'columns': columns,
+            'notes': notes,
+            'fret_min': fret_min,
+            'fret_max': fret_max,
+            'fret_span': fret_max - fret_min,
+            'mean_fret': round(mean_fret, 2),
+            'max_stretch': max_stretch,
+            'position_jumps': int(jump_counts[i]),
+            'chord_density': round(chord_density, 2),
+            'chord_lines': len(tab.chords),
+            'sections': [name for _, name in tab.sections],
+            'difficulty': round(difficulty, 1),
+        })
+    return results
@@ -0,0 +1,221 @@
+"""
+HTTP transport for the Ultimate Guitar scraper
+One tuned keep-alive connection pool, retries with jittered exponential
+backoff that honor Retry-After, and AIMD adaptive concurrency per host: the
+in-flight limit grows by one per window of successes and halves on 429/5xx,
+so throughput settles just under what the origin tolerates instead of
+collapsing into a retry storm.
+"""
+
+import email.utils
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 16
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_CAP = 30.0
+DEFAULT_CONNECT_TIMEOUT = 3.05
+
+# 429 and 503 mean "slow down"; the other 5xx are retried but only shrink the window
+THROTTLE_STATUSES = {429, 503}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_delay(attempt, base=DEFAULT_BACKOFF_BASE, cap=DEFAULT_BACKOFF_CAP):
+    """Full-jitter exponential backoff for the given retry attempt (1-based)"""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight requests for one host
+
+    Each success adds 1/limit (about +1 per window of requests); a throttle
+    multiplies the limit by `decrease`. Only requests that started after the
+    last decrease can shrink it again, so one burst of 429s counts once.
+    """
+
+    def __init__(self, initial, minimum=1, maximum=DEFAULT_POOL_MAXSIZE, decrease=0.5):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease = decrease
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Block until a slot is free and any Retry-After pause has passed; return the start time"""
+        with self.condition:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return time.monotonic()
+                self.condition.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, started, outcome):
+        """Return a slot; outcome is 'success', 'throttle' or 'error'"""
+        with self.condition:
+            self.in_flight -= 1
+            if outcome == 'success':
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            elif started > self.last_decrease:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self.last_decrease = time.monotonic()
+            self.condition.notify_all()
+
+    def pause(self, seconds):
+        """Hold new requests to this host for the given time (Retry-After)"""
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class Transport:
+    """Pooled session with retry/backoff, adaptive concurrency and counters"""
+
+    def __init__(self, headers=None, initial_concurrency=DEFAULT_INITIAL_CONCURRENCY, max_concurrency=DEFAULT_POOL_MAXSIZE,
+                 max_retries=DEFAULT_MAX_RETRIES, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_cap=DEFAULT_BACKOFF_CAP,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, adaptive=True):
+        self.max_concurrency = max(1, int(max_concurrency))
+        # adaptive=False pins every host at max_concurrency (retries and backoff still apply)
+        self.adaptive = adaptive
+        self.initial_concurrency = min(self.max_concurrency, max(1, int(initial_concurrency)))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.connect_timeout = connect_timeout
+
+        # One pool slot per allowed in-flight request, so connections are reused, never discarded
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=self.max_concurrency,
+                                   max_retries=0)
+        self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self.hosts = {}
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys(
+            ('requests', 'retries', 'throttled', 'server_errors', 'connection_errors', 'gave_up', 'bytes_received'), 0
+        )
+
+    def get(self, url, headers=None, timeout=10, stream=False):
+        """GET with retries; returns the final response or raises the last connection error
+
+        Retryable statuses that exhaust the retry budget are returned as-is so
+        callers still see them through raise_for_status().
+        """
+        gate = self._gate(url)
+        attempt = 0
+        while True:
+            started = gate.acquire()
+            try:
+                self._count('requests')
+                response = self.session.get(url, headers=headers, timeout=(self.connect_timeout, timeout),
+                                            stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                gate.release(started, 'error')
+                self._count('connection_errors')
+                if attempt >= self.max_retries:
+                    self._count('gave_up')
+                    raise
+                attempt += 1
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                print(f"Connection error ({e.__class__.__name__}); retry {attempt} in {delay:.2f}s", file=sys.stderr)
+                self._count('retries')
+                time.sleep(delay)
+                continue
+
+            if response.status_code not in RETRY_STATUSES:
+                gate.release(started, 'success')
+                return response
+
+            throttled = response.status_code in THROTTLE_STATUSES
+            gate.release(started, 'throttle' if throttled else 'error')
+            self._count('throttled' if throttled else 'server_errors')
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if attempt >= self.max_retries or (retry_after or 0) > self.backoff_cap:
+                # Out of retries, or the origin asked for a longer break than we are willing to wait
+                self._count('gave_up')
+                return response
+
+            attempt += 1
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+            if retry_after is not None:
+                # The origin named a time; wait at least that long, plus jitter so waiters don't stampede
+                delay = retry_after + random.uniform(0, self.backoff_base)
+                gate.pause(delay)
+            response.close()
+            print(f"HTTP {response.status_code}; retry {attempt} in {delay:.2f}s", file=sys.stderr)
+            self._count('retries')
+            time.sleep(delay)
+
+    def record_body(self, size):
+        """Count body bytes the caller read from a response (streamed reads may stop early)"""
+        self._count('bytes_received', size)
+
+    def stats(self):
+        """Counters plus connection-pool reuse and the current per-host limits"""
+        with self.lock:
+            stats = dict(self.counters)
+            limits = {host: round(gate.limit, 2) for host, gate in self.hosts.items()}
+
+        # urllib3 counts every request and every new connection per pool
+        new_connections = pool_requests = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            new_connections += pool.num_connections
+            pool_requests += pool.num_requests
+        stats['new_connections'] = new_connections
+        stats['reused_connections'] = max(0, pool_requests - new_connections)
+        stats['concurrency_limits'] = limits
+        return stats
+
+    def close(self):
+        self.session.close()
+
+    def _gate(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            gate = self.hosts.get(host)
+            if gate is None:
+                if self.adaptive:
+                    gate = AdaptiveConcurrency(initial=self.initial_concurrency, maximum=self.max_concurrency)
+                else:
+                    gate = AdaptiveConcurrency(initial=self.max_concurrency, maximum=self.max_concurrency,
+                                               decrease=1.0)
+                self.hosts[host] = gate
+        return gate
+
+    def _count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tab-content classifier vs the substring checks it replaced
+Runs both over the labeled blocks in tests/fixtures/ultimate-guitar/classifier-samples.txt
+plus the tab texts of the recorded tab pages (positives), and reports
+precision, recall and time per call. Misclassified samples are listed.
+
+Usage: python3 tests/performance/benchmark_ug_classifier.py [repeat]
+"""
+
+import sys
+import time
+
+from ug_bench_common import FIXTURES_DIR
+
+from ultimate_guitar_classify import TAB_CONFIDENCE_THRESHOLD, classify
+
+
+def legacy_looks_like_tab_content(content):
+    """_looks_like_tab_content as it was before the classifier"""
+    if not content or len(content.strip()) < 20:
+        return False
+    tab_indicators = [
+        'e|---', 'B|---', 'G|---', 'D|---', 'A|---', 'E|---',
+        '|---', '|--', '|-',
+        '[Verse]', '[Chorus]', '[Bridge]',
+        'Capo', 'Tuning:', 'BPM'
+    ]
+    content_lower = content.lower()
+    for indicator in tab_indicators:
+        if indicator.lower() in content_lower:
+            return True
+    return False
+
+
+def load_samples(path):
+    samples = []
+    for block in path.read_text(encoding='utf-8').split('\n### ')[1:]:
+        header, _, text = block.partition('\n')
+        label, name = header.split(None, 1)
+        samples.append((name, label == 'tab', text))
+    return samples
+
+
+def fixture_tabs():
+    """The long tab bodies from the recorded pages; all positives"""
+    import html
+    import re
+    samples = []
+    for path in sorted(FIXTURES_DIR.glob('tab-*.html')):
+        page = path.read_text(encoding='utf-8')
+        for i, block in enumerate(re.findall(r'<pre[^>]*>(.*?)</pre>', page, re.S)):
+            text = html.unescape(block)
+            if '|' in text and len(text) > 200:
+                samples.append((f"{path.stem}#{i}", True, text))
+    return samples
+
+
+def evaluate(name, predict, samples, repeat):
+    true_pos = false_pos = false_neg = 0
+    wrong = []
+    for sample_name, label, text in samples:
+        predicted = predict(text)
+        if predicted and label:
+            true_pos += 1
+        elif predicted:
+            false_pos += 1
+            wrong.append(f"false positive: {sample_name}")
+        elif label:
+            false_neg += 1
+            wrong.append(f"false negative: {sample_name}")
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, _, text in samples:
+            predict(text)
+    per_call = (time.perf_counter() - start) / (repeat * len(samples)) * 1e6
+
+    precision = true_pos / max(true_pos + false_pos, 1)
+    recall = true_pos / max(true_pos + false_neg, 1)
+    print(f"{name:<12} {precision:>9.2f} {recall:>7.2f} {false_pos:>5} {false_neg:>5} {per_call:>11.2f}")
+    return wrong
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    samples = load_samples(FIXTURES_DIR / 'classifier-samples.txt') + fixture_tabs()
+    positives = sum(1 for _, label, _ in samples if label)
+    print(f"{len(samples)} samples ({positives} tabs, {len(samples) - positives} not), threshold {TAB_CONFIDENCE_THRESHOLD}")
+    print(f"{'classifier':<12} {'precision':>9} {'recall':>7} {'FP':>5} {'FN':>5} {'us per call':>11}")
+    evaluate('legacy', legacy_looks_like_tab_content, samples, repeat)
+    wrong = evaluate('classify', lambda text: classify(text).confidence >= TAB_CONFIDENCE_THRESHOLD, samples, repeat)
+    for line in wrong:
+        print(f"  {line}")
+
+    print(f"\n{'sample':<34} {'confidence':>10} {'tab':>4} {'chord':>5} {'sect':>4} {'meta':>4}")
+    for name, label, text in samples:
+        score = classify(text, threshold=None)
+        print(f"{('+ ' if label else '- ') + name:<34} {score.confidence:>10.3f} {score.tab_lines:>4} "
+              f"{score.chord_lines:>5} {score.sections:>4} {score.meta:>4}")
+
+
+if __name__ == "__main__":
+    main()
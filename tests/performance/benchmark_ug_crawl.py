@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: resumable catalog crawl against a synthetic catalog
+Generates SEEDS artists with PAGES result pages of RESULTS tabs each, served by
+the fixture server, and crawls them into a fresh corpus twice:
+
+    full         one uninterrupted run
+    interrupted  stopped part-way (as Ctrl-C would), then resumed from the checkpoint
+
+Reports result pages/s, tabs/s, KiB/s and upstream requests; the resumed
+crawl should make no more requests than the uninterrupted one.
+
+Usage: python3 tests/performance/benchmark_ug_crawl.py [seeds] [pages] [results]
+"""
+
+import contextlib
+import html
+import io
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from ug_bench_common import FIXTURES_DIR, FixtureServer, slugify
+
+from ultimate_guitar_corpus import TabCorpus
+from ultimate_guitar_crawl import Crawler, CrawlCheckpoint
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+BATCH_SIZE = 10
+
+
+def write_catalog(directory, base_url, seeds, pages, results):
+    """Search pages (search-<seed>[-pageN].html) and one tab page per result"""
+    tab_body = (FIXTURES_DIR / 'tab-pre-wonderwall.html').read_bytes()
+    names = [f"Artist {i}" for i in range(seeds)]
+    for name in names:
+        for page in range(1, pages + 1):
+            rows = []
+            for i in range(results):
+                slug = f"{slugify(name)}-song-{page}-{i}"
+                rows.append({'id': len(rows), 'song_name': f"Song {page}-{i}", 'artist_name': name,
+                             'type': 'Chords', 'rating': 4.5, 'votes': 10, 'difficulty': 'novice',
+                             'tab_url': f"{base_url}/tab/{slug}"})
+                (directory / f"tab-{slug}.html").write_bytes(tab_body)
+            store = {'store': {'page': {'data': {'results': rows, 'pagination': {'current': page, 'total': pages}}}}}
+            content = html.escape(json.dumps(store, separators=(',', ':')))
+            suffix = '' if page == 1 else f"-page{page}"
+            (directory / f"search-{slugify(name)}{suffix}.html").write_text(
+                f'<html><body><div class="js-store" data-content="{content}"></div></body></html>')
+    return names
+
+
+def crawl(server, state_dir, seeds, stop_after=None):
+    """Run one crawl; with stop_after, stop it once the origin has served that many requests"""
+    with contextlib.redirect_stderr(io.StringIO()):
+        scraper = UltimateGuitarScraper(base_url=server.url, use_cache=False, use_corpus=False,
+                                        requests_per_second=1000)
+    corpus = TabCorpus(state_dir / 'corpus.sqlite3')
+    checkpoint = CrawlCheckpoint(state_dir / 'crawl.sqlite3')
+    crawler = Crawler(scraper, corpus, checkpoint, batch_size=BATCH_SIZE, report_interval=float('inf'))
+
+    if stop_after is not None:
+        def watch():
+            while server.requests < stop_after:
+                time.sleep(0.001)
+            crawler.stop()
+        threading.Thread(target=watch, daemon=True).start()
+
+    log = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(log):
+        stats = crawler.run(seeds)
+    elapsed = time.perf_counter() - start
+    received = scraper.transport.stats()['bytes_received']
+    content = corpus.stats()['with_content']
+    scraper.session.close()
+    corpus.close()
+    checkpoint.close()
+    return (crawler.pages_fetched, crawler.tabs_fetched), received, elapsed, stats, content
+
+
+def main():
+    seeds, pages, results = ([int(arg) for arg in sys.argv[1:4]] + [3, 4, 25][len(sys.argv[1:4]):])[:3]
+    expected = seeds * pages * (1 + results)
+    print(f"catalog: {seeds} seeds x {pages} pages x {results} tabs = {expected} pages to fetch")
+    print(f"{'run':<22} {'pages':>6} {'pages/s':>8} {'tabs':>6} {'tabs/s':>8} {'KiB/s':>8} {'upstream':>9} "
+          f"{'tabs stored':>12}")
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer(fixtures_dir=tmp) as server:
+        names = write_catalog(Path(tmp), server.url, seeds, pages, results)
+
+        def row(label, fetched, received, elapsed, upstream, content):
+            pages_fetched, tabs_fetched = fetched
+            print(f"{label:<22} {pages_fetched:>6} {pages_fetched / elapsed:>8.1f} {tabs_fetched:>6} "
+                  f"{tabs_fetched / elapsed:>8.1f} {received / 1024 / elapsed:>8.1f} {upstream:>9} {content:>12}")
+
+        with tempfile.TemporaryDirectory() as state:
+            before = server.requests
+            fetched, received, elapsed, stats, content = crawl(server, Path(state), names)
+            full = server.requests - before
+            row('full', fetched, received, elapsed, full, content)
+
+        with tempfile.TemporaryDirectory() as state:
+            before = server.requests
+            fetched, received, elapsed, stats, content = crawl(server, Path(state), names,
+                                                               stop_after=before + expected // 2)
+            first = server.requests - before
+            row('interrupted (part 1)', fetched, received, elapsed, first, content)
+            fetched, received, elapsed, stats, content = crawl(server, Path(state), [])
+            second = server.requests - before - first
+            row('resumed (part 2)', fetched, received, elapsed, second, content)
+
+        refetched = first + second - full
+        print(f"resumed crawl refetched {refetched} pages; checkpoint: {json.dumps(stats)}")
+        if refetched > 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: content fingerprinting on a catalog with many versions per song
+Each synthetic song is published in four versions, as UG tends to have:
+
+    ver 1   the original
+    ver 2   re-uploaded with different spacing and a "Tabbed by" header (exact duplicate)
+    ver 3   a few chords changed (near duplicate)
+    ver 4   a different arrangement (distinct)
+
+Every version is fetched through search_and_get_tabs into a fresh corpus;
+reports stored content bytes against the raw bytes, and the JSON payload
+with and without near-duplicate collapsing.
+
+Usage: python3 tests/performance/benchmark_ug_dedup.py [songs]
+"""
+
+import contextlib
+import html
+import io
+import json
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from ug_bench_common import FixtureServer, slugify
+
+from ultimate_guitar_corpus import TabCorpus
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+CHORDS = ['A', 'Am', 'C', 'D', 'Dm', 'E', 'Em', 'F', 'G', 'A7sus4', 'Cadd9', 'Dsus2']
+STRINGS = 'eBGDAE'
+
+
+def song_text(rng, title, sections=6):
+    lines = [title, 'Tuning: E A D G B E', '']
+    for section in range(sections):
+        lines.append(f"[{['Intro', 'Verse', 'Chorus', 'Bridge'][section % 4]}]")
+        lines.append('   '.join(rng.choice(CHORDS) for _ in range(4)))
+        for string in STRINGS:
+            lines.append(string + '|' + '|'.join(
+                ''.join(rng.choice('-----0235') for _ in range(8)) for _ in range(4)) + '|')
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def versions(song):
+    rng = random.Random(song)
+    title = f"Song {song}"
+    original = song_text(rng, title)
+    respaced = 'Tabbed by someone\n' + '\n'.join('  ' + line.replace('   ', '     ') for line in original.splitlines())
+    edited = original.splitlines()
+    for i in rng.sample([i for i, line in enumerate(edited) if '   ' in line], 2):
+        edited[i] = '   '.join(rng.choice(CHORDS) for _ in range(4))
+    arrangement = song_text(random.Random(f"{song}-alt"), title)
+    return [original, respaced, '\n'.join(edited), arrangement]
+
+
+def write_catalog(directory, base_url, songs):
+    raw_bytes = 0
+    for song in range(songs):
+        rows = []
+        for number, text in enumerate(versions(song), 1):
+            slug = f"song-{song}-ver-{number}"
+            rows.append({'id': f"{song}{number}", 'song_name': f"Song {song} (ver {number})",
+                         'artist_name': 'Artist', 'type': 'Tabs', 'rating': 5 - number * 0.1, 'votes': 10,
+                         'difficulty': 'novice', 'tab_url': f"{base_url}/tab/{slug}"})
+            page = f"<html><head><title>Song {song}</title></head><body><pre>{html.escape(text)}</pre></body></html>"
+            (directory / f"tab-{slug}.html").write_text(page)
+            raw_bytes += len(text.encode())
+        store = {'store': {'page': {'data': {'results': rows, 'pagination': {'current': 1, 'total': 1}}}}}
+        content = html.escape(json.dumps(store, separators=(',', ':')))
+        (directory / f"search-{slugify(f'song {song}')}.html").write_text(
+            f'<html><body><div class="js-store" data-content="{content}"></div></body></html>')
+    return raw_bytes
+
+
+def main():
+    songs = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer(fixtures_dir=tmp) as server:
+        raw_bytes = write_catalog(Path(tmp), server.url, songs)
+        corpus_path = Path(tmp) / 'corpus.sqlite3'
+        with contextlib.redirect_stderr(io.StringIO()):
+            scraper = UltimateGuitarScraper(base_url=server.url, use_cache=False, corpus_path=corpus_path,
+                                            canonicalize_queries=False, requests_per_second=1000)
+        payloads = {False: 0, True: 0}
+        results = {False: 0, True: 0}
+        with contextlib.redirect_stderr(io.StringIO()):
+            for song in range(songs):
+                for collapse in (False, True):
+                    tabs = scraper.search_and_get_tabs(f"song {song}", limit=10, include_content=True,
+                                                       collapse_duplicates=collapse)
+                    payloads[collapse] += len(json.dumps(tabs))
+                    results[collapse] += len(tabs)
+        stats = scraper.corpus.stats()
+        scraper.session.close()
+        scraper.corpus.close()
+
+        corpus = TabCorpus(corpus_path)
+        stored_bytes = corpus.db.execute('SELECT COALESCE(SUM(length(content)), 0) FROM tabs').fetchone()[0]
+        local = corpus.search('song 0 artist', limit=10, collapse=True)
+        corpus.close()
+
+    print(f"{songs} songs x 4 versions")
+    print(f"corpus: {stats['with_content']} tabs with content, {stats['stored_contents']} texts stored, "
+          f"{stats['deduplicated']} deduplicated")
+    print(f"content bytes: {raw_bytes} raw -> {stored_bytes} stored ({1 - stored_bytes / raw_bytes:.0%} saved)")
+    print(f"search_and_get_tabs: {results[False]} -> {results[True]} results, "
+          f"payload {payloads[False]} -> {payloads[True]} bytes ({1 - payloads[True] / payloads[False]:.0%} smaller)")
+    print(f"local search 'song 0': {len(local)} results, "
+          f"{sum(len(tab.get('near_duplicates', [])) for tab in local)} versions collapsed")
+
+
+if __name__ == "__main__":
+    main()
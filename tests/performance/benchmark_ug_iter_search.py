@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: paginated iter_search vs reading result pages one after another
+Runs a deep query (more results than one page holds) against the fixture
+server with simulated round-trip latency and reports time to first result,
+total time and pages fetched.
+
+Usage: python3 tests/performance/benchmark_ug_iter_search.py [latency_ms] [limit]
+"""
+
+import asyncio
+import contextlib
+import io
+import sys
+import time
+
+from ug_bench_common import FixtureServer
+
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+QUERY = 'wonderwall'
+
+
+def sequential(scraper, limit):
+    """One page at a time, the way a caller had to page through results before iter_search"""
+    page = 1
+    while True:
+        result = scraper._fetch_search_page(scraper._search_page_url(QUERY, page))
+        if not result:
+            return
+        tabs, total_pages, _ = result
+        for tab in tabs:
+            yield tab
+            limit -= 1
+            if limit <= 0:
+                return
+        if page >= total_pages:
+            return
+        page += 1
+
+
+def measure(server, results):
+    before = server.requests
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for _ in results:
+        if first is None:
+            first = (time.perf_counter() - start) * 1000
+        count += 1
+    return first or 0.0, (time.perf_counter() - start) * 1000, count, server.requests - before
+
+
+async def measure_async(server, scraper, limit):
+    before = server.requests
+    start = time.perf_counter()
+    first = None
+    count = 0
+    async for _ in scraper.aiter_search(QUERY, limit=limit):
+        if first is None:
+            first = (time.perf_counter() - start) * 1000
+        count += 1
+    return first or 0.0, (time.perf_counter() - start) * 1000, count, server.requests - before
+
+
+def main():
+    latency_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 150
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+
+    with FixtureServer(latency=latency_ms / 1000) as server:
+        with contextlib.redirect_stderr(io.StringIO()):
+            # Rate limit high enough that the simulated round trip is what we measure
+            scraper = UltimateGuitarScraper(base_url=server.url, use_cache=False, use_corpus=False,
+                                            requests_per_second=50)
+            rows = [
+                ('sequential pages', measure(server, sequential(scraper, limit))),
+                ('iter_search', measure(server, scraper.iter_search(QUERY, limit=limit))),
+                ('aiter_search', asyncio.run(measure_async(server, scraper, limit))),
+            ]
+        scraper.session.close()
+
+    print(f"query '{QUERY}', limit {limit}, {latency_ms:.0f}ms simulated latency")
+    print(f"{'mode':<18} {'first ms':>9} {'total ms':>9} {'results':>8} {'pages':>6}")
+    for name, (first, total, count, pages) in rows:
+        print(f"{name:<18} {first:>9.1f} {total:>9.1f} {count:>8} {pages:>6}")
+
+
+if __name__ == "__main__":
+    main()
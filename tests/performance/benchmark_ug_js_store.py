@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Benchmark: js-store byte scan vs a full DOM parse on each installed backend
+Runs both extraction paths over the recorded search pages and checks they
+agree. The scraper takes the byte scan only on backends without fast_dom:
+it is an order of magnitude ahead of a bs4 parse, and level with lexbor.
+
+Usage: python3 tests/performance/benchmark_ug_js_store.py [repeat]
+"""
+
+import contextlib
+import io
+import sys
+
+from ug_bench_common import load_fixtures, time_call
+
+from ultimate_guitar_parsers import available_backends
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    pages = load_fixtures('search-*.html')
+
+    print(f"{'backend':<12} {'fixture':<32} {'size':>7} {'dom ms':>8} {'scan ms':>8} {'speedup':>8}  scraper uses")
+    for backend in available_backends():
+        with contextlib.redirect_stderr(io.StringIO()):
+            scraper = UltimateGuitarScraper(use_cache=False, use_corpus=False, parser_backend=backend)
+        used = 'dom' if scraper.parser.fast_dom else 'scan'
+        total_dom = total_scan = 0.0
+        for name, body in pages.items():
+            dom_ms, _, dom_payload = time_call(scraper._extract_js_store_dom, body, repeat)
+            scan_ms, _, scan_payload = time_call(scraper._extract_js_store_fast, body, repeat)
+            if dom_payload != scan_payload:
+                print(f"MISMATCH: {backend} {name} byte scan disagrees with DOM parse", file=sys.stderr)
+                sys.exit(1)
+            total_dom += dom_ms
+            total_scan += scan_ms
+            print(f"{backend:<12} {name:<32} {len(body):>7} {dom_ms:>8.3f} {scan_ms:>8.3f} "
+                  f"{dom_ms / scan_ms:>7.1f}x")
+        print(f"{backend:<12} {'total':<32} {'':>7} {total_dom:>8.3f} {total_scan:>8.3f} "
+              f"{total_dom / total_scan:>7.1f}x  {used}")
+
+
+if __name__ == "__main__":
+    main()
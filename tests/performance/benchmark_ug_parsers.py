@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HTML parser backends (selectolax / lxml / html.parser)
+Parses every recorded fixture page with each installed backend and runs the
+same scans the scraper does (js-store lookup, <pre>/<script> walks). Each
+backend runs in its own process so peak memory numbers do not bleed together.
+
+Usage: python3 tests/performance/benchmark_ug_parsers.py [repeat]
+"""
+
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from ug_bench_common import load_fixtures
+
+from ultimate_guitar_parsers import available_backends, create_backend
+
+
+def scan(doc):
+    """The DOM work the scraper performs on a parsed page"""
+    store = doc.select_one('div.js-store')
+    if store:
+        store.attr('data-content')
+    for pre in doc.find_all('pre'):
+        pre.text()
+    for script in doc.find_all('script'):
+        script.text()
+    return doc
+
+
+def run_backend(name, repeat):
+    backend = create_backend(name)
+    pages = load_fixtures('*.html')
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    parse_ms = scan_ms = 0.0
+    for _ in range(repeat):
+        for body in pages.values():
+            start = time.perf_counter()
+            doc = backend.parse(body)
+            parsed = time.perf_counter()
+            scan(doc)
+            parse_ms += (parsed - start) * 1000
+            scan_ms += (time.perf_counter() - parsed) * 1000
+            doc.decompose()
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    runs = repeat * len(pages)
+    return {
+        'backend': name,
+        'pages': len(pages),
+        'parse_ms': parse_ms / runs,
+        'scan_ms': scan_ms / runs,
+        'py_peak_kb': py_peak / 1024,
+        # ru_maxrss is KB on Linux; it also covers allocations made inside C parsers
+        'rss_growth_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    }
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--backend':
+        repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+        print(json.dumps(run_backend(sys.argv[2], repeat)))
+        return
+
+    repeat = sys.argv[1] if len(sys.argv) > 1 else '20'
+    print(f"{'backend':<12} {'parse ms':>9} {'scan ms':>9} {'py peak KB':>11} {'rss +KB':>9}")
+    for name in available_backends():
+        output = subprocess.run(
+            [sys.executable, __file__, '--backend', name, repeat],
+            capture_output=True, text=True, check=True
+        ).stdout
+        row = json.loads(output)
+        print(f"{name:<12} {row['parse_ms']:>9.3f} {row['scan_ms']:>9.3f} "
+              f"{row['py_peak_kb']:>11.0f} {row['rss_growth_kb']:>9}")
+
+
+if __name__ == "__main__":
+    main()
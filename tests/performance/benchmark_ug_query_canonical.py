@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cache hit rate of a recorded query log with and without canonicalization
+Replays tests/fixtures/ultimate-guitar/query-log.txt through search_tabs at the
+fixture server, each run with a fresh response cache, and reports how many
+queries reached the origin. With canonicalization on, case/punctuation
+variants, artist aliases and typos of songs already searched reuse the first
+search's cache entry.
+
+Usage: python3 tests/performance/benchmark_ug_query_canonical.py [query-log]
+"""
+
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ug_bench_common import FIXTURES_DIR, FixtureServer
+
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+
+def load_log(path):
+    with open(path, encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f if line.strip() and not line.startswith('#')]
+
+
+def replay(server, queries, canonicalize):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        with contextlib.redirect_stderr(io.StringIO()):
+            scraper = UltimateGuitarScraper(base_url=server.url, cache_dir=cache_dir, use_cache=True,
+                                            use_corpus=False, canonicalize_queries=canonicalize)
+        before = server.requests + server.misses
+        found = 0
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            for query in queries:
+                found += bool(scraper.search_tabs(query, limit=10))
+        elapsed = (time.perf_counter() - start) * 1000
+        upstream = server.requests + server.misses - before
+        resolutions = scraper.queries.stats() if scraper.queries else {}
+        scraper.session.close()
+    return upstream, found, elapsed, resolutions
+
+
+def main():
+    log_path = Path(sys.argv[1]) if len(sys.argv) > 1 else FIXTURES_DIR / 'query-log.txt'
+    queries = load_log(log_path)
+    print(f"{len(queries)} queries from {log_path.name}, {len(set(queries))} distinct as typed")
+    print(f"{'canonicalize':<13} {'upstream':>9} {'hit rate':>9} {'answered':>9} {'ms':>8}")
+    with FixtureServer() as server:
+        for canonicalize in (False, True):
+            upstream, found, elapsed, resolutions = replay(server, queries, canonicalize)
+            hit_rate = 1 - upstream / len(queries)
+            print(f"{'on' if canonicalize else 'off':<13} {upstream:>9} {hit_rate:>8.0%} "
+                  f"{found:>6}/{len(queries):<3} {elapsed:>7.1f}")
+    mix = ', '.join(f"{how} {resolutions.get(how, 0)}" for how in ('exact', 'artist', 'fuzzy', 'new'))
+    print(f"resolutions (on): {mix}")
+
+
+if __name__ == "__main__":
+    main()
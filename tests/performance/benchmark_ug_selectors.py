@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: _parse_html_results vs the per-selector cascade it started from
+The cascade below is the previous implementation (one doc.select per selector,
+then select_one per candidate, artist lookups in the original order: any
+artist node, then td, div and span ones); both run on every installed parser
+backend over the recorded fallback page plus synthetic layouts, and must agree.
+The scraper scans the tree in a single pass on the bs4 backends and keeps the
+cascade on selectolax, whose C engine beats that pass; its speedup there comes
+from looking artists up in one select instead of four select_one calls.
+
+Usage: python3 tests/performance/benchmark_ug_selectors.py [repeat]
+"""
+
+import contextlib
+import io
+import sys
+from urllib.parse import urljoin
+
+from ug_bench_common import load_fixtures, time_call
+
+from ultimate_guitar_parsers import available_backends
+from ultimate_guitar_scraper import RESULT_SELECTORS, UltimateGuitarScraper
+
+
+def cascade_parse_html_results(scraper, doc, limit):
+    """_parse_html_results as it was before the single-pass scan"""
+    tabs = []
+    for selector in RESULT_SELECTORS:
+        elements = doc.select(selector)
+        if elements:
+            for element in elements[:limit*2]:
+                tab_info = cascade_extract_tab_from_element(scraper, element)
+                if tab_info and tab_info.get('title') and tab_info.get('artist'):
+                    tabs.append(tab_info)
+                    if len(tabs) >= limit:
+                        break
+            if tabs:
+                break
+    return tabs
+
+
+def cascade_extract_tab_from_element(scraper, element):
+    tab_info = {}
+    title_link = element.select_one('a[href*="/tab/"]')
+    if not title_link and element.tag == 'a' and '/tab/' in element.attr('href', ''):
+        title_link = element
+    if title_link:
+        tab_info['title'] = title_link.text().strip()
+        tab_info['url'] = urljoin(scraper.base_url, title_link.attr('href'))
+        tab_info['id'] = tab_info['url'].split('/')[-1] if tab_info['url'] else ''
+
+    artist = "Unknown"
+    candidates = [element.select_one('[class*="artist" i]')]
+    candidates += [element.select_one(f'{tag}[class*="artist" i]') for tag in ('td', 'div', 'span')]
+    for candidate in candidates:
+        if candidate and candidate.text().strip():
+            artist = candidate.text().strip()
+            break
+    if artist == "Unknown" and tab_info.get('title'):
+        title_parts = tab_info['title'].split(' - ')
+        if len(title_parts) >= 2:
+            artist = title_parts[0]
+            tab_info['title'] = ' - '.join(title_parts[1:])
+
+    tab_info.update(artist=artist, type='tab', rating=0, votes=0, difficulty='')
+    return tab_info
+
+
+def synthetic_page(layout, rows):
+    """Result pages the recorded fixture does not cover"""
+    items = []
+    for i in range(rows):
+        if layout == 'div-results':
+            items.append(
+                f'<div class="search-result"><span class="Artist-Name"> Artist {i} </span>'
+                f'<div class="meta"><a href="/tab/artist-{i}/song-{i}-chords-{i}">Song {i}</a></div></div>'
+            )
+        else:
+            items.append(f'<p><a class="link" href="/tab/artist-{i}/song-{i}-tabs-{i}">Artist {i} - Song {i}</a></p>')
+    filler = ''.join(f'<div class="nav"><ul><li><a href="/x/{i}">Nav {i}</a></li></ul></div>' for i in range(200))
+    return f'<html><body>{filler}<main>{"".join(items)}</main></body></html>'.encode()
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    limit = 40
+    pages = load_fixtures('search-html-fallback.html')
+    pages['synthetic-div-results'] = synthetic_page('div-results', 200)
+    pages['synthetic-links-only'] = synthetic_page('links-only', 200)
+
+    print(f"{'backend':<12} {'page':<28} {'cascade ms':>11} {'scraper ms':>10} {'speedup':>8}")
+    for backend in available_backends():
+        with contextlib.redirect_stderr(io.StringIO()):
+            scraper = UltimateGuitarScraper(use_cache=False, use_corpus=False, parser_backend=backend)
+        for name, body in pages.items():
+            doc = scraper.parser.parse(body)
+            cascade_ms, _, expected = time_call(lambda d: cascade_parse_html_results(scraper, d, limit), doc, repeat)
+            with contextlib.redirect_stderr(io.StringIO()):
+                scraper_ms, _, actual = time_call(lambda d: scraper._parse_html_results(d, limit), doc, repeat)
+            if actual != expected:
+                print(f"MISMATCH: {backend} {name} scraper disagrees with the cascade", file=sys.stderr)
+                sys.exit(1)
+            print(f"{backend:<12} {name:<28} {cascade_ms:>11.3f} {scraper_ms:>10.3f} {cascade_ms / scraper_ms:>7.1f}x")
+            doc.decompose()
+
+
+if __name__ == "__main__":
+    main()
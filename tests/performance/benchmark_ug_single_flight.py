@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-flight coalescing for bursts of identical scraper calls
+Fires N concurrent search_tabs calls for the same trending query (with case
+and spacing variations) and N get_tab_content calls for the same URL at the
+fixture server, with and without coalescing, and reports upstream requests
+and wall time per burst.
+
+Usage: python3 tests/performance/benchmark_ug_single_flight.py [burst ...]
+"""
+
+import contextlib
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ug_bench_common import FixtureServer
+
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+QUERY_VARIANTS = ['wonderwall', 'Wonderwall', ' WONDERWALL ', 'wonderwall  ']
+
+
+def burst(server, call, args):
+    before = server.requests
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(args)) as executor:
+        list(executor.map(call, args))
+    return server.requests - before, (time.perf_counter() - start) * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1, 8, 32]
+    print(f"{'call':<16} {'burst':>6} {'upstream (off)':>15} {'ms (off)':>9} {'upstream (on)':>14} {'ms (on)':>8}")
+    with FixtureServer() as server:
+        with contextlib.redirect_stderr(io.StringIO()):
+            scraper = UltimateGuitarScraper(base_url=server.url, use_cache=False, use_corpus=False)
+        tab_url = server.url + '/tab/pre-wonderwall'
+        calls = [
+            ('search_tabs', scraper._search_tabs, scraper.search_tabs,
+             lambda n: [QUERY_VARIANTS[i % len(QUERY_VARIANTS)] for i in range(n)]),
+            ('get_tab_content', scraper._get_tab_content, scraper.get_tab_content, lambda n: [tab_url] * n),
+        ]
+        for name, uncoalesced, coalesced, make_args in calls:
+            for size in sizes:
+                args = make_args(size)
+                if name == 'search_tabs':
+                    off = lambda query: uncoalesced(query, 'tab', 10)
+                else:
+                    off = uncoalesced
+                with contextlib.redirect_stderr(io.StringIO()):
+                    off_requests, off_ms = burst(server, off, args)
+                    on_requests, on_ms = burst(server, coalesced, args)
+                print(f"{name:<16} {size:>6} {off_requests:>15} {off_ms:>9.1f} {on_requests:>14} {on_ms:>8.1f}")
+        scraper.session.close()
+
+
+if __name__ == "__main__":
+    main()
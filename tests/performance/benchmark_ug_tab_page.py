@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tab page extraction, page-data decode vs the <pre> + script regex it replaced
+Runs both over the recorded tab pages and two synthetic long tabs whose text
+has quotes and non-ASCII characters (a js-store page and an inline
+window.UGAPP.store page). Reports time per page and whether the extracted
+text matches the tab; the legacy regex stops at the first escaped quote.
+
+Usage: python3 tests/performance/benchmark_ug_tab_page.py [repeat]
+"""
+
+import contextlib
+import html
+import io
+import json
+import re
+import sys
+
+from ug_bench_common import load_fixtures, time_call
+
+from ultimate_guitar_classify import TAB_CONFIDENCE_THRESHOLD, classify
+from ultimate_guitar_parsers import get_backend
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+
+def legacy_extract_tab_page(parser, body):
+    """_extract_tab_page as it was: every <pre>, then every tab_view script through a regex"""
+    doc = parser.parse(body)
+    try:
+        for pre in doc.find_all('pre'):
+            content = pre.text()
+            if classify(content).confidence >= TAB_CONFIDENCE_THRESHOLD:
+                return content
+        for script in doc.find_all('script'):
+            script_text = script.text()
+            if script_text and 'tab_view' in script_text:
+                match = re.search(r'"content":"([^"]*)"', script_text)
+                if match:
+                    content = match.group(1).encode().decode('unicode_escape')
+                    if classify(content).confidence >= TAB_CONFIDENCE_THRESHOLD:
+                        return content
+        return None
+    finally:
+        doc.decompose()
+
+
+def long_tab(systems=40):
+    lines = ['Comfortably "Numb" - Pink Floyd', 'Tuning: E A D G B E', 'Tabbed by Zoë', '']
+    for system in range(systems):
+        lines.append(f"[Verse {system + 1}]")
+        lines.append('Bm          A')
+        lines.append('Hello? Is there anybody "in there"? Just nod if you can hear me')
+        for string in 'eBGDAE':
+            lines.append(string + '|' + '--7--5--' * 4 + '|')
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def synthetic_pages(text):
+    data = {'tab': {'song_name': 'Comfortably Numb', 'artist_name': 'Pink Floyd', 'type': 'Tabs',
+                    'version': 3, 'rating': 4.9, 'votes': 812, 'username': 'zoe', 'tonality_name': 'Bm'},
+            'tab_view': {'wiki_tab': {'content': text}, 'meta': {'capo': 0, 'tuning': {'value': 'E A D G B E'}}}}
+    store = html.escape(json.dumps({'store': {'page': {'data': data}}}))
+    js_store = (f'<html><head><title>COMFORTABLY NUMB TAB</title></head><body>'
+                f'<div class="js-store" data-content="{store}"></div></body></html>')
+    script = (f'<html><head><title>COMFORTABLY NUMB TAB</title></head><body><script>'
+              f'window.UGAPP = window.UGAPP || {{}}; window.UGAPP.store = {json.dumps({"data": data})};'
+              f'</script></body></html>')
+    return {'synthetic-js-store.html': js_store.encode(), 'synthetic-ugapp-script.html': script.encode()}
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    text = long_tab()
+    pages = dict(load_fixtures('tab-*.html'))
+    pages.update(synthetic_pages(text))
+    with contextlib.redirect_stderr(io.StringIO()):
+        scraper = UltimateGuitarScraper(use_cache=False, use_corpus=False)
+        parser = get_backend(None)
+
+    print(f"{'page':<38} {'legacy ms':>9} {'new ms':>8} {'legacy':>8} {'new':>8}  metadata")
+    for name, body in pages.items():
+        legacy_ms, _, legacy = time_call(lambda page: legacy_extract_tab_page(parser, page), body, repeat)
+        new_ms, _, result = time_call(lambda page: scraper._extract_tab_page(page, name), body, repeat)
+        content = result['content']
+        if name.startswith('synthetic'):
+            verdict = lambda found: 'ok' if found == text else ('missing' if not found else 'wrong')
+        else:
+            verdict = lambda found: 'ok' if found else 'missing'
+        metadata = {key: value for key, value in result['metadata'].items() if value is not None}
+        print(f"{name:<38} {legacy_ms:>9.3f} {new_ms:>8.3f} {verdict(legacy):>8} {verdict(content):>8}  "
+              f"{', '.join(f'{key}={value}' for key, value in metadata.items()) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: array-backed tablature model on a catalog of synthetic tabs
+Each tab has a few sections of chord lines over six-string systems. Reports
+parse_tab per tab, transpose and retune on the parsed arrays, and
+batch_statistics in one call against statistics() tab by tab (which must
+agree).
+
+Usage: python3 tests/performance/benchmark_ug_tablature.py [tabs] [repeat]
+"""
+
+import random
+import sys
+
+from ug_bench_common import time_call
+
+from ultimate_guitar_tablature import batch_statistics, parse_tab, tuning_from_names
+
+CHORDS = ['Am', 'C', 'D', 'Em', 'F', 'G', 'A7sus4', 'Cadd9', 'G/B', 'Bbmaj7']
+STRINGS = 'eBGDAE'
+DROP_D = tuning_from_names(['e', 'B', 'G', 'D', 'A', 'D'])
+
+
+def tab_text(rng, systems=8, width=48):
+    lines = [f"Capo {rng.randint(0, 4)}", f"{rng.choice([80, 100, 120, 140])} BPM", '']
+    for system in range(systems):
+        lines.append(f"[{['Intro', 'Verse', 'Chorus', 'Bridge'][system % 4]}]")
+        lines.append('      '.join(rng.choice(CHORDS) for _ in range(5)))
+        position = rng.choice([0, 0, 3, 5, 7, 12])
+        rows = [['-'] * width for _ in STRINGS]
+        for column in range(2, width - 3, 3):
+            for string in rng.sample(range(6), rng.choice([1, 1, 2, 3])):
+                fret = str(position + rng.randint(0, 4))
+                rows[string][column:column + len(fret)] = fret
+        lines.extend(f"{name}|{''.join(row)}|" for name, row in zip(STRINGS, rows))
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rng = random.Random(0)
+    texts = [tab_text(rng) for _ in range(count)]
+    tabs = [parse_tab(text) for text in texts]
+    notes = sum(int(tab.note_mask.sum()) for tab in tabs)
+    print(f"{count} tabs, {sum(map(len, texts)) / 1024:.0f} KiB of text, {notes} notes")
+
+    rows = [
+        ('parse_tab', lambda items: [parse_tab(text) for text in items], texts),
+        ('transpose +2', lambda items: [tab.transpose(2) for tab in items], tabs),
+        ('retune drop D', lambda items: [tab.retune(DROP_D) for tab in items], tabs),
+        ('statistics() per tab', lambda items: [tab.statistics() for tab in items], tabs),
+        ('batch_statistics', batch_statistics, tabs),
+    ]
+    print(f"{'operation':<22} {'mean ms':>9} {'best ms':>9} {'us per tab':>11}")
+    results = {}
+    for name, operation, items in rows:
+        mean_ms, best_ms, results[name] = time_call(operation, items, repeat)
+        print(f"{name:<22} {mean_ms:>9.2f} {best_ms:>9.2f} {best_ms * 1000 / count:>11.1f}")
+
+    if results['batch_statistics'] != results['statistics() per tab']:
+        print("MISMATCH: batch_statistics disagrees with per-tab statistics()", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dictionary-compressed tab store vs one JSON file per tab
+Builds both from the same tabs (the recorded fixture tabs plus synthetic
+songs in several versions) and reports size on disk and per-tab read latency
+for random lookups. The store is measured with every installed codec, and
+each codec once without a dictionary to show what the dictionary buys.
+
+Usage: python3 tests/performance/benchmark_ug_tabstore.py [songs] [reads]
+"""
+
+import contextlib
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmark_ug_dedup import versions
+from ug_bench_common import FixtureServer
+
+from ultimate_guitar_scraper import UltimateGuitarScraper
+from ultimate_guitar_tabstore import TabStore, available_codecs, build_store
+
+
+def fixture_tabs():
+    with FixtureServer() as server:
+        with contextlib.redirect_stderr(io.StringIO()):
+            scraper = UltimateGuitarScraper(base_url=server.url, use_cache=False, use_corpus=False)
+            results = [scraper.get_tab_content(f"{server.url}/tab/{name}")
+                       for name in ('pre-wonderwall', 'script-hotel-california')]
+        scraper.session.close()
+    return [result for result in results if result.get('content')]
+
+
+def make_records(songs):
+    records = [{'url': result['url'], 'title': result['title'], 'content': result['content']}
+               for result in fixture_tabs()]
+    for song in range(songs):
+        for number, text in enumerate(versions(song), 1):
+            records.append({'url': f"https://tabs.ultimate-guitar.com/tab/artist/song-{song}-tabs-{number}",
+                            'title': f"SONG {song} TAB (ver {number})", 'content': text})
+    return records
+
+
+def disk_usage(paths):
+    """Allocated bytes; small files each take at least one filesystem block"""
+    return sum(path.stat().st_blocks * 512 for path in paths)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def time_reads(read, urls):
+    timings = []
+    for url in urls:
+        start = time.perf_counter()
+        read(url)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return percentile(timings, 0.5), percentile(timings, 0.99)
+
+
+def main():
+    songs = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    reads = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    records = make_records(songs)
+    urls = [random.Random(i).choice(records)['url'] for i in range(reads)]
+    content_bytes = sum(len(record['content'].encode()) for record in records)
+    print(f"{len(records)} tabs, {content_bytes / 1024:.0f} KiB of content; {reads} random reads")
+    print(f"{'format':<22} {'KiB':>8} {'ratio':>6} {'disk KiB':>9} {'open ms':>8} {'p50 us':>7} {'p99 us':>7}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_dir = Path(tmp) / 'json'
+        json_dir.mkdir()
+        paths = {}
+        for i, record in enumerate(records):
+            paths[record['url']] = json_dir / f"{i}.json"
+            paths[record['url']].write_text(json.dumps(record))
+        size = sum(path.stat().st_size for path in paths.values())
+        disk = disk_usage(paths.values())
+
+        def read_json(url):
+            with open(paths[url], encoding='utf-8') as f:
+                return json.load(f)
+
+        p50, p99 = time_reads(read_json, urls)
+        print(f"{'json files':<22} {size / 1024:>8.0f} {content_bytes / size:>6.2f} {disk / 1024:>9.0f} "
+              f"{0:>8.2f} {p50:>7.1f} {p99:>7.1f}")
+
+        for codec in available_codecs():
+            for dict_size, label in ((0, 'no dict'), (None, 'trained dict')):
+                store_dir = Path(tmp) / f"{codec}-{dict_size}"
+                options = {'dict_size': dict_size} if dict_size is not None else {}
+                if dict_size == 0:
+                    options['sample_limit'] = 0
+                build_store(store_dir, records, codec=codec, **options)
+                start = time.perf_counter()
+                store = TabStore(store_dir)
+                open_ms = (time.perf_counter() - start) * 1000
+                for url in urls[:50]:
+                    if store.get(url)['content'] != read_json(url)['content']:
+                        print(f"MISMATCH: {codec} {label} returned different content for {url}", file=sys.stderr)
+                        sys.exit(1)
+                p50, p99 = time_reads(store.get, urls)
+                size = store.stats()['bytes']
+                store.close()
+                disk = disk_usage(store.build.iterdir())
+                name = f"{codec} {label}"
+                print(f"{name:<22} {size / 1024:>8.0f} {content_bytes / size:>6.2f} {disk / 1024:>9.0f} {open_ms:>8.2f} "
+                      f"{p50:>7.1f} {p99:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scraper transport against a throttling stand-in origin
+The origin serves at most CAPACITY requests at once (each takes SERVICE_MS)
+and answers 429 to anything beyond that. Many client threads hammer it
+through three transports:
+
+    no-retry   plain pooled GETs; every 429 is a failed fetch
+    fixed      retries with jittered backoff, concurrency pinned at the maximum
+    adaptive   retries plus AIMD concurrency (the scraper default)
+
+The origin's ceiling is CAPACITY / SERVICE_MS requests per second; a good
+transport completes every request at close to that rate with few 429s.
+
+Usage: python3 tests/performance/benchmark_ug_transport.py [requests] [capacity]
+"""
+
+import contextlib
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ug_bench_common  # noqa: F401 - puts scripts/ on sys.path
+
+from ultimate_guitar_transport import Transport
+
+SERVICE_MS = 20
+CLIENT_THREADS = 16
+
+
+class ThrottlingOrigin:
+    """HTTP server that admits `capacity` concurrent requests and 429s the rest"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.active = 0
+        self.lock = threading.Lock()
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with origin.lock:
+                    admitted = origin.active < origin.capacity
+                    if admitted:
+                        origin.active += 1
+                if not admitted:
+                    self.send_response(429)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                try:
+                    time.sleep(SERVICE_MS / 1000)
+                    self.send_response(200)
+                    self.send_header('Content-Length', '2')
+                    self.end_headers()
+                    self.wfile.write(b'ok')
+                finally:
+                    with origin.lock:
+                        origin.active -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/tab/x"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def run(transport, url, total):
+    def fetch(_):
+        response = transport.get(url, timeout=10)
+        response.close()
+        return response.status_code == 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CLIENT_THREADS) as executor:
+        results = list(executor.map(fetch, range(total)))
+    elapsed = time.perf_counter() - start
+    return sum(results), elapsed
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    ceiling = capacity / (SERVICE_MS / 1000)
+
+    modes = [
+        ('no-retry', dict(max_retries=0, adaptive=False)),
+        ('fixed', dict(adaptive=False)),
+        ('adaptive', dict()),
+    ]
+    print(f"origin: {capacity} concurrent x {SERVICE_MS}ms = {ceiling:.0f} req/s ceiling; "
+          f"{CLIENT_THREADS} client threads, {total} requests")
+    print(f"{'transport':<10} {'ok':>5} {'ok req/s':>9} {'of max':>7} {'429s':>6} {'retries':>8} "
+          f"{'new conns':>10} {'limit':>6}")
+    for name, options in modes:
+        with ThrottlingOrigin(capacity) as origin:
+            transport = Transport(max_concurrency=CLIENT_THREADS, backoff_base=0.05, backoff_cap=2.0, **options)
+            with contextlib.redirect_stderr(io.StringIO()):
+                ok, elapsed = run(transport, origin.url, total)
+            stats = transport.stats()
+            transport.close()
+        limit = next(iter(stats['concurrency_limits'].values()), 0)
+        rate = ok / elapsed
+        print(f"{name:<10} {ok:>5} {rate:>9.1f} {rate / ceiling:>6.0%} {stats['throttled']:>6} "
+              f"{stats['retries']:>8} {stats['new_connections']:>10} {limit:>6}")
+
+
+if __name__ == "__main__":
+    main()
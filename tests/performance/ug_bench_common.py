@@ -0,0 +1,114 @@
+"""
+Shared helpers for the offline Ultimate Guitar scraper benchmarks
+Loads recorded fixture pages, serves them from a local stand-in HTTP server
+and times callables without touching the network.
+"""
+
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+FIXTURES_DIR = REPO_ROOT / 'tests' / 'fixtures' / 'ultimate-guitar'
+
+# The scraper lives in scripts/ and is imported the same way the Node service does
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+
+
+def load_fixtures(pattern):
+    """Return {name: bytes} for fixture pages matching a glob pattern"""
+    pages = {path.name: path.read_bytes() for path in sorted(FIXTURES_DIR.glob(pattern))}
+    if not pages:
+        raise SystemExit(f"No fixtures matching {pattern} in {FIXTURES_DIR}")
+    return pages
+
+
+def time_call(func, arg, repeat):
+    """Run func(arg) repeat times; return (mean_ms, best_ms, last_result)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        timings.append((time.perf_counter() - start) * 1000)
+    return sum(timings) / len(timings), min(timings), result
+
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+class FixtureServer:
+    """Local stand-in for ultimate-guitar.com backed by the fixture directory
+
+    /search.php?value=<query>  -> search-<slug(query)>.html
+    ...&page=<n> (n > 1)       -> search-<slug(query)>-page<n>.html
+    /tab/<name>                -> tab-<name>.html
+    Anything else is a 404 (counted in .misses). Use as a context manager; .url is the base URL.
+    latency delays every response to simulate network round trips.
+    """
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, latency=0.0):
+        self.fixtures_dir = Path(fixtures_dir)
+        # Seconds added before every response, to stand in for a real origin's round trip
+        self.latency = latency
+        self.requests = 0
+        self.misses = 0
+        self.bytes_sent = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; Nagle would hold the body for the delayed ACK
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                body = server.lookup(self.path)
+                if body is None:
+                    server.misses += 1
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                server.requests += 1
+                server.bytes_sent += len(body)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def lookup(self, path):
+        parts = urlsplit(path)
+        if parts.path == '/search.php':
+            params = parse_qs(parts.query)
+            name = f"search-{slugify(params.get('value', [''])[0])}"
+            page = params.get('page', ['1'])[0]
+            name += '.html' if page == '1' else f"-page{page}.html"
+        elif parts.path.startswith('/tab/'):
+            name = f"tab-{slugify(parts.path[len('/tab/'):])}.html"
+        else:
+            return None
+        page = self.fixtures_dir / name
+        return page.read_bytes() if page.exists() else None
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,11 @@
+"""
+Shared setup for the Ultimate Guitar scraper unit tests
+The scraper modules live in scripts/ and are imported the same way the
+benchmarks and the Node service do.
+"""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
@@ -0,0 +1,79 @@
+"""
+Batch mode: every input line gets one NDJSON record, keyed by its line
+index; a bad line or a failed request becomes an error record with the
+exception type and message, and the rest of the batch still runs.
+
+Usage: python3 -m pytest tests/unit/test_ug_batch.py
+"""
+
+import io
+import json
+
+import pytest
+
+from ultimate_guitar_scraper import UltimateGuitarScraper, parse_batch_line, run_batch
+
+TAB_URL = 'https://tabs.example.com/tab/song-1'
+
+
+def make_scraper():
+    scraper = UltimateGuitarScraper(use_cache=False, use_corpus=False, canonicalize_queries=False)
+
+    def search_and_get_tabs(query, limit=5, include_content=False, local=False, collapse_duplicates=False):
+        if query == 'explode':
+            raise ConnectionError('search failed')
+        return [{'title': query, 'limit': limit, 'include_content': include_content}]
+
+    def get_tab_content(url):
+        if url == TAB_URL:
+            return {'success': True, 'content': 'e|--0--|', 'url': url}
+        return {'success': False, 'error': 'HTTP 404', 'url': url}
+
+    scraper.search_and_get_tabs = search_and_get_tabs
+    scraper.get_tab_content = get_tab_content
+    return scraper
+
+
+def run(lines, **options):
+    out = io.StringIO()
+    failed = run_batch(make_scraper(), lines, workers=3, out=out, **options)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    return failed, {record['index']: record for record in records}
+
+
+def test_one_record_per_line_with_errors_inline():
+    lines = [
+        'wonderwall',
+        '# comment lines are skipped',
+        '',
+        TAB_URL,
+        'https://tabs.example.com/tab/missing',
+        '{"query": "hey jude", "limit": 2}',
+        '{"query": ',
+        '{"limit": 3}',
+        'explode',
+    ]
+    failed, records = run(lines, include_content=True)
+    assert sorted(records) == [0, 3, 4, 5, 6, 7, 8]
+    assert failed == 4
+
+    assert records[0]['result'] == [{'title': 'wonderwall', 'limit': 5, 'include_content': True}]
+    assert records[3]['result']['content'] == 'e|--0--|'
+    assert records[5]['result'][0]['limit'] == 2
+    assert records[4]['error'] == {'type': 'RuntimeError', 'message': 'HTTP 404'}
+    assert records[6]['error']['type'] == 'JSONDecodeError'
+    assert records[7]['error'] == {'type': 'ValueError', 'message': "batch request needs a 'query' or 'url'"}
+    assert records[8]['error'] == {'type': 'ConnectionError', 'message': 'search failed'}
+    for index, record in records.items():
+        assert record['input'] == lines[index].strip()
+        assert ('result' in record) != ('error' in record)
+
+
+def test_parse_batch_line_defaults():
+    assert parse_batch_line(TAB_URL, 5, True, False) == {'url': TAB_URL}
+    assert parse_batch_line('song', 7, False, True) == {
+        'query': 'song', 'limit': 7, 'include_content': False, 'local': True, 'collapse_duplicates': False}
+    # Keys given on the line win over the batch defaults
+    assert parse_batch_line('{"query": "song", "local": false}', 5, False, True)['local'] is False
+    with pytest.raises(ValueError):
+        parse_batch_line('{"query": ""}', 5, False, False)
@@ -0,0 +1,118 @@
+"""
+Response cache: per-endpoint TTLs, LRU eviction against a running size
+total, 304 revalidation through the scraper, and hits that rewrite
+last_access at most once per ACCESS_RESOLUTION.
+
+Usage: python3 -m pytest tests/unit/test_ug_cache.py
+"""
+
+import pytest
+
+import ultimate_guitar_cache
+from ultimate_guitar_cache import ACCESS_RESOLUTION, ResponseCache, normalize_url
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ultimate_guitar_cache, 'time', clock)
+    return clock
+
+
+def last_access(cache, url):
+    return cache.db.execute('SELECT last_access FROM responses WHERE url = ?', (normalize_url(url),)).fetchone()[0]
+
+
+def test_ttl_per_endpoint(tmp_path, clock):
+    cache = ResponseCache(tmp_path, ttls={'search': 60})
+    cache.put('https://example.com/search?q=a', 'search', b'results')
+    cache.put('https://example.com/tab/a', 'tab', b'tab')
+    clock.now += 61
+    assert not cache.is_fresh(cache.get('https://example.com/search?q=a'))
+    assert cache.is_fresh(cache.get('https://example.com/tab/a'))
+    # Stale entries are still returned for revalidation; unknown URLs are misses
+    assert cache.get('https://example.com/search?q=a').body == b'results'
+    assert cache.get('https://example.com/other') is None
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (3, 1)
+    cache.close()
+
+
+def test_lru_eviction_keeps_recently_read_entries(tmp_path, clock):
+    cache = ResponseCache(tmp_path, max_bytes=300)
+    for name in 'abc':
+        cache.put(f'https://example.com/{name}', 'tab', b'x' * 100)
+        clock.now += ACCESS_RESOLUTION
+    cache.get('https://example.com/a')
+    cache.put('https://example.com/d', 'tab', b'x' * 100)
+    assert cache.get('https://example.com/b') is None
+    assert all(cache.get(f'https://example.com/{name}') for name in 'acd')
+    assert cache.total_bytes == cache.stats()['bytes'] == 300
+    cache.close()
+
+
+def test_replacing_an_entry_counts_its_size_once(tmp_path, clock):
+    cache = ResponseCache(tmp_path, max_bytes=250)
+    cache.put('https://example.com/a', 'tab', b'x' * 100)
+    cache.put('https://example.com/b', 'tab', b'x' * 100)
+    cache.put('https://example.com/a', 'tab', b'x' * 120)
+    assert cache.total_bytes == 220
+    assert cache.get('https://example.com/b') is not None
+    cache.close()
+    # The total is picked up again from an existing file
+    assert ResponseCache(tmp_path).total_bytes == 220
+
+
+def test_hits_rewrite_last_access_once_per_resolution(tmp_path, clock):
+    cache = ResponseCache(tmp_path)
+    cache.put('https://example.com/a', 'tab', b'body')
+    stored = last_access(cache, 'https://example.com/a')
+    clock.now += ACCESS_RESOLUTION / 2
+    cache.get('https://example.com/a')
+    assert last_access(cache, 'https://example.com/a') == stored
+    clock.now += ACCESS_RESOLUTION
+    cache.get('https://example.com/a')
+    assert last_access(cache, 'https://example.com/a') == clock.now
+    cache.close()
+
+
+class NotModified:
+    status_code = 304
+    ok = False
+    headers = {}
+
+    def close(self):
+        pass
+
+
+def test_stale_entry_is_revalidated_with_a_304(tmp_path, clock):
+    scraper = UltimateGuitarScraper(cache_dir=tmp_path, use_cache=True, use_corpus=False)
+    url = 'https://example.com/tab/a'
+    scraper.cache.put(url, 'tab', b'cached body', etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+    sent = []
+
+    def get(url, headers=None, timeout=None, stream=False):
+        sent.append(headers)
+        return NotModified()
+
+    scraper.transport.get = get
+    # Fresh: served without a request
+    assert scraper._fetch(url, 'tab', timeout=1) == (b'cached body', False)
+    assert sent == []
+
+    clock.now += scraper.cache.ttl_for('tab') + 1
+    assert scraper._fetch(url, 'tab', timeout=1) == (b'cached body', False)
+    assert sent == [{'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}]
+    assert scraper.cache.stats()['revalidated'] == 1
+    # The 304 extended the entry's lifetime
+    assert scraper._fetch(url, 'tab', timeout=1) == (b'cached body', False)
+    assert len(sent) == 1
+    scraper.close()
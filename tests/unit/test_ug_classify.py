@@ -0,0 +1,52 @@
+"""
+Tab content classifier: density is taken over the non-blank lines, however
+the blank lines between them are laid out; CRLF text scores like LF text;
+stopping the scan early never changes the verdict.
+
+Usage: python3 -m pytest tests/unit/test_ug_classify.py
+"""
+
+from ultimate_guitar_classify import _confidence, classify
+
+CHORDS = ['Am   G   C', 'F    C   G', 'Am   F   C   G', 'Dm   Am']
+LYRICS = ['Walking down the road again tonight', 'Thinking of the things we said', 'Calling out your name']
+STANZAS = [[chords] + LYRICS for chords in CHORDS]
+
+
+def sheet(separator):
+    return separator.join('\n'.join(stanza) for stanza in STANZAS)
+
+
+def test_consecutive_blank_lines_are_not_text():
+    single = classify(sheet('\n\n'), threshold=None)
+    assert single.chord_lines == 4
+    expected = round(_confidence({'tab': 0, 'chords': 4, 'section': 0, 'meta': 0}, 16), 3)
+    assert single.confidence == expected
+    for separator in ('\n\n\n', '\n\n\n\n\n', '\n  \n\t\n', '\r\n\r\n\r\n'):
+        assert classify(sheet(separator), threshold=None) == single, repr(separator)
+
+
+def test_leading_and_trailing_blank_lines():
+    single = classify(sheet('\n\n'), threshold=None)
+    assert classify('\n\n\n' + sheet('\n\n') + '\n\n\n\n', threshold=None) == single
+
+
+def test_crlf_line_endings():
+    lf = classify(sheet('\n\n'), threshold=None)
+    crlf = classify(sheet('\n\n').replace('\n', '\r\n'), threshold=None)
+    assert crlf.chord_lines == 4
+    assert crlf == lf
+
+
+def test_early_exit_keeps_the_verdict():
+    samples = [
+        '[Intro]\n[Verse]\n[Chorus]\n[Bridge]\nAm G\nsome words here ok\n[Outro]\nC G\n',
+        '[Intro]\n[Verse]\n[Chorus]\n[Bridge]\nAm G\nsome words here ok\n[Outro]\n',
+        'Capo 2\n[Verse]\n[Chorus]\nA\nwords that go on\n[Bridge]\n[Outro]\n',
+        sheet('\n\n'),
+        'e|--0--2--3--|\nB|--1--3--3--|\nG|--0--2--0--|\n' * 3,
+    ]
+    for text in samples:
+        for content in (text, text.replace('\n', '\r\n')):
+            full = classify(content, threshold=None)
+            assert (classify(content).confidence >= 0.5) == (full.confidence >= 0.5), repr(content)
@@ -0,0 +1,94 @@
+"""
+search_and_get_tabs: near-duplicate versions are folded only when the
+caller asks, on the network and the local corpus paths alike, so the
+JSON-RPC server and batch mode list every result.
+
+Usage: python3 -m pytest tests/unit/test_ug_collapse.py
+"""
+
+import io
+import json
+
+from ultimate_guitar_corpus import TabCorpus
+from ultimate_guitar_scraper import UltimateGuitarScraper, run_batch
+from ultimate_guitar_server import ScraperServer
+
+URLS = [f'https://tabs.example.com/tab/song-{version}' for version in (1, 2, 3)]
+# Versions 1 and 2 share their text; version 3 is a different arrangement
+SIMHASHES = {URLS[0]: '0f0f0f0f0f0f0f0f', URLS[1]: '0f0f0f0f0f0f0f0f', URLS[2]: '7777000077770000'}
+
+
+def make_scraper():
+    scraper = UltimateGuitarScraper(use_cache=False, use_corpus=False, canonicalize_queries=False)
+    scraper.search_tabs = lambda query, limit=5: [{'title': 'Song', 'url': url} for url in URLS][:limit]
+    scraper.get_tab_content = lambda url: {'success': True, 'content': url, 'simhash': SIMHASHES[url]}
+    return scraper
+
+
+def test_every_result_by_default():
+    tabs = make_scraper().search_and_get_tabs('song', include_content=True)
+    assert [tab['url'] for tab in tabs] == URLS
+    assert not any('near_duplicates' in tab for tab in tabs)
+
+
+def test_collapse_on_request():
+    tabs = make_scraper().search_and_get_tabs('song', include_content=True, collapse_duplicates=True)
+    assert [tab['url'] for tab in tabs] == [URLS[0], URLS[2]]
+    assert tabs[0]['near_duplicates'] == [URLS[1]]
+
+
+def test_server_lists_every_result(monkeypatch):
+    monkeypatch.setenv('UG_NO_CACHE', '1')
+    monkeypatch.setenv('UG_NO_CORPUS', '1')
+    out = io.StringIO()
+    server = ScraperServer(workers=1, stdin=io.StringIO(), stdout=out)
+    server.scraper = make_scraper()
+    server._handle_line(json.dumps({'id': 1, 'method': 'search_and_get_tabs',
+                                    'params': {'query': 'song', 'include_content': True}}))
+    server.executor.shutdown()
+    response = json.loads(out.getvalue().splitlines()[-1])
+    assert [tab['url'] for tab in response['result']] == URLS
+
+
+def test_batch_collapse_per_request():
+    out = io.StringIO()
+    lines = ['song', json.dumps({'query': 'song', 'collapse_duplicates': True})]
+    run_batch(make_scraper(), lines, workers=1, include_content=True, out=out)
+    records = sorted((json.loads(line) for line in out.getvalue().splitlines()), key=lambda record: record['index'])
+    assert [len(record['result']) for record in records] == [3, 2]
+
+
+TEXT = '\n'.join(['[Verse]', 'Am   G   C   F', 'e|--0--3--0--1--|', 'B|--1--0--1--1--|'] * 4)
+OTHER = '\n'.join(['[Chorus]', 'Dm   Bb   F   C', 'e|--1--1--5--3--|', 'B|--3--3--6--5--|'] * 4)
+
+
+def make_local_scraper(tmp_path):
+    scraper = UltimateGuitarScraper(use_cache=False, use_corpus=False, canonicalize_queries=False)
+    scraper.corpus = TabCorpus(tmp_path / 'corpus.sqlite3')
+    scraper.corpus.store_tabs([{'url': url, 'title': 'Song', 'artist': 'Artist', 'votes': 10 - i}
+                               for i, url in enumerate(URLS)])
+    scraper.corpus.store_contents([(URLS[0], {'success': True, 'content': TEXT}),
+                                   (URLS[1], {'success': True, 'content': TEXT}),
+                                   (URLS[2], {'success': True, 'content': OTHER})])
+    return scraper
+
+
+def test_local_search_lists_every_result(tmp_path):
+    scraper = make_local_scraper(tmp_path)
+    assert sorted(tab['url'] for tab in scraper.search_tabs_local('song')) == URLS
+    tabs = scraper.search_and_get_tabs('song', include_content=True, local=True)
+    assert sorted(tab['url'] for tab in tabs) == URLS
+    assert not any('near_duplicates' in tab for tab in tabs)
+    scraper.corpus.close()
+
+
+def test_local_search_collapses_on_request(tmp_path):
+    scraper = make_local_scraper(tmp_path)
+    for tabs in (scraper.search_tabs_local('song', collapse_duplicates=True),
+                 scraper.search_and_get_tabs('song', include_content=True, local=True, collapse_duplicates=True)):
+        kept = {tab['url']: tab.get('near_duplicates', []) for tab in tabs}
+        # One of the two identical versions is kept and lists the other
+        assert len(kept) == 2 and URLS[2] in kept
+        original = next(url for url in kept if url != URLS[2])
+        assert sorted([original] + kept[original]) == URLS[:2]
+    scraper.corpus.close()
@@ -0,0 +1,88 @@
+"""
+FetchEngine.stream: results come back in input order, at most `window`
+fetches run at once, URLs are consumed lazily, and closing the generator
+returns at once and submits nothing more.
+
+Usage: python3 -m pytest tests/unit/test_ug_fetch_stream.py
+"""
+
+import threading
+import time
+
+from ultimate_guitar_fetch import FetchEngine
+
+
+def engine(max_concurrency=4):
+    return FetchEngine(max_concurrency=max_concurrency, requests_per_second=1000, burst=1000)
+
+
+def url(i):
+    return f'https://tabs.example.com/tab/{i}'
+
+
+def test_input_order_within_the_window():
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def fetch(address):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        # Earlier URLs are slower, so completion order is not input order
+        time.sleep(0.001 * (12 - int(address.rsplit('/', 1)[1])))
+        with lock:
+            running[0] -= 1
+        return address
+
+    urls = [url(i) for i in range(12)]
+    assert list(engine().stream(fetch, urls, window=2)) == urls
+    assert running[1] <= 2
+    # The window never exceeds the engine's concurrency
+    running[1] = 0
+    assert list(engine(max_concurrency=3).stream(fetch, urls, window=50)) == urls
+    assert running[1] <= 3
+
+
+def test_urls_are_consumed_lazily():
+    consumed = []
+
+    def urls():
+        for i in range(100):
+            consumed.append(i)
+            yield url(i)
+
+    results = engine().stream(lambda address: address, urls(), window=3)
+    assert consumed == []
+    assert next(results) == url(0)
+    # The first window plus one refill
+    assert len(consumed) == 4
+    results.close()
+    assert len(consumed) == 4
+
+
+def test_close_returns_without_waiting_and_starts_nothing_new():
+    release = threading.Event()
+    started = []
+    lock = threading.Lock()
+
+    def fetch(address):
+        with lock:
+            started.append(address)
+        if address != url(0):
+            assert release.wait(5)
+        return address
+
+    results = engine().stream(fetch, (url(i) for i in range(10)), window=3)
+    assert next(results) == url(0)
+    began = time.monotonic()
+    results.close()
+    # The fetches still running are abandoned, not waited for
+    assert time.monotonic() - began < 1
+    release.set()
+    time.sleep(0.05)
+    # Only the first window and its one refill were ever submitted
+    assert set(started) <= {url(i) for i in range(4)}
+
+
+def test_empty_input():
+    assert list(engine().stream(lambda address: address, [])) == []
@@ -0,0 +1,51 @@
+"""
+HTML fallback results: the artist comes from the first artist node, and an
+empty one falls back to the first td, div and then span artist node, as the
+original lookup did, on every parser backend and both extraction paths.
+
+Usage: python3 -m pytest tests/unit/test_ug_html_results.py
+"""
+
+import contextlib
+import io
+
+import pytest
+
+from ultimate_guitar_parsers import available_backends
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+ROW = ('<div class="search-result">{artists}'
+       '<a href="/tab/band/song-chords-1">Song</a></div>')
+
+
+@pytest.fixture(params=available_backends())
+def scraper(request):
+    with contextlib.redirect_stderr(io.StringIO()):
+        yield UltimateGuitarScraper(use_cache=False, use_corpus=False, parser_backend=request.param)
+
+
+def artists_of(scraper, artists):
+    page = f'<html><body><main>{ROW.format(artists=artists)}</main></body></html>'.encode()
+    doc = scraper.parser.parse(page)
+    with contextlib.redirect_stderr(io.StringIO()):
+        via_page = [tab['artist'] for tab in scraper._parse_html_results(doc, 5)]
+    via_element = scraper._extract_tab_from_element(doc.select('.search-result')[0])['artist']
+    return via_page, via_element
+
+
+@pytest.mark.parametrize('artists, expected', [
+    ('<span class="artist">First</span><div class="artist">Div</div>', 'First'),
+    # The next artist node in document order is an <a>; the original lookup went to the div
+    ('<span class="artist"> </span><a class="artist-link">Link</a><div class="Artist">Div</div>', 'Div'),
+    ('<b class="artist"></b><span class="artist">Span</span><td class="artist"></td>', 'Span'),
+])
+def test_artist_fallback_order(scraper, artists, expected):
+    assert artists_of(scraper, artists) == ([expected], expected)
+
+
+def test_no_artist_text_splits_the_title(scraper):
+    page = b'<html><body><p><a href="/tab/x/y-1">Band - Song</a></p></body></html>'
+    doc = scraper.parser.parse(page)
+    with contextlib.redirect_stderr(io.StringIO()):
+        tabs = scraper._parse_html_results(doc, 5)
+    assert [(tab['artist'], tab['title']) for tab in tabs] == [('Band', 'Song')]
@@ -0,0 +1,47 @@
+"""
+js-store payload: decoded exactly once on every parser backend, whichever
+extractor the backend uses.
+
+Usage: python3 -m pytest tests/unit/test_ug_js_store.py
+"""
+
+import contextlib
+import html
+import io
+import json
+
+import pytest
+
+from ultimate_guitar_parsers import available_backends
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+# Text that is itself entity-like must survive; a second unescape turns "&amp;" into "&"
+STORE = {'store': {'page': {'data': {'results': [
+    {'song_name': 'Tom &amp; Jerry "Live"', 'artist_name': "Rock <b>'n'</b> Roll", 'tab_url': '/tab/1?a=1&b=2'},
+]}}}}
+
+
+def page(store):
+    return (f'<html><body><div class="js-store" data-content="{html.escape(json.dumps(store))}"></div>'
+            f'</body></html>').encode()
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_payload_round_trips(backend):
+    with contextlib.redirect_stderr(io.StringIO()):
+        scraper = UltimateGuitarScraper(use_cache=False, use_corpus=False, parser_backend=backend)
+    assert scraper._load_js_store(page(STORE)) == STORE
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_byte_scan_matches_dom(backend):
+    with contextlib.redirect_stderr(io.StringIO()):
+        scraper = UltimateGuitarScraper(use_cache=False, use_corpus=False, parser_backend=backend)
+    body = page(STORE)
+    assert scraper._extract_js_store_fast(body) == scraper._extract_js_store_dom(body)
+
+
+def test_page_without_store():
+    with contextlib.redirect_stderr(io.StringIO()):
+        scraper = UltimateGuitarScraper(use_cache=False, use_corpus=False)
+    assert scraper._load_js_store(b'<html><body><p>No results</p></body></html>') is None
@@ -0,0 +1,42 @@
+"""
+search_tabs_local: filters apply on the network fallback too; has_content
+keeps only the results whose text the corpus holds.
+
+Usage: python3 -m pytest tests/unit/test_ug_local_search.py
+"""
+
+from ultimate_guitar_corpus import TabCorpus
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+URLS = [f'https://tabs.example.com/tab/song-{version}' for version in (1, 2, 3)]
+TEXT = '\n'.join(['[Verse]', 'Am   G   C   F', 'e|--0--3--0--1--|'] * 4)
+
+
+def make_scraper(tmp_path=None):
+    scraper = UltimateGuitarScraper(use_cache=False, use_corpus=False, canonicalize_queries=False)
+    scraper.search_tabs = lambda query, limit=5: [
+        {'title': 'Song', 'artist': 'Artist', 'type': 'Chords' if i else 'Tab', 'url': url}
+        for i, url in enumerate(URLS)][:limit]
+    if tmp_path is not None:
+        scraper.corpus = TabCorpus(tmp_path / 'corpus.sqlite3')
+        # Known to the corpus under a title the query does not match, so the search falls back
+        scraper.corpus.store_tabs([{'url': URLS[1], 'title': 'Elsewhere', 'artist': 'Nobody'}])
+        scraper.corpus.store_contents([(URLS[1], {'success': True, 'content': TEXT})])
+    return scraper
+
+
+def test_fallback_applies_filters():
+    tabs = make_scraper().search_tabs_local('song', filters={'type': 'chords'})
+    assert [tab['url'] for tab in tabs] == URLS[1:]
+
+
+def test_fallback_has_content_keeps_tabs_with_stored_text(tmp_path):
+    scraper = make_scraper(tmp_path)
+    assert [tab['url'] for tab in scraper.search_tabs_local('song')] == URLS
+    tabs = scraper.search_tabs_local('song', filters={'has_content': True})
+    assert [tab['url'] for tab in tabs] == [URLS[1]]
+    scraper.corpus.close()
+
+
+def test_fallback_has_content_without_a_corpus():
+    assert make_scraper().search_tabs_local('song', filters={'has_content': True}) == []
@@ -0,0 +1,129 @@
+"""
+Response cache: bodies whose download stopped early are flagged partial.
+Tab downloads stop only at the page data, and a page whose page data holds
+no tab is fetched again in full for the <pre> fallback.
+
+Usage: python3 -m pytest tests/unit/test_ug_partial_cache.py
+"""
+
+import html
+import json
+import sqlite3
+
+from ultimate_guitar_cache import ResponseCache
+from ultimate_guitar_scraper import UltimateGuitarScraper
+
+TAB_URL = 'https://tabs.example.com/tab/oasis/wonderwall-chords-27596'
+TAB = '\n'.join(['Em7        G', 'Today is gonna be the day', 'e|-----3-----|', 'B|-----3-----|',
+                 'G|---0---0---|', 'D|---2---2---|', 'A|-2-------2-|', 'E|-----------|'] * 6)
+
+
+class FakeResponse:
+    """A streamed 200 response, served in small chunks"""
+
+    def __init__(self, body, chunk_size=512):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.status_code = 200
+        self.ok = True
+        self.headers = {}
+
+    @property
+    def content(self):
+        return self.body
+
+    def iter_content(self, chunk_size=None):
+        for start in range(0, len(self.body), self.chunk_size):
+            yield self.body[start:start + self.chunk_size]
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def page(before, after, content=None):
+    """A tab page: `before` markup, the page data, then `after` markup"""
+    data = {'tab': {'song_name': 'Wonderwall', 'artist_name': 'Oasis', 'version': 2},
+            'tab_view': {'meta': {'capo': 2}, 'wiki_tab': {'content': content}}}
+    store = html.escape(json.dumps({'store': {'page': {'data': data}}}))
+    return (f'<html><head><title>WONDERWALL CHORDS</title></head><body>{before}'
+            f'<div class="js-store" data-content="{store}"></div>{after}</body></html>').encode()
+
+
+FILLER = '<p>comments</p>' * 2000
+PRE = f'<pre>{html.escape(TAB)}</pre>'
+
+
+def make_scraper(tmp_path, body, requests):
+    scraper = UltimateGuitarScraper(cache_dir=tmp_path, use_cache=True, use_corpus=False,
+                                    canonicalize_queries=False, tab_page_memo_size=0)
+
+    def get(url, headers=None, timeout=None, stream=False):
+        requests.append(stream)
+        return FakeResponse(body)
+
+    scraper.transport.get = get
+    return scraper
+
+
+def test_partial_flag_round_trips(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put('https://example.com/a', 'tab', b'<html>', partial=True)
+    cache.put('https://example.com/b', 'tab', b'<html></html>')
+    assert cache.get('https://example.com/a').partial is True
+    assert cache.get('https://example.com/b').partial is False
+    cache.close()
+
+
+def test_cache_without_partial_column_is_upgraded(tmp_path):
+    db = sqlite3.connect(str(tmp_path / 'responses.sqlite3'))
+    db.execute('CREATE TABLE responses (url TEXT PRIMARY KEY, endpoint TEXT NOT NULL, body BLOB NOT NULL, '
+               'size INTEGER NOT NULL, etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL, '
+               'expires_at REAL NOT NULL, last_access REAL NOT NULL)')
+    db.execute("INSERT INTO responses VALUES ('https://example.com/', 'tab', x'00', 1, NULL, NULL, 0, 9e12, 0)")
+    db.commit()
+    db.close()
+    cache = ResponseCache(tmp_path)
+    assert cache.get('https://example.com/').partial is False
+    cache.close()
+
+
+def test_pre_before_the_page_data_keeps_its_metadata(tmp_path):
+    requests = []
+    scraper = make_scraper(tmp_path, page(PRE + FILLER, ''), requests)
+    result = scraper.get_tab_content(TAB_URL)
+    assert result['content'].strip() == TAB
+    assert result['metadata']['song'] == 'Wonderwall'
+    assert result['metadata']['capo'] == 2
+    assert requests == [True]
+
+    # A cache hit gives the same result without the network
+    again = scraper.get_tab_content(TAB_URL)
+    assert again['metadata']['capo'] == 2
+    assert requests == [True]
+
+
+def test_page_data_with_a_tab_ends_the_download(tmp_path):
+    requests = []
+    scraper = make_scraper(tmp_path, page('', FILLER, content=TAB), requests)
+    result = scraper.get_tab_content(TAB_URL)
+    assert result['content'] == TAB
+    assert result['metadata']['capo'] == 2
+    assert requests == [True]
+    assert scraper.cache.get(TAB_URL).partial is True
+
+
+def test_page_data_without_a_tab_fetches_the_pre_fallback(tmp_path):
+    requests = []
+    scraper = make_scraper(tmp_path, page('', FILLER + PRE, content='Intro: see below'), requests)
+    result = scraper.get_tab_content(TAB_URL)
+    assert result['content'].strip() == TAB
+    assert result['metadata']['song'] == 'Wonderwall'
+    # Stopped at the page data, then fetched whole; the whole page replaces the partial entry
+    assert requests == [True, False]
+    assert scraper.cache.get(TAB_URL).partial is False
+
+    scraper.get_tab_content(TAB_URL)
+    assert requests == [True, False]
@@ -0,0 +1,43 @@
+"""
+Query canonicalization: variants fold onto an earlier search only when it
+searched for the same title.
+
+Usage: python3 -m pytest tests/unit/test_ug_query.py
+"""
+
+from ultimate_guitar_query import QueryResolver
+
+OASIS = [{'title': 'Wonderwall', 'artist': 'Oasis'}, {'title': 'Champagne Supernova', 'artist': 'Oasis'}]
+WONDERWALL = [{'title': 'Wonderwall', 'artist': 'Ryan Adams'}, {'title': 'Wonderwall', 'artist': 'Oasis'}]
+
+
+def test_artist_search_does_not_answer_its_titles():
+    resolver = QueryResolver()
+    resolver.learn('oasis', OASIS)
+    for query in ('wonderwall', 'champagne supernova', 'Wonderwall chords', 'oasis wonderwall', 'wonderwal'):
+        upstream, how = resolver.resolve(query)
+        assert upstream != 'oasis', query
+        assert how == 'new', query
+
+
+def test_variants_fold_onto_the_title_search():
+    resolver = QueryResolver()
+    resolver.learn('oasis', OASIS)
+    resolver.learn('wonderwall', WONDERWALL)
+    assert resolver.resolve('Wonderwall chords') == ('wonderwall', 'exact')
+    assert resolver.resolve('wonderwal') == ('wonderwall', 'fuzzy')
+    assert resolver.resolve('oasis wonderwall') == ('wonderwall', 'artist')
+    assert resolver.resolve('Oasis tabs') == ('oasis', 'exact')
+
+
+def test_alias_expansion_is_the_same_search():
+    resolver = QueryResolver()
+    resolver.learn('led zep', [])
+    assert resolver.resolve('Led Zeppelin') == ('led zep', 'exact')
+
+
+def test_rank_puts_the_named_artist_first():
+    resolver = QueryResolver()
+    ranked = resolver.rank('oasis wonderwall', WONDERWALL)
+    assert [tab['artist'] for tab in ranked] == ['Oasis', 'Ryan Adams']
+    assert resolver.rank('blur wonderwall', WONDERWALL) is None
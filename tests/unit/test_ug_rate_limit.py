@@ -0,0 +1,93 @@
+"""
+Per-host token buckets: a burst goes through at once, then calls are paced
+at the configured rate, each host on its own budget; FetchEngine.map keeps
+input order under the concurrency bound.
+
+Usage: python3 -m pytest tests/unit/test_ug_rate_limit.py
+"""
+
+import threading
+import time
+
+import pytest
+
+import ultimate_guitar_fetch
+from ultimate_guitar_fetch import FetchEngine, HostRateLimiter, TokenBucket
+
+
+class Clock:
+    """monotonic() and sleep() for the fetch module; sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ultimate_guitar_fetch, 'time', clock)
+    return clock
+
+
+def test_burst_then_paced(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+    for _ in range(4):
+        bucket.acquire()
+    # One token every half second once the burst is spent
+    assert clock.now == pytest.approx(102.0)
+    assert clock.sleeps == pytest.approx([0.5] * 4)
+
+
+def test_idle_time_refills_up_to_the_burst(clock):
+    bucket = TokenBucket(rate=1, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == pytest.approx([1.0])
+
+
+def test_hosts_have_separate_budgets(clock):
+    limiter = HostRateLimiter(rate=1, burst=1)
+    limiter.acquire('https://tabs.example.com/tab/1')
+    limiter.acquire('https://other.example.com/tab/1')
+    assert clock.sleeps == []
+    # Host names are case-insensitive
+    limiter.acquire('https://TABS.example.com/tab/2')
+    assert clock.sleeps == pytest.approx([1.0])
+    assert sorted(limiter.buckets) == ['other.example.com', 'tabs.example.com']
+
+
+def test_map_keeps_order_under_the_concurrency_bound():
+    engine = FetchEngine(max_concurrency=3, requests_per_second=1000, burst=1000)
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def fetch(url):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        # Later URLs finish first
+        time.sleep(0.002 * (10 - int(url.rsplit('/', 1)[1])))
+        with lock:
+            running[0] -= 1
+        return url.upper()
+
+    urls = [f'https://tabs.example.com/tab/{i}' for i in range(10)]
+    assert engine.map(fetch, urls) == [url.upper() for url in urls]
+    assert running[1] <= 3
+    assert engine.map(fetch, []) == []
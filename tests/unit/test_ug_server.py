@@ -0,0 +1,82 @@
+"""
+JSON-RPC server restart: a swapped-out scraper closes its session, cache
+and corpus as soon as its own calls drain, even while calls on the fresh
+scraper keep the server busy.
+
+Usage: python3 -m pytest tests/unit/test_ug_server.py
+"""
+
+import io
+import json
+import threading
+
+import ultimate_guitar_server
+from ultimate_guitar_server import ScraperServer
+
+
+class FakeScraper:
+    def __init__(self):
+        self.closed = threading.Event()
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def search_tabs(self, query):
+        self.started.set()
+        assert self.release.wait(5)
+        assert not self.closed.is_set()
+        return [query]
+
+    def close(self):
+        assert not self.closed.is_set(), "closed twice"
+        self.closed.set()
+
+
+def make_server(monkeypatch):
+    scrapers = []
+
+    def create():
+        scrapers.append(FakeScraper())
+        return scrapers[-1]
+
+    monkeypatch.setattr(ultimate_guitar_server, 'UltimateGuitarScraper', create)
+    out = io.StringIO()
+    return ScraperServer(workers=4, stdin=io.StringIO(), stdout=out), scrapers, out
+
+
+def call(server, request_id, query='song'):
+    server._handle_line(json.dumps({'id': request_id, 'method': 'search_tabs', 'params': {'query': query}}))
+
+
+def test_idle_scraper_closes_on_restart(monkeypatch):
+    server, scrapers, out = make_server(monkeypatch)
+    server.restart()
+    assert scrapers[0].closed.is_set()
+    assert server.scraper is scrapers[1] and not scrapers[1].closed.is_set()
+    server.shutdown()
+    assert scrapers[1].closed.is_set()
+
+
+def test_old_scraper_closes_when_its_own_calls_drain(monkeypatch):
+    server, scrapers, out = make_server(monkeypatch)
+    old = scrapers[0]
+    call(server, 1)
+    assert old.started.wait(5)
+
+    server.restart()
+    new = scrapers[1]
+    call(server, 2)
+    assert new.started.wait(5)
+    assert not old.closed.is_set()
+
+    # The fresh scraper's call is still running, so the server as a whole never goes idle
+    old.release.set()
+    assert old.closed.wait(5)
+    assert not new.closed.is_set()
+    assert server.in_flight == 1 and server.scraper_calls == {new: 1}
+
+    new.release.set()
+    server.shutdown()
+    assert new.closed.is_set()
+    responses = {message['id']: message for message in map(json.loads, out.getvalue().splitlines())}
+    assert responses[1]['result'] == responses[2]['result'] == ['song']
+    assert not server.scraper_calls and not server.retired
@@ -0,0 +1,94 @@
+"""
+SingleFlight: concurrent calls with one key run once and every waiter gets
+its own copy of the result, or the leader's exception; nothing is cached
+after the call completes.
+
+Usage: python3 -m pytest tests/unit/test_ug_single_flight.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from ultimate_guitar_fetch import SingleFlight
+
+WAITERS = 5
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def fan_out(flights, fn, key='tab'):
+    """Start a leader and WAITERS followers on one key; returns (leader outcome, follower outcomes)"""
+    release = threading.Event()
+    outcomes = [None] * (WAITERS + 1)
+
+    def gated():
+        assert release.wait(5)
+        return fn()
+
+    def call(index):
+        try:
+            outcomes[index] = ('ok', flights.do(key, gated))
+        except Exception as e:
+            outcomes[index] = ('error', e)
+
+    threads = [threading.Thread(target=call, args=(0,))]
+    threads[0].start()
+    wait_for(lambda: flights.stats()['in_flight'] == 1)
+    threads += [threading.Thread(target=call, args=(i,)) for i in range(1, WAITERS + 1)]
+    for thread in threads[1:]:
+        thread.start()
+    wait_for(lambda: flights.stats()['coalesced'] == WAITERS)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes[0], outcomes[1:]
+
+
+def test_waiters_share_one_execution():
+    flights = SingleFlight()
+    runs = []
+    leader, followers = fan_out(flights, lambda: runs.append(1) or {'tabs': ['a', 'b']})
+    assert runs == [1]
+    assert leader == ('ok', {'tabs': ['a', 'b']})
+    assert all(outcome == leader for outcome in followers)
+    # Every caller gets its own copy, so one caller's edits reach no one else
+    results = [leader[1]] + [outcome[1] for outcome in followers]
+    assert len({id(result) for result in results}) == len(results)
+    results[1]['tabs'].append('c')
+    assert results[2]['tabs'] == ['a', 'b']
+    assert flights.stats() == {'executed': 1, 'coalesced': WAITERS, 'in_flight': 0}
+
+
+def test_error_reaches_every_waiter():
+    flights = SingleFlight()
+
+    def fail():
+        raise ValueError('upstream down')
+
+    leader, followers = fan_out(flights, fail)
+    for kind, error in [leader] + followers:
+        assert kind == 'error' and isinstance(error, ValueError) and str(error) == 'upstream down'
+    assert flights.stats()['in_flight'] == 0
+
+
+def test_completed_calls_are_not_cached():
+    flights = SingleFlight()
+    counter = iter(range(10))
+    assert flights.do('tab', lambda: next(counter)) == 0
+    assert flights.do('tab', lambda: next(counter)) == 1
+    with pytest.raises(KeyError):
+        flights.do('tab', lambda: {}['missing'])
+    assert flights.do('tab', lambda: next(counter)) == 2
+    assert flights.stats() == {'executed': 4, 'coalesced': 0, 'in_flight': 0}
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight()
+    assert [flights.do(key, lambda key=key: key * 2) for key in ('a', 'b')] == ['aa', 'bb']
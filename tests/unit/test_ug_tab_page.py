@@ -0,0 +1,113 @@
+"""
+Tab pages: text and metadata come from the decoded page data (the js-store
+attribute or an inline UGAPP store), including bodies cut off right after
+the page data; pages whose data holds no tab fall back to <pre>.
+
+Usage: python3 -m pytest tests/unit/test_ug_tab_page.py
+"""
+
+import contextlib
+import html
+import io
+import json
+
+import pytest
+
+from ultimate_guitar_parsers import available_backends
+from ultimate_guitar_scraper import UltimateGuitarScraper
+from ultimate_guitar_stream import JsStoreScanner, read_until
+
+TAB_URL = 'https://tabs.example.com/tab/oasis/wonderwall-chords-27596'
+LINES = ['[Verse]', '[ch]Em7[/ch]        [ch]G[/ch]', 'Today is gonna be the day',
+         '[tab]e|-----3-----|', 'B|-----3-----|', 'G|---0---0---|[/tab]']
+TAB = '\n'.join(line.replace('[ch]', '').replace('[/ch]', '').replace('[tab]', '').replace('[/tab]', '')
+                for line in LINES * 4)
+DATA = {
+    'tab': {'song_name': 'Wonderwall', 'artist_name': 'Oasis', 'type': 'Chords', 'version': 2,
+            'username': 'uploader', 'rating': 4.8, 'votes': 1200, 'tonality_name': 'Em'},
+    'tab_view': {'meta': {'capo': 2, 'tuning': {'name': 'Standard', 'value': 'E A D G B E'}, 'difficulty': 'novice'},
+                 'wiki_tab': {'content': '\r\n'.join(LINES * 4)}},
+}
+METADATA = {'song': 'Wonderwall', 'artist': 'Oasis', 'type': 'Chords', 'tuning': 'E A D G B E', 'capo': 2,
+            'key': 'Em', 'author': 'uploader', 'version': 2, 'rating': 4.8, 'votes': 1200, 'difficulty': 'novice'}
+FILLER = '<p>comments</p>' * 2000
+
+
+def js_store_page(data, before='', after=FILLER):
+    store = html.escape(json.dumps({'store': {'page': {'data': data}}}))
+    return (f'<html><head><title>WONDERWALL CHORDS by Oasis</title></head><body>{before}'
+            f'<div class="js-store" data-content="{store}"></div>{after}</body></html>').encode()
+
+
+class ChunkedResponse:
+    def __init__(self, body, chunk_size=512):
+        self.body = body
+        self.chunk_size = chunk_size
+
+    def iter_content(self, chunk_size=None):
+        for start in range(0, len(self.body), self.chunk_size):
+            yield self.body[start:start + self.chunk_size]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(params=available_backends())
+def scraper(request):
+    with contextlib.redirect_stderr(io.StringIO()):
+        yield UltimateGuitarScraper(use_cache=False, use_corpus=False, parser_backend=request.param)
+
+
+def extract(scraper, body):
+    with contextlib.redirect_stderr(io.StringIO()):
+        return scraper._extract_tab_page(body, TAB_URL)
+
+
+def test_text_and_metadata_from_the_js_store(scraper):
+    result = extract(scraper, js_store_page(DATA))
+    # Chord/tab markup is stripped and CRLF normalized
+    assert result['content'] == TAB
+    assert result['metadata'] == METADATA
+    assert result['title'] == 'WONDERWALL CHORDS by Oasis'
+    assert result['success'] and result['confidence'] >= 0.5
+
+
+def test_partial_body_cut_after_the_page_data(scraper):
+    full = js_store_page(DATA)
+    body, stopped_early = read_until(ChunkedResponse(full), JsStoreScanner())
+    assert stopped_early and len(body) < len(full) and not body.endswith(b'</html>')
+    assert extract(scraper, body) == extract(scraper, full)
+
+
+@pytest.mark.parametrize('assignment', [
+    f'window.UGAPP.store = {json.dumps({"page": {"data": DATA}})}',
+    f'window.UGAPP.store = {json.dumps({"store": {"page": {"data": DATA}}})}',
+    f'window.UGAPP.store.page = {json.dumps({"data": DATA})}',
+])
+def test_inline_ugapp_store(scraper, assignment):
+    script = f'{assignment}; window.UGAPP.ready = true;'
+    body = f'<html><head><title>Wonderwall</title><script>{script}</script></head><body></body></html>'.encode()
+    result = extract(scraper, body)
+    assert (result['content'], result['metadata']) == (TAB, METADATA)
+
+
+def test_page_data_without_a_tab_falls_back_to_pre(scraper):
+    data = {**DATA, 'tab_view': {**DATA['tab_view'], 'wiki_tab': {'content': 'See the video lesson'}}}
+    body = js_store_page(data, after=f'<pre>{html.escape(TAB)}</pre>')
+    result = extract(scraper, body)
+    assert result['content'] == TAB
+    # The page data still supplies the metadata
+    assert result['metadata'] == METADATA
+
+
+def test_unreadable_page_data(scraper):
+    body = (b'<html><body><div class="js-store" data-content="{&quot;store&quot;: "></div>'
+            b'<pre>' + html.escape(TAB).encode() + b'</pre></body></html>')
+    result = extract(scraper, body)
+    assert (result['content'], result['metadata'], result['title']) == (TAB, {}, 'Unknown')
+
+
+def test_no_tab_anywhere(scraper):
+    result = extract(scraper, js_store_page({'tab': {'song_name': 'Intro'}}, after='<p>nothing here</p>'))
+    assert result['success'] and result['content'] is None and result['confidence'] == 0.0
+    assert result['metadata']['song'] == 'Intro'
@@ -0,0 +1,138 @@
+"""
+Array-backed tablature model: parse_tab, transpose, retune and
+batch_statistics.
+
+Usage: python3 -m pytest tests/unit/test_ug_tablature.py
+"""
+
+import numpy as np
+import pytest
+
+from ultimate_guitar_tablature import (NO_NOTE, STANDARD_TUNING, batch_statistics, parse_tab, transpose_chord,
+                                       tuning_from_names)
+
+TAB = """Capo 2
+Tuning: E A D G B E
+120 BPM
+Key: Am
+
+[Intro]
+Am      G/B     C
+e|--0-----3---|--------12--|
+B|--1-----0---|-----10-----|
+G|--2-----0---|--9---------|
+D|--2-----0---|------------|
+A|--0-----2---|------------|
+E|--------3---|------------|
+"""
+
+DROP_D = """[ch]D5[/ch]
+[tab]e|-----------|
+B|-----------|
+G|-----------|
+D|--0--5--7--|
+A|--0--5--7--|
+D|--0--5--7--|[/tab]
+"""
+
+NO = NO_NOTE
+
+
+def test_parse_tab():
+    tab = parse_tab(TAB)
+    assert tab.frets.tolist() == [
+        [0, 3, NO, NO, 12],
+        [1, 0, NO, 10, NO],
+        [2, 0, 9, NO, NO],
+        [2, 0, NO, NO, NO],
+        [0, 2, NO, NO, NO],
+        [NO, 3, NO, NO, NO],
+    ]
+    assert tab.positions.tolist() == sorted(tab.positions.tolist())
+    assert tab.string_names == ['e', 'B', 'G', 'D', 'A', 'E']
+    assert tab.tuning.tolist() == STANDARD_TUNING.tolist()
+    assert tab.chords == [(6, [(0, 'Am'), (8, 'G/B'), (16, 'C')])]
+    assert tab.sections == [(5, 'Intro')]
+    assert (tab.capo, tab.bpm, tab.tuning_label, tab.key) == (2, 120, 'E A D G B E', 'Am')
+    # Capo raises every sounding note; open high e with capo 2 is F#4
+    assert tab.pitches()[0, 0] == 66
+    assert tab.pitches()[5, 0] == NO
+
+
+def test_parse_tab_markup_and_tuning():
+    tab = parse_tab(DROP_D)
+    assert tab.string_names == ['e', 'B', 'G', 'D', 'A', 'D']
+    assert tab.tuning.tolist() == [64, 59, 55, 50, 45, 38]
+    assert tab.frets[3:].tolist() == [[0, 5, 7]] * 3
+    assert (tab.frets[:3] == NO).all()
+
+
+def test_parse_tab_without_staff():
+    tab = parse_tab('Just some lyrics\nwith no tab at all')
+    assert tab.frets.shape == (6, 0)
+    assert batch_statistics([tab])[0]['notes'] == 0
+
+
+@pytest.mark.parametrize('chord, semitones, expected', [
+    ('Am', 3, 'Cm'), ('G/B', 2, 'A/C#'), ('Bbmaj7', 2, 'Cmaj7'), ('C', -1, 'B'), ('F#sus4', 12, 'F#sus4'),
+])
+def test_transpose_chord(chord, semitones, expected):
+    assert transpose_chord(chord, semitones) == expected
+
+
+def test_transpose_shifts_notes_chords_and_key():
+    tab = parse_tab(TAB)
+    up = tab.transpose(2)
+    notes = tab.note_mask
+    assert (up.pitches()[notes] == tab.pitches()[notes] + 2).all()
+    assert (up.frets[~notes] == NO).all()
+    assert up.chords == [(6, [(0, 'Bm'), (8, 'A/C#'), (16, 'D')])]
+    assert up.key == 'Bm'
+    # The original is untouched
+    assert tab.frets[0, 0] == 0 and tab.key == 'Am'
+
+
+def test_transpose_below_the_nut_moves_up_an_octave():
+    down = parse_tab(TAB).transpose(-1)
+    assert down.frets[0, 0] == 11
+    assert down.frets[1, 0] == 0
+    assert down.chords[0][1][0] == (0, 'G#m')
+
+
+def test_retune_keeps_every_pitch():
+    tab = parse_tab(TAB)
+    drop_d = tuning_from_names(['e', 'B', 'G', 'D', 'A', 'D'])
+    retuned = tab.retune(drop_d)
+    assert retuned.tuning.tolist() == drop_d.tolist()
+    assert (retuned.pitches() == tab.pitches()).all()
+    assert retuned.frets[5, 1] == 5
+
+
+def test_retune_rejects_other_string_counts():
+    with pytest.raises(ValueError):
+        parse_tab(TAB).retune([64, 59, 55, 50])
+
+
+def test_statistics():
+    stats = parse_tab(TAB).statistics()
+    assert stats == {
+        'columns': 5, 'notes': 14, 'fret_min': 1, 'fret_max': 12, 'fret_span': 11, 'mean_fret': 4.89,
+        'max_stretch': 1, 'position_jumps': 1, 'chord_density': 2.8, 'chord_lines': 1, 'sections': ['Intro'],
+        'difficulty': 6.0,
+    }
+
+
+def test_batch_statistics_matches_one_at_a_time():
+    # Mixed string counts, an empty tab, and a jump that would span two tabs if boundaries leaked
+    seven = parse_tab('\n'.join(f'{name}|--{fret}--|' for name, fret in zip('eBGDAEB', (0, 1, 0, 2, 3, 3, 0))))
+    tabs = [parse_tab(TAB), parse_tab(''), seven, parse_tab(DROP_D), parse_tab(TAB).transpose(5)]
+    assert batch_statistics(tabs) == [tab.statistics() for tab in tabs]
+    assert batch_statistics([]) == []
+
+
+def test_batch_statistics_counts_position_jumps():
+    stats = batch_statistics([parse_tab('e|--1--7--2--9--10--|')])[0]
+    # 1 -> 7, 7 -> 2 and 2 -> 9 are shifts of five or more frets; 9 -> 10 is not
+    assert stats['position_jumps'] == 3
+    assert stats['max_stretch'] == 0
+    assert np.isclose(stats['mean_fret'], 5.8)
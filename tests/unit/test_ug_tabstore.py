@@ -0,0 +1,136 @@
+"""
+Compressed tab store: reads round-trip on every codec, zstd falls back to
+zlib when it cannot train a dictionary, a rebuild swaps all three files at
+once, and the scraper serves stored tabs without a request.
+
+Usage: python3 -m pytest tests/unit/test_ug_tabstore.py
+"""
+
+import contextlib
+import io
+
+import pytest
+
+import ultimate_guitar_tabstore as tabstore
+from ultimate_guitar_scraper import UltimateGuitarScraper
+from ultimate_guitar_tabstore import TabStore, available_codecs, build_store
+
+CHORDS = ['Am', 'C', 'D', 'Em', 'F', 'G', 'A7sus4', 'Cadd9']
+
+needs_zstd = pytest.mark.skipif('zstd' not in available_codecs(), reason="zstandard is not installed")
+
+
+def records(songs=60, version=1):
+    out = []
+    for song in range(songs):
+        lines = [f'SONG {song} (ver {version})', 'Tuning: E A D G B E', '']
+        for bar in range(8):
+            lines.append('   '.join(CHORDS[(song * 3 + bar + i) % len(CHORDS)] for i in range(4)))
+            lines.append(f'e|---{song % 10}---{bar}---|  line {bar} of song {song}')
+        out.append({'url': f'https://tabs.example.com/tab/artist/song-{song}-chords-{version}',
+                    'title': f'Song {song}', 'content': '\n'.join(lines)})
+    return out
+
+
+def build(path, rows, codec):
+    with contextlib.redirect_stderr(io.StringIO()):
+        return build_store(path, rows, codec=codec)
+
+
+@pytest.mark.parametrize('codec', ['zlib', pytest.param('zstd', marks=needs_zstd)])
+def test_round_trip(tmp_path, codec):
+    rows = records()
+    assert build(tmp_path, rows, codec) == len(rows)
+    store = TabStore(tmp_path)
+    assert store.stats()['codec'] == codec
+    for row in rows:
+        result = store.get(row['url'])
+        assert (result['content'], result['title']) == (row['content'], row['title'])
+    # Lookups normalize the URL the same way the cache does
+    shouted = rows[0]['url'].replace('https://tabs.example.com', 'HTTPS://Tabs.Example.COM')
+    assert store.get(shouted)['content'] == rows[0]['content']
+    assert store.get('https://tabs.example.com/tab/missing') is None
+    store.close()
+
+
+@needs_zstd
+def test_zstd_falls_back_to_zlib_on_a_tiny_set(tmp_path):
+    rows = records(songs=2)
+    assert build(tmp_path, rows, 'zstd') == 2
+    store = TabStore(tmp_path)
+    assert store.stats()['codec'] == 'zlib'
+    assert store.get(rows[1]['url'])['content'] == rows[1]['content']
+    store.close()
+
+
+def test_untrainable_dictionary_falls_back_to_zlib(tmp_path, monkeypatch):
+    class Untrainable(tabstore.ZlibCodec):
+        name = 'zstd'
+
+        def train(self, samples, size):
+            return None
+
+    real = tabstore.create_codec
+    monkeypatch.setattr(tabstore, 'create_codec',
+                        lambda name, dictionary=b'': Untrainable() if name == 'zstd' else real(name, dictionary))
+    rows = records(songs=5)
+    build(tmp_path, rows, 'zstd')
+    store = TabStore(tmp_path)
+    assert store.stats()['codec'] == 'zlib'
+    assert store.get(rows[4]['url'])['content'] == rows[4]['content']
+    store.close()
+
+
+def test_rebuild_swaps_the_whole_build(tmp_path):
+    first, second = records(version=1), records(version=2)
+    build(tmp_path, first, 'zlib')
+    reader = TabStore(tmp_path)
+
+    build(tmp_path, second, 'zlib')
+    # A reader opened before the rebuild keeps its own dictionary, index and data
+    assert reader.get(first[0]['url'])['content'] == first[0]['content']
+    assert reader.get(second[0]['url']) is None
+    fresh = TabStore(tmp_path)
+    assert fresh.get(second[0]['url'])['content'] == second[0]['content']
+    assert fresh.get(first[0]['url']) is None
+
+    build(tmp_path, first, 'zlib')
+    # The live build and the one before it are kept; nothing else
+    builds = sorted(child.name for child in tmp_path.iterdir() if child.is_dir())
+    assert len(builds) == 2 and fresh.build.name in builds
+    assert sorted(child.name for child in tmp_path.iterdir() if not child.is_dir()) == ['CURRENT']
+    reader.close()
+    fresh.close()
+
+
+def test_store_without_builds_still_opens(tmp_path):
+    rows = records(songs=5)
+    build(tmp_path, rows, 'zlib')
+    live = tabstore.current_build(tmp_path)
+    for child in live.iterdir():
+        child.rename(tmp_path / child.name)
+    (tmp_path / 'CURRENT').unlink()
+    store = TabStore(tmp_path)
+    assert store.get(rows[2]['url'])['content'] == rows[2]['content']
+    store.close()
+
+
+def test_scraper_reads_tab_content_from_the_store(tmp_path):
+    rows = records(songs=5)
+    build(tmp_path, rows, 'zlib')
+    scraper = UltimateGuitarScraper(use_cache=False, use_corpus=False, tab_store=tmp_path)
+    fetched = []
+
+    def fetch(url, endpoint, timeout, scanner=None):
+        fetched.append(url)
+        raise ConnectionError("offline")
+
+    scraper._fetch = fetch
+    result = scraper.get_tab_content(rows[3]['url'])
+    assert result['success'] and result['content'] == rows[3]['content']
+    assert result['title'] == rows[3]['title'] and result['simhash']
+    assert fetched == []
+    # A tab the store does not hold still goes to the network
+    missing = scraper.get_tab_content('https://tabs.example.com/tab/missing')
+    assert not missing['success'] and fetched == ['https://tabs.example.com/tab/missing']
+    scraper.close()
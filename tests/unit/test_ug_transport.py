@@ -0,0 +1,148 @@
+"""
+Transport: 429/5xx are retried with backoff, Retry-After is honored (and
+pauses the host), an over-long Retry-After or an exhausted budget returns
+the last response, and the AIMD limit grows on success and halves once
+per burst of throttles.
+
+Usage: python3 -m pytest tests/unit/test_ug_transport.py
+"""
+
+import email.utils
+import threading
+
+import pytest
+import requests
+
+import ultimate_guitar_transport
+from ultimate_guitar_transport import AdaptiveConcurrency, Transport, parse_retry_after
+
+URL = 'https://tabs.example.com/tab/1'
+
+
+class Response:
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self.headers = {'Retry-After': retry_after} if retry_after is not None else {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(ultimate_guitar_transport.time, 'sleep', sleeps.append)
+    # No jitter: backoff is its upper bound and Retry-After is exact
+    monkeypatch.setattr(ultimate_guitar_transport.random, 'uniform', lambda low, high: high)
+    return sleeps
+
+
+def transport_with(outcomes, **options):
+    transport = Transport(backoff_base=0.5, backoff_cap=30.0, **options)
+    calls = []
+
+    def get(url, headers=None, timeout=None, stream=False):
+        calls.append(url)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    transport.session.get = get
+    return transport, calls
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('7') == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    later = email.utils.formatdate(ultimate_guitar_transport.time.time() + 120, usegmt=True)
+    assert 110 < parse_retry_after(later) <= 120
+
+
+def test_server_errors_back_off_exponentially(sleeps):
+    final = Response(200)
+    transport, calls = transport_with([Response(500), Response(502), final])
+    assert transport.get(URL) is final
+    assert sleeps == [0.5, 1.0]
+    stats = transport.stats()
+    assert (stats['requests'], stats['retries'], stats['server_errors'], stats['gave_up']) == (3, 2, 2, 0)
+
+
+def test_retry_after_sets_the_delay_and_pauses_the_host(sleeps, monkeypatch):
+    pauses = []
+    monkeypatch.setattr(AdaptiveConcurrency, 'pause', lambda gate, seconds: pauses.append(seconds))
+    first = Response(429, retry_after='2')
+    transport, calls = transport_with([first, Response(200)])
+    assert transport.get(URL).status_code == 200
+    # Retry-After plus at most one backoff base of jitter
+    assert sleeps == [2.5]
+    assert pauses == [2.5]
+    assert first.closed
+    assert transport.stats()['throttled'] == 1
+
+
+def test_pause_holds_new_requests():
+    gate = AdaptiveConcurrency(initial=2)
+    gate.pause(0.05)
+    before = ultimate_guitar_transport.time.monotonic()
+    gate.release(gate.acquire(), 'success')
+    assert ultimate_guitar_transport.time.monotonic() - before >= 0.05
+
+
+def test_long_retry_after_is_returned_without_waiting(sleeps):
+    throttled = Response(503, retry_after='3600')
+    transport, calls = transport_with([throttled])
+    assert transport.get(URL) is throttled
+    assert sleeps == [] and len(calls) == 1
+    assert transport.stats()['gave_up'] == 1
+
+
+def test_exhausted_retries_return_the_last_response(sleeps):
+    transport, calls = transport_with([Response(503), Response(503), Response(503)], max_retries=2)
+    assert transport.get(URL).status_code == 503
+    assert len(calls) == 3 and sleeps == [0.5, 1.0]
+
+
+def test_connection_errors_are_retried_then_raised(sleeps):
+    transport, calls = transport_with([requests.ConnectionError('reset'), Response(200)])
+    assert transport.get(URL).status_code == 200
+    transport, calls = transport_with([requests.Timeout('slow')] * 2, max_retries=1)
+    with pytest.raises(requests.Timeout):
+        transport.get(URL)
+    assert transport.stats()['connection_errors'] == 2
+
+
+def test_aimd_grows_on_success_and_halves_once_per_burst():
+    gate = AdaptiveConcurrency(initial=4, maximum=16)
+    for _ in range(8):
+        gate.release(gate.acquire(), 'success')
+    assert 5.5 < gate.limit < 6
+    grown = gate.limit
+
+    # Four requests in flight when the origin starts throttling: only the first throttle counts
+    started = [gate.acquire() for _ in range(4)]
+    for start in started:
+        gate.release(start, 'throttle')
+    assert gate.limit == pytest.approx(grown / 2)
+    # A request that started after the decrease can shrink it again
+    gate.release(gate.acquire(), 'error')
+    assert gate.limit == pytest.approx(grown / 4)
+    for _ in range(10):
+        gate.release(gate.acquire(), 'throttle')
+    assert gate.limit == 1
+
+
+def test_limit_caps_requests_in_flight():
+    gate = AdaptiveConcurrency(initial=2, maximum=4)
+    first = gate.acquire()
+    gate.acquire()
+    third = threading.Event()
+    waiter = threading.Thread(target=lambda: (gate.acquire(), third.set()))
+    waiter.start()
+    assert not third.wait(0.05)
+    gate.release(first, 'success')
+    assert third.wait(5)
+    waiter.join()
+    assert gate.in_flight == 2